@@ -1,5 +1,4 @@
 from django.db import models
-import jwt
 from django.conf import settings
 
 # Create your models here.
@@ -20,6 +19,8 @@ class Credential(models.Model):
         return self.email
 
     def generate_token(self):
+        # O PyJWT só é carregado quando um token é gerado
+        import jwt
         payload = {'user_id': self.id}
         return jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
     
@@ -6,21 +6,14 @@ from .models import Credential, EmailConfiguration
 # Importar forms para salvar no banco
 from .forms import CredentialForm
 # Importar configurações para Json e HTTP
-from django.http import JsonResponse
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.message import EmailMessage
+from modules.fastjson.fastjson import FastJsonResponse
 import json
 # Evitar problemas CSFR
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.hashers import check_password
 from django.utils.crypto import get_random_string
 from django.contrib.auth.hashers import make_password
-# Criar token
-import jwt
 import time
-import smtplib
-import ssl
 from django.conf import settings
 
 # Login
@@ -28,7 +21,7 @@ from django.conf import settings
 def login(request):
     # Verifica se o método da requisição é POST
     if request.method != 'POST':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Carrega o corpo da requisição como JSON
@@ -44,7 +37,7 @@ def login(request):
                 'email': [{'message': 'Este campo é obrigatório.', 'code': 'required'}] if not email else [],
                 'password': [{'message': 'Este campo é obrigatório.', 'code': 'required'}] if not password else [],
             }
-            return JsonResponse({'errors': errors}, status=400)
+            return FastJsonResponse({'errors': errors}, status=400)
 
         # Tenta encontrar o usuário pelo email
         try:
@@ -52,7 +45,7 @@ def login(request):
 
             # Verifica se a senha está correta
             if not password == user.password:
-                return JsonResponse({'error': 'Credenciais inválidas'}, status=400)
+                return FastJsonResponse({'error': 'Credenciais inválidas'}, status=400)
 
             # Gera token caso ainda não exista (usuários antigos)
             if not user.token:
@@ -72,21 +65,21 @@ def login(request):
             }
 
             # Retorna resposta de sucesso com os dados
-            return JsonResponse({'message': 'Login realizado com sucesso', 'payload': payload})
+            return FastJsonResponse({'message': 'Login realizado com sucesso', 'payload': payload})
 
         except Credential.DoesNotExist:
-            return JsonResponse({'error': 'Usuário não encontrado'}, status=400)
+            return FastJsonResponse({'error': 'Usuário não encontrado'}, status=400)
 
     except Exception as e:
         # Retorna erro genérico em caso de exceções
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
     
 # Cadastro
 @csrf_exempt
 def signup(request):
     # Verifica se a requisição é do tipo POST
     if request.method != 'POST':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Carrega o corpo da requisição como JSON
@@ -104,11 +97,11 @@ def signup(request):
                 'email': [{'message': 'Este campo é obrigatório.', 'code': 'required'}] if not email else [],
                 'password': [{'message': 'Este campo é obrigatório.', 'code': 'required'}] if not password else [],
             }
-            return JsonResponse({'errors': errors}, status=400)
+            return FastJsonResponse({'errors': errors}, status=400)
 
         # Verifica se já existe uma conta com o e-mail informado
         if Credential.objects.filter(email=email).exists():
-            return JsonResponse({'error': 'Já existe uma conta cadastrada com este e-mail'}, status=400)
+            return FastJsonResponse({'error': 'Já existe uma conta cadastrada com este e-mail'}, status=400)
 
         # Cria o usuário com senha criptografada
         user = Credential.objects.create(
@@ -125,17 +118,17 @@ def signup(request):
         user.save()
 
         # Retorna mensagem de sucesso
-        return JsonResponse({'message': 'Cadastro realizado com sucesso'})
+        return FastJsonResponse({'message': 'Cadastro realizado com sucesso'})
 
     except Exception as e:
         # Retorna erro genérico em caso de exceções
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 @csrf_exempt
 def admin_create(request):
     # Verifica se a requisição é do tipo POST
     if request.method != 'POST':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Carrega o corpo da requisição como JSON
@@ -148,15 +141,15 @@ def admin_create(request):
         auth_code = data.get('auth_code')
 
         if not all([email, password, name, auth_code]):
-            return JsonResponse({'error': 'Campos obrigatórios: name, email, password, auth_code'}, status=400)
+            return FastJsonResponse({'error': 'Campos obrigatórios: name, email, password, auth_code'}, status=400)
 
         # Verifica se o auth_code existe em algum registro
         if not Credential.objects.filter(auth_code=auth_code).exists():
-            return JsonResponse({'error': 'Código de autorização inválido'}, status=403)
+            return FastJsonResponse({'error': 'Código de autorização inválido'}, status=403)
 
         # Verifica se o e-mail já está cadastrado
         if Credential.objects.filter(email=email).exists():
-            return JsonResponse({'error': 'Usuário já existe'}, status=409)
+            return FastJsonResponse({'error': 'Usuário já existe'}, status=409)
 
         # Cria o novo usuário
         user = Credential.objects.create(
@@ -173,7 +166,7 @@ def admin_create(request):
         user.save()
 
         # Retorna mensagem de sucesso
-        return JsonResponse({
+        return FastJsonResponse({
             'message': 'Usuário criado com sucesso',
             'email': user.email,
             'name': user.name,
@@ -181,14 +174,14 @@ def admin_create(request):
 
     except Exception as e:
         # Retorna erro genérico em caso de exceções
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # Mail
 @csrf_exempt
 def send_email(request):
     # Verifica se a requisição é do tipo POST
     if request.method != 'POST':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Carrega os dados da requisição
@@ -201,12 +194,17 @@ def send_email(request):
         message = data.get('message')
 
         if not all([from_email, to_email, subject, message]):
-            return JsonResponse({'error': 'Todos os campos são obrigatórios'}, status=400)
+            return FastJsonResponse({'error': 'Todos os campos são obrigatórios'}, status=400)
 
         # Busca as configurações do remetente informado
         config = EmailConfiguration.objects.filter(email=from_email).first()
         if not config:
-            return JsonResponse({'error': 'Configuração de e-mail não encontrada para esse remetente'}, status=404)
+            return FastJsonResponse({'error': 'Configuração de e-mail não encontrada para esse remetente'}, status=404)
+
+        # Módulos de e-mail carregados apenas no envio, fora da inicialização dos workers
+        from email.message import EmailMessage
+        import smtplib
+        import ssl
 
         # Criação do e-mail
         email_msg = EmailMessage()
@@ -227,7 +225,7 @@ def send_email(request):
                 server.login(config.email, config.password)
                 server.send_message(email_msg)
 
-        return JsonResponse({'success': 'E-mail enviado com sucesso', 'remetente': config.email})
+        return FastJsonResponse({'success': 'E-mail enviado com sucesso', 'remetente': config.email})
 
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
+        return FastJsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
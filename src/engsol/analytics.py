@@ -0,0 +1,184 @@
+import math
+from datetime import date
+from itertools import groupby
+
+from django.core.cache import cache
+from django.db.models import Count, DateField, DurationField, ExpressionWrapper, F, Window
+from django.db.models.functions import Lag, TruncMonth
+from django.utils import timezone
+
+from .models import Condition, Information, Ranking
+from . import versions
+
+
+def percentile(values, fraction):
+    # Percentil com interpolação linear (equivalente ao PERCENTILE_CONT) sobre valores ordenados
+    position = (len(values) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def stage_durations(date_from=None, date_to=None):
+
+    """
+    Queryset com a duração de cada etapa da timeline, calculada no banco.
+
+    Cada etapa termina quando a seguinte começa: para cada ranking, Lag() busca a
+    etapa anterior do mesmo projeto (ordenada por 'last_update') e a duração é
+    atribuída à condição dessa etapa anterior.
+
+    Args:
+        date_from (date, opcional): Considera apenas etapas iniciadas a partir desta data.
+        date_to (date, opcional): Considera apenas etapas encerradas até esta data.
+    """
+
+    window = {
+        'partition_by': [F('project_id')],
+        'order_by': [F('last_update').asc(), F('id').asc()],
+    }
+
+    rankings = Ranking.objects.filter(last_update__isnull=False)
+
+    # Filtrar o fim da etapa antes da janela não altera o Lag das etapas anteriores
+    if date_to:
+        rankings = rankings.filter(last_update__lte=date_to)
+
+    rankings = rankings.annotate(
+        stage_condition=Window(Lag('condition_id'), **window),
+        stage_start=Window(Lag('last_update', output_field=DateField()), **window),
+    ).annotate(
+        duration=ExpressionWrapper(F('last_update') - F('stage_start'), output_field=DurationField()),
+    ).filter(stage_start__isnull=False)
+
+    # O início da etapa vem da janela, então o filtro é aplicado sobre o resultado dela
+    if date_from:
+        rankings = rankings.filter(stage_start__gte=date_from)
+
+    return rankings.order_by('stage_condition', 'duration').values_list('stage_condition', 'duration')
+
+
+def condition_durations(date_from=None, date_to=None):
+
+    """
+    Estatísticas (quantidade, média, mediana e p90 em dias) do tempo que os projetos
+    permanecem em cada condição.
+
+    O resultado fica em cache até a próxima escrita no portfólio: a versão vai
+    junto do valor, e não na chave, para que cada período tenha uma única entrada
+    (substituída no recálculo) em vez de uma por versão.
+    """
+
+    key = f'condition_durations:{date_from}:{date_to}'
+    version = versions.current(versions.PORTFOLIO)
+    cached = cache.get(key)
+    if cached is not None and cached['version'] == version:
+        return cached['result']
+
+    names = dict(Condition.objects.values_list('id', 'name'))
+
+    result = []
+    # As durações chegam agrupadas por condição e ordenadas
+    for condition_id, rows in groupby(stage_durations(date_from, date_to).iterator(), key=lambda row: row[0]):
+        days = [duration.days for _, duration in rows]
+        result.append({
+            'condition': {
+                'id': condition_id,
+                'name': names.get(condition_id)
+            },
+            'count': len(days),
+            'mean': round(sum(days) / len(days), 2),
+            'median': round(percentile(days, 0.5), 2),
+            'p90': round(percentile(days, 0.9), 2),
+        })
+
+    cache.set(key, {'version': version, 'result': result}, None)
+    return result
+
+
+def month_range(start, end):
+    # Meses (ano, mês) de 'start' até 'end', inclusive
+    year, month = start
+    while (year, month) <= end:
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def delivery_version(year, month):
+    # Conjunto versionado (DataVersion) das entregas do mês
+    return f'delivery:{year:04d}-{month:02d}'
+
+
+def delivery_month_key(year, month, generation):
+    return f'delivery_month:{year:04d}-{month:02d}:{generation}'
+
+
+def delivery_generations(months):
+    # Geração atual de cada mês (0 enquanto nenhuma entrega do mês foi alterada), em uma consulta
+    if not months:
+        return {}
+    return dict(zip(months, versions.current_many(*(delivery_version(*month) for month in months))))
+
+
+def delivery_series(start, end):
+
+    """
+    Quantidade de projetos entregues por mês entre 'start' e 'end' (tuplas
+    (ano, mês), inclusive).
+
+    Meses já encerrados ficam em cache sem expiração, na chave da geração atual
+    do mês (versão em DataVersion, a mesma em todos os processos); alterar uma data
+    de entrega do mês incrementa a geração (ver 'invalidate_delivery_months'). Os
+    meses sem cache são calculados juntos em um único GROUP BY por mês.
+    """
+
+    months = list(month_range(start, end))
+    today = timezone.localdate()
+    current = (today.year, today.month)
+
+    # Meses encerrados já calculados. A geração é lida antes da consulta: uma
+    # contagem calculada antes de um commit fica na geração anterior e não é mais lida
+    closed = [month for month in months if month < current]
+    generations = delivery_generations(closed)
+    keys = {month: delivery_month_key(*month, generations[month]) for month in closed}
+    cached = cache.get_many(list(keys.values()))
+    counts = {month: cached[key] for month, key in keys.items() if key in cached}
+
+    # Demais meses em uma única consulta
+    missing = [month for month in months if month not in counts]
+    if missing:
+        first, last = missing[0], missing[-1]
+        next_year, next_month = (last[0] + 1, 1) if last[1] == 12 else (last[0], last[1] + 1)
+
+        rows = (
+            Information.objects.filter(
+                delivered_date__gte=date(first[0], first[1], 1),
+                delivered_date__lt=date(next_year, next_month, 1),
+            )
+            .annotate(month=TruncMonth('delivered_date'))
+            .values('month')
+            .annotate(count=Count('project', distinct=True))
+            .order_by('month')
+        )
+        found = {(row['month'].year, row['month'].month): row['count'] for row in rows}
+
+        for month in missing:
+            counts[month] = found.get(month, 0)
+
+        cache.set_many({
+            keys[month]: counts[month]
+            for month in missing
+            if month < current
+        }, None)
+
+    return [
+        {'year': year, 'month': month, 'count': counts[(year, month)]}
+        for year, month in months
+    ]
+
+
+def invalidate_delivery_months(dates):
+    # Incrementa, após o commit, a geração dos meses das datas de entrega alteradas
+    names = sorted({delivery_version(day.year, day.month) for day in dates if day})
+    if names:
+        versions.changed(*names)
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import ArchivedProject, Client, DeletionJob, Information, Project, Ranking
+from .serializers import FIELDS, Fieldset, project_queryset, serialize_project
+from . import changes, hooks
+
+# Arquivamento de projetos inativos: o documento completo do projeto vai para
+# 'ArchivedProject' e as linhas do projeto, do cliente, das informações e da timeline
+# saem das tabelas principais.
+
+# Documento guardado no arquivo (o mesmo do info_project, com a data de criação)
+ARCHIVE_FIELDSET = Fieldset(FIELDS, ('information', 'average_time', 'timeline'))
+
+# Projetos arquivados por transação
+BATCH_SIZE = 200
+
+
+def archivable_projects(days):
+    # Projetos inativos há mais de 'days' dias que não estão na fila de exclusão
+    cutoff = timezone.now() - timedelta(days=days)
+    deleting = DeletionJob.objects.filter(
+        kind=DeletionJob.PROJECT,
+        target_id=OuterRef('pk'),
+        status__in=(DeletionJob.PENDING, DeletionJob.RUNNING, DeletionJob.FAILED),
+    )
+    return Project.objects.filter(status=False, updated_at__lt=cutoff).exclude(Exists(deleting))
+
+
+def archive_batch(project_ids):
+
+    """
+    Arquiva os projetos informados em uma única transação.
+
+    Returns:
+        int: Quantidade de projetos arquivados.
+    """
+
+    with transaction.atomic():
+        projects = list(project_queryset(Project.objects.filter(id__in=project_ids, status=False), ARCHIVE_FIELDSET))
+        if not projects:
+            return 0
+
+        ArchivedProject.objects.bulk_create([
+            ArchivedProject(
+                project_id=project.id,
+                key=project.key,
+                name=project.name,
+                created_at=project.created_at,
+                document=serialize_project(project, ARCHIVE_FIELDSET),
+            )
+            for project in projects
+        ])
+
+        ids = [project.id for project in projects]
+        delivered_dates = list(Information.objects.filter(project_id__in=ids).values_list('delivered_date', flat=True))
+
+        # Dependentes primeiro, cada tabela em um único DELETE
+        Ranking.objects.filter(project_id__in=ids).delete()
+        Client.objects.filter(project_id__in=ids).delete()
+        Information.objects.filter(project_id__in=ids).delete()
+        Project.objects.filter(id__in=ids).delete()
+
+        hooks.projects_deleted(ids, [project.key for project in projects])
+        changes.record(*(changes.delete(Project, project_id) for project_id in ids))
+        hooks.deliveries_changed(delivered_dates)
+
+    return len(projects)
+
+
+def serialize_archived(archived):
+    return {
+        **archived.document,
+        'archived_at': archived.archived_at,
+    }
@@ -0,0 +1,255 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.csrf import csrf_exempt
+
+from .filters import MAX_PAGE_SIZE, FilterError, filter_projects, page_params, parse_ids, parse_int
+from .models import Project
+from .serializers import Fieldset, FieldsetError, project_queryset, serialize_project
+from . import documents, events, kpis, snapshot
+
+from modules.fastjson.fastjson import FastJsonResponse
+from modules.replica.replica import read_replica
+
+# Versões assíncronas (ASGI) das views de leitura, sobre o ORM assíncrono.
+# Respondem exatamente como as views síncronas de mesmo nome em 'views.py'.
+# 'project_events' existe apenas aqui e exige um servidor ASGI.
+
+
+@sync_to_async
+def serialize_projects(projects, fieldset):
+    # Os dados já vêm pré-carregados; apenas projetos sem estatísticas gravadas consultam o banco
+    return [serialize_project(project, fieldset) for project in projects]
+
+
+# Informações do projeto
+@csrf_exempt
+@read_replica
+async def info_project(request):
+    # Verifica se a requisição é do tipo GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        # Obtém o ID do projeto via parâmetros da URL
+        project_id = request.GET.get('id')
+
+        # Verifica se o ID foi fornecido
+        if not project_id:
+            return FastJsonResponse({'error': 'Parâmetro "id" é obrigatório'}, status=400)
+
+        # Campos e expansões pedidos (padrão: documento completo)
+        fieldset = Fieldset.from_request(
+            request,
+            project_fields=('id', 'name', 'key', 'version'),
+            include=('information', 'average_time', 'timeline')
+        )
+
+        # Busca o projeto pelo ID já com cliente, informações e rankings necessários
+        project = await aget_object_or_404(project_queryset(Project.objects.all(), fieldset), id=project_id)
+
+        return FastJsonResponse((await serialize_projects([project], fieldset))[0])
+
+    except FieldsetError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+
+    except Exception as e:
+        # Retorna erro genérico em caso de exceções
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+
+# Informações de vários projetos
+@csrf_exempt
+@read_replica
+async def info_projects(request):
+    # Verifica se a requisição é do tipo GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        # Obtém os IDs dos projetos via parâmetros da URL
+        ids = parse_ids(request.GET.get('ids', ''))
+
+        # Verifica se os IDs foram fornecidos
+        if not ids:
+            return FastJsonResponse({'error': 'Parâmetro "ids" é obrigatório'}, status=400)
+        if len(ids) > MAX_PAGE_SIZE:
+            return FastJsonResponse({'error': f'Máximo de {MAX_PAGE_SIZE} projetos por requisição'}, status=400)
+
+        # Campos e expansões pedidos (padrão: documento completo)
+        fieldset = Fieldset.from_request(
+            request,
+            project_fields=('id', 'name', 'key', 'version'),
+            include=('information', 'average_time', 'timeline')
+        )
+
+        # Busca todos os projetos com as mesmas consultas de um único info_project
+        found = [project async for project in project_queryset(Project.objects.filter(id__in=ids), fieldset)]
+        projects = dict(zip((project.id for project in found), await serialize_projects(found, fieldset)))
+
+        # Monta os documentos na ordem pedida e informa os ids não encontrados
+        return FastJsonResponse({
+            'results': [projects[project_id] for project_id in ids if project_id in projects],
+            'missing': [project_id for project_id in ids if project_id not in projects],
+        })
+
+    except (FieldsetError, FilterError) as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+
+    except Exception as e:
+        # Retorna erro genérico em caso de exceções
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+
+# Listar todos os projetos
+@csrf_exempt
+@read_replica
+async def list_project(request):
+    # Verifica se a requisição é do tipo GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        # Portfólio completo servido do snapshot já serializado e comprimido
+        if snapshot.is_default(request):
+            return await sync_to_async(snapshot.response)(request)
+
+        # Campos e expansões pedidos (padrão: documento completo)
+        fieldset = Fieldset.from_request(
+            request,
+            project_fields=('id', 'name', 'key', 'created_at', 'version'),
+            include=('information', 'timeline')
+        )
+
+        # Aplica os filtros e a ordenação pedidos na URL
+        projects = project_queryset(filter_projects(Project.objects.filter(status=True), request.GET), fieldset)
+
+        # Pagina o resultado quando 'page' ou 'page_size' forem informados
+        page = page_params(request.GET)
+        if page is not None:
+            number, page_size = page
+            count = await projects.acount()
+            projects = projects[(number - 1) * page_size:number * page_size]
+
+        # Busca os projetos com iteração assíncrona
+        project_list = await serialize_projects([project async for project in projects], fieldset)
+
+        # Resposta paginada
+        if page is not None:
+            return FastJsonResponse({'count': count, 'page': number, 'page_size': page_size, 'results': project_list})
+
+        # Retorna todos os projetos encontrados
+        return FastJsonResponse(project_list, safe=False)
+
+    except (FieldsetError, FilterError) as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+
+# Buscar informações do projeto
+@csrf_exempt
+@read_replica
+async def search_project(request):
+    # Verifica se o método é GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        # Buscar o parâmetro na URL
+        key = request.GET.get('key', None)
+
+        # Documento padrão já serializado em cache (apenas a versão é consultada)
+        cached = key and documents.is_default(request)
+        if cached:
+            version, content = await documents.aget(key)
+            if content is not None:
+                return FastJsonResponse.from_content(content)
+
+        # Campos e expansões pedidos (padrão: documento completo)
+        fieldset = Fieldset.from_request(
+            request,
+            project_fields=('id', 'name', 'key', 'version'),
+            include=('information', 'timeline')
+        )
+
+        # Buscar o projeto com base na chave fornecida, já com as relações necessárias
+        project = await aget_object_or_404(project_queryset(Project.objects.all(), fieldset), key=key)
+
+        response = FastJsonResponse((await serialize_projects([project], fieldset))[0])
+        if cached:
+            await documents.aadd(key, version, response.content)
+        return response
+
+    except FieldsetError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+
+# Chamar todos os dashboards
+@csrf_exempt
+@read_replica
+async def dashboard(request):
+    # Verifica se a requisição é do tipo POST
+    if request.method != 'POST':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        # Carregar dados do json
+        data = json.loads(request.body.decode('utf-8'))
+
+        # Os indicadores rodam juntos em uma única passagem pela thread síncrona do ORM,
+        # com o mesmo código da view síncrona
+        response_data = await sync_to_async(kpis.dashboard)(data)
+
+        return FastJsonResponse(response_data)
+
+    except FilterError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+
+    except Exception as e:
+        # Retorna erro genérico em caso de exceções
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+
+# Eventos da timeline do projeto (Server-Sent Events), pela chave do projeto
+@csrf_exempt
+async def project_events(request):
+    # Verifica se a requisição é do tipo GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    # Em WSGI o corpo infinito seria lido inteiro antes de responder, prendendo o worker
+    if not isinstance(request, ASGIRequest):
+        return FastJsonResponse({'error': 'Eventos disponíveis apenas com servidor ASGI'}, status=501)
+
+    try:
+        # Buscar o parâmetro na URL
+        key = request.GET.get('key')
+        if not key:
+            return FastJsonResponse({'error': 'Parâmetro "key" é obrigatório'}, status=400)
+
+        # Último evento recebido, enviado pelo navegador ao reconectar
+        since = parse_int({'Last-Event-ID': request.headers.get('Last-Event-ID')}, 'Last-Event-ID', minimum=0)
+
+        project_id = await Project.objects.filter(key=key).values_list('id', flat=True).afirst()
+        if project_id is None:
+            return FastJsonResponse({'error': 'Projeto não encontrado'}, status=404)
+
+        response = StreamingHttpResponse(events.stream(project_id, key, since), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Desativa o buffer do nginx para que cada evento saia imediatamente
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    except FilterError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
@@ -0,0 +1,83 @@
+import unicodedata
+from bisect import bisect_left
+
+from .models import Client, Project
+from .versions import PORTFOLIO, VersionedValue
+
+
+def normalize(text):
+    # Minúsculas, sem acentos e com espaços simples
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.lower().split())
+
+
+class PrefixIndex:
+
+    """
+    Índice de prefixos sobre os nomes normalizados de projetos e clientes.
+
+    Cada nome gera uma entrada por palavra (o nome a partir daquela palavra), de
+    modo que 'rio' encontra 'Ponte Rio Negro'. As entradas ficam em uma lista
+    ordenada e a busca usa bisect.
+    """
+
+    def __init__(self, entries, labels):
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.project_ids = [project_id for _, project_id in entries]
+        self.labels = labels
+
+    @classmethod
+    def build(cls, names, labels):
+        entries = []
+        for name, project_id in names:
+            words = normalize(name).split(' ')
+            for i in range(len(words)):
+                if words[i]:
+                    entries.append((' '.join(words[i:]), project_id))
+        return cls(entries, labels)
+
+    def lookup(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        position = bisect_left(self.keys, prefix)
+
+        while position < len(self.keys) and self.keys[position].startswith(prefix):
+            project_id = self.project_ids[position]
+            if project_id not in seen:
+                seen.add(project_id)
+                results.append({'id': project_id, **self.labels[project_id]})
+                if len(results) >= limit:
+                    break
+            position += 1
+
+        return results
+
+
+def load_index():
+    labels = {}
+    names = []
+
+    for project_id, name in Project.objects.filter(status=True).values_list('id', 'name'):
+        labels[project_id] = {'name': name, 'client': None}
+        names.append((name, project_id))
+
+    clients = Client.objects.filter(project__status=True).values_list('project_id', 'name')
+    for project_id, name in clients:
+        labels[project_id]['client'] = labels[project_id]['client'] or name
+        names.append((name, project_id))
+
+    return PrefixIndex.build(names, labels)
+
+
+# Índice do processo, construído no primeiro uso
+index = VersionedValue(PORTFOLIO, load_index)
+
+
+def autocomplete(prefix, limit=10):
+    return index.get().lookup(prefix, limit)
@@ -0,0 +1,152 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import DateTimeField, ExpressionWrapper, Value
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from .models import Change, Client, Condition, DataVersion, Information, Note, Project, Ranking
+from .serializers import serialize_value
+
+# Feed de alterações: cada escrita grava linhas compactas em 'Change', e o endpoint
+# 'changes?since=' devolve, em ordem, o que mudou depois do cursor do cliente.
+# O cursor é o id da última alteração recebida.
+#
+# As linhas são gravadas na mesma transação da escrita: ou as duas confirmam, ou
+# nenhuma. O id, porém, é atribuído no INSERT, e não no commit: uma transação com
+# id menor pode confirmar depois de outra com id maior, e um cursor que já passou
+# dela nunca a veria. Por isso o feed serve apenas as alterações mais antigas que
+# CHANGES_VISIBILITY_LAG segundos, comparando 'created_at' e o horário atual pelo
+# relógio do banco (sem depender do relógio de cada servidor).
+
+# Nome da entidade e campos enviados em cada inclusão/alteração
+ENTITIES = {
+    Project: ('project', ('id', 'name', 'key', 'status', 'version')),
+    Client: ('client', ('id', 'project_id', 'name', 'email')),
+    Information: ('information', (
+        'id', 'project_id', 'cost_estimate', 'current_cost', 'start_date', 'delivered_date', 'current_date', 'version'
+    )),
+    Ranking: ('ranking', ('id', 'project_id', 'condition_id', 'rank', 'last_update', 'note', 'description', 'version')),
+    Condition: ('condition', ('id', 'name', 'status')),
+    Note: ('note', ('id', 'name', 'status')),
+}
+
+# Maior id já removido pela retenção (guardado como uma versão de dados)
+PRUNED = 'changes_pruned'
+
+
+def upsert(instance):
+    entity, fields = ENTITIES[type(instance)]
+    return Change(
+        entity=entity,
+        entity_id=instance.pk,
+        project_id=instance.pk if entity == 'project' else getattr(instance, 'project_id', None),
+        action=Change.UPSERT,
+        data={field: serialize_value(getattr(instance, field)) for field in fields},
+    )
+
+
+def delete(model, entity_id, project_id=None):
+    entity, _ = ENTITIES[model]
+    if model is Project:
+        project_id = entity_id
+    return Change(entity=entity, entity_id=entity_id, project_id=project_id, action=Change.DELETE)
+
+
+def record(*changes):
+
+    """
+    Grava as alterações (criadas por 'upsert' e 'delete') na ordem recebida.
+
+    Exemplo:
+        changes.record(changes.upsert(project), changes.delete(Ranking, ranking_id, project.id))
+    """
+
+    if changes:
+        Change.objects.bulk_create(changes)
+
+
+def pruned_until():
+    return DataVersion.objects.filter(name=PRUNED).values_list('version', flat=True).first() or 0
+
+
+def visible():
+    # Alterações já fora da janela em que um INSERT de id menor ainda pode confirmar
+    horizon = ExpressionWrapper(
+        Now() - Value(timedelta(seconds=settings.CHANGES_VISIBILITY_LAG)), output_field=DateTimeField()
+    )
+    return Change.objects.filter(created_at__lte=horizon)
+
+
+def latest():
+    return visible().order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def prune(days=None):
+
+    """
+    Remove as alterações mais antigas que a retenção e avança o marcador usado para
+    pedir a ressincronização dos cursores anteriores a ele.
+
+    Returns:
+        int: Quantidade de alterações removidas.
+    """
+
+    days = settings.CHANGES_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+
+    last = Change.objects.filter(created_at__lt=cutoff).order_by('-id').values_list('id', flat=True).first()
+    if last is None:
+        return 0
+
+    DataVersion.objects.update_or_create(name=PRUNED, defaults={'version': last})
+    deleted, _ = Change.objects.filter(id__lte=last).delete()
+    return deleted
+
+
+def feed(since, limit):
+
+    """
+    Alterações posteriores ao cursor 'since', no máximo 'limit' por página.
+
+    Dentro da página, várias alterações da mesma linha viram apenas a última.
+    Cursores anteriores à retenção (ou posteriores ao fim do registro) recebem
+    'resync': o cliente deve recarregar o portfólio e seguir do novo cursor.
+    """
+
+    pruned = pruned_until()
+    last = max(latest(), pruned)
+    if since < pruned or since > last:
+        return {'resync': True, 'cursor': last, 'has_more': False, 'changes': []}
+
+    rows = list(visible().filter(id__gt=since).order_by('id')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        'resync': False,
+        'cursor': rows[-1].id if rows else since,
+        'has_more': has_more,
+        'changes': [serialize_change(row) for row in compact(rows)],
+    }
+
+
+def compact(rows):
+    # Última alteração de cada linha, na ordem em que ocorreu
+    last = {}
+    for row in rows:
+        last.pop((row.entity, row.entity_id), None)
+        last[(row.entity, row.entity_id)] = row
+    return list(last.values())
+
+
+def serialize_change(row):
+    return {
+        'id': row.id,
+        'entity': row.entity,
+        'entity_id': row.entity_id,
+        'project_id': row.project_id,
+        'action': row.action,
+        'data': row.data,
+        'at': row.created_at,
+    }
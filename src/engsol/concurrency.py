@@ -0,0 +1,64 @@
+from django.db.models import F
+from django.utils import timezone
+
+# Controle de concorrência otimista das escritas em Project, Information e Ranking.
+#
+# Cada linha tem uma coluna 'version', incrementada a cada alteração. Quem envia a
+# versão lida junto com a alteração só grava se a linha não mudou desde então; caso
+# contrário recebe 409 com o estado atual, sem bloquear a linha durante a edição.
+
+# Campos editáveis de cada entidade versionada
+PROJECT_FIELDS = ('name',)
+INFORMATION_FIELDS = ('cost_estimate', 'current_cost', 'start_date', 'delivered_date', 'current_date')
+RANKING_FIELDS = ('condition', 'rank', 'last_update', 'note', 'description')
+
+
+class VersionConflict(Exception):
+
+    def __init__(self, instance):
+        super().__init__(f'{type(instance).__name__} {instance.pk} foi alterado por outra requisição')
+        self.instance = instance
+
+
+def parse_version(data):
+    # Versão enviada no bloco do documento (opcional)
+    version = data.get('version')
+    if version is None:
+        return None
+    if isinstance(version, bool) or not isinstance(version, int):
+        raise ValueError('Campo "version" deve ser um número inteiro')
+    return version
+
+
+def save_versioned(instance, fields, version=None):
+
+    """
+    Grava apenas 'fields' de 'instance' em um UPDATE condicional à versão.
+
+    Sem 'version', grava sem conferir (clientes que ainda não enviam a versão),
+    mas incrementa a versão do mesmo jeito.
+
+    Raises:
+        VersionConflict: A linha mudou (ou foi apagada) depois da versão lida.
+    """
+
+    queryset = type(instance).objects.filter(pk=instance.pk)
+    if version is not None:
+        queryset = queryset.filter(version=version)
+
+    instance.updated_at = timezone.now()
+    values = {field: getattr(instance, field) for field in fields}
+    if not queryset.update(**values, updated_at=instance.updated_at, version=F('version') + 1):
+        raise VersionConflict(instance)
+
+    instance.version = (instance.version if version is None else version) + 1
+
+
+def delete_versioned(instance, version=None):
+    # Apaga a linha apenas se ela ainda estiver na versão lida
+    queryset = type(instance).objects.filter(pk=instance.pk)
+    if version is not None:
+        queryset = queryset.filter(version=version)
+    deleted, _ = queryset.delete()
+    if not deleted:
+        raise VersionConflict(instance)
@@ -0,0 +1,193 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Client, Condition, DeletionJob, Information, Project, Ranking
+from . import changes, documents, hooks, search, versions
+
+# Exclusão em segundo plano ('?mode=background' em delete_project/delete_condition).
+#
+# A view apenas desativa o registro (status=False) e cria um DeletionJob. O comando
+# 'run_deletion_jobs' apaga os dependentes em lotes limitados, cada um em sua própria
+# transação curta, e por fim o próprio registro. O progresso fica gravado no job; se
+# o processo cair, a próxima execução continua do que ainda existe no banco.
+#
+# Cada execução reserva o job com um UPDATE condicional antes de começar. Um job em
+# execução só pode ser retomado por outro processo depois de 'DELETION_JOB_LEASE'
+# segundos sem progresso (cada lote atualiza 'updated_at').
+
+# Linhas apagadas por lote
+BATCH_SIZE = 1000
+
+
+def project_steps(project_id):
+    # (nome da etapa, queryset dos dependentes, campos lidos de cada lote, ação após cada lote)
+    return [
+        ('ranking', Ranking.objects.filter(project_id=project_id), (), None),
+        ('client', Client.objects.filter(project_id=project_id), (), None),
+        ('information', Information.objects.filter(project_id=project_id), ('delivered_date',), information_deleted),
+    ]
+
+
+def condition_steps(condition_id):
+    return [
+        ('ranking', Ranking.objects.filter(condition_id=condition_id), ('project_id',), rankings_deleted),
+    ]
+
+
+def information_deleted(rows):
+    # Meses de entrega que deixam de contar o projeto
+    hooks.deliveries_changed([row['delivered_date'] for row in rows])
+
+
+def rankings_deleted(rows):
+    # Projetos que perderam etapas da timeline
+    hooks.projects_changed(sorted({row['project_id'] for row in rows}))
+    changes.record(*(changes.delete(Ranking, row['pk'], row['project_id']) for row in rows))
+
+
+STEPS = {
+    DeletionJob.PROJECT: project_steps,
+    DeletionJob.CONDITION: condition_steps,
+}
+
+
+def schedule(kind, target):
+
+    """
+    Desativa 'target' (projeto ou condição) e cria o job que o apagará.
+
+    Se já houver um job não concluído para o mesmo registro, ele é devolvido.
+    """
+
+    with transaction.atomic():
+        job = DeletionJob.objects.filter(
+            kind=kind, target_id=target.id, status__in=(DeletionJob.PENDING, DeletionJob.RUNNING)
+        ).first()
+        if job is not None:
+            return job
+
+        target.status = False
+        target.save(update_fields=['status', 'updated_at'])
+        changes.record(changes.upsert(target))
+
+        total = sum(queryset.count() for _, queryset, _, _ in STEPS[kind](target.id)) + 1
+        job = DeletionJob.objects.create(kind=kind, target_id=target.id, total=total)
+
+        # Projetos inativos saem das listagens, indicadores e da busca; condições
+        # inativas, do mapa
+        if kind == DeletionJob.PROJECT:
+            # O documento é removido antes do incremento, na versão em que foi gravado
+            documents.remove([target.key])
+            transaction.on_commit(lambda: search.get_backend().remove([target.id]))
+            versions.changed(versions.PORTFOLIO)
+        else:
+            hooks.conditions_changed()
+
+    return job
+
+
+def delete_batch(job, step, queryset, fields, action, batch_size):
+    # Apaga um lote e registra o progresso na mesma transação; devolve a quantidade apagada
+    with transaction.atomic():
+        rows = list(queryset.order_by('pk').values('pk', *fields)[:batch_size])
+        if not rows:
+            return 0
+
+        queryset.model.objects.filter(pk__in=[row['pk'] for row in rows]).delete()
+        if action is not None:
+            action(rows)
+
+        DeletionJob.objects.filter(pk=job.pk).update(
+            step=step, deleted=F('deleted') + len(rows), updated_at=timezone.now()
+        )
+        return len(rows)
+
+
+def delete_target(job):
+    with transaction.atomic():
+        if job.kind == DeletionJob.PROJECT:
+            project = Project.objects.filter(id=job.target_id).only('id', 'key').first()
+            if project is not None:
+                # Restam apenas as estatísticas e o documento de busca (um registro cada)
+                project.delete()
+                hooks.projects_deleted([job.target_id], [project.key])
+                changes.record(changes.delete(Project, job.target_id))
+        else:
+            deleted, _ = Condition.objects.filter(id=job.target_id).delete()
+            if deleted:
+                hooks.conditions_changed()
+                changes.record(changes.delete(Condition, job.target_id))
+
+        DeletionJob.objects.filter(pk=job.pk).update(
+            step=job.kind, deleted=F('deleted') + 1, status=DeletionJob.DONE,
+            updated_at=timezone.now(), finished_at=timezone.now(),
+        )
+
+
+def claim(job):
+    # Reserva o job para este processo; False se outro processo já o reservou
+    now = timezone.now()
+    abandoned = Q(status=DeletionJob.RUNNING, updated_at__lt=now - timedelta(seconds=settings.DELETION_JOB_LEASE))
+    available = Q(status__in=(DeletionJob.PENDING, DeletionJob.FAILED)) | abandoned
+
+    # A condição sobre o status lido impede que duas execuções reservem o mesmo job
+    claimed = DeletionJob.objects.filter(available, pk=job.pk, status=job.status).update(
+        status=DeletionJob.RUNNING, error=None, updated_at=now
+    )
+    return claimed == 1
+
+
+def run(job, batch_size=BATCH_SIZE, progress=None):
+
+    """
+    Executa (ou retoma) o job, lote a lote.
+
+    Args:
+        job (DeletionJob): Job pendente, que falhou ou interrompido.
+        batch_size (int, opcional): Linhas apagadas por transação.
+        progress (callable, opcional): Chamado com o job atualizado após cada lote.
+
+    Returns:
+        DeletionJob: O job atualizado, ou None se outro processo já o executa.
+    """
+
+    if not claim(job):
+        return None
+
+    try:
+        for step, queryset, fields, action in STEPS[job.kind](job.target_id):
+            while delete_batch(job, step, queryset, fields, action, batch_size):
+                if progress is not None:
+                    job.refresh_from_db()
+                    progress(job)
+
+        delete_target(job)
+
+    except Exception as e:
+        DeletionJob.objects.filter(pk=job.pk).update(status=DeletionJob.FAILED, error=str(e))
+        raise
+
+    finally:
+        job.refresh_from_db()
+
+    return job
+
+
+def serialize_job(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'target_id': job.target_id,
+        'status': job.status,
+        'step': job.step,
+        'total': job.total,
+        'deleted': job.deleted,
+        'progress': round(min(job.deleted / job.total, 1) * 100, 2) if job.total else 100.0,
+        'error': job.error,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    }
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .filters import chunked
+from .models import Project
+from .serializers import FIELDS, Fieldset, project_queryset, serialize_project
+from . import reference, versions
+
+from modules.fastjson.fastjson import dumps
+
+# Cache dos bytes do documento padrão (sem '?fields=' nem '?include=') do
+# search_project, por chave do projeto e versão do portfólio e das condições. Uma
+# escrita em qualquer processo muda a versão, então nenhum processo serve um documento
+# antigo mesmo com cache local; os documentos alterados são regravados após o commit,
+# e as leituras só preenchem chaves ausentes.
+
+# Documento padrão do search_project
+SEARCH_FIELDSET = Fieldset(dict(FIELDS, project=('id', 'name', 'key', 'version')), ('information', 'timeline'))
+
+
+# Conjuntos de dados cuja versão compõe a chave do documento
+VERSIONS = (versions.PORTFOLIO, versions.CONDITIONS)
+
+
+def document_key(key, version):
+    return f'search_project:{version}:{key}'
+
+
+def is_default(request):
+    # Apenas o documento padrão fica em cache
+    return 'fields' not in request.GET and 'include' not in request.GET
+
+
+def get(key):
+
+    """
+    Documento em cache da versão atual.
+
+    Returns:
+        tuple: Versão lida (usada depois no 'add') e os bytes, ou None.
+    """
+
+    # A versão é lida antes dos dados: uma escrita concorrente gera outra chave
+    version = versions.token(*VERSIONS)
+    return version, cache.get(document_key(key, version))
+
+
+def add(key, version, content):
+    # 'add' não sobrescreve um documento regravado por uma escrita durante a leitura
+    cache.add(document_key(key, version), content, settings.SEARCH_PROJECT_CACHE_TIMEOUT)
+
+
+async def aget(key):
+    version = await versions.atoken(*VERSIONS)
+    return version, await cache.aget(document_key(key, version))
+
+
+async def aadd(key, version, content):
+    await cache.aadd(document_key(key, version), content, settings.SEARCH_PROJECT_CACHE_TIMEOUT)
+
+
+def rebuild(project_ids):
+
+    """
+    Regrava os documentos dos projetos informados, com as mesmas consultas de um
+    único search_project para cada lote de ids.
+    """
+
+    # Roda após o commit e após o incremento da versão, registrado antes (ver 'hooks')
+    version = versions.token(*VERSIONS)
+    reference.conditions.invalidate()
+
+    documents = {}
+    for chunk in chunked(list(project_ids)):
+        for project in project_queryset(Project.objects.filter(id__in=chunk), SEARCH_FIELDSET):
+            documents[document_key(project.key, version)] = dumps(serialize_project(project, SEARCH_FIELDSET))
+
+    if documents:
+        cache.set_many(documents, settings.SEARCH_PROJECT_CACHE_TIMEOUT)
+
+
+def refresh(project_ids):
+    # Após o commit, para que o documento reflita apenas dados confirmados
+    project_ids = list(project_ids)
+    if project_ids:
+        transaction.on_commit(lambda: rebuild(project_ids))
+
+
+def remove(keys):
+    # Documentos da versão atual; os de versões anteriores já não são lidos
+    keys = list(keys)
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many([document_key(key, versions.token(*VERSIONS)) for key in keys]))
@@ -0,0 +1,175 @@
+import asyncio
+from itertools import groupby
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .filters import chunked
+from . import changes
+
+from modules.fastjson.fastjson import dumps
+
+# Eventos da timeline por projeto (Server-Sent Events, endpoint 'project_events').
+#
+# Cada processo mantém um único hub: enquanto houver conexões abertas, ele consulta o
+# feed de alterações a cada 'EVENTS_POLL_INTERVAL' segundos (uma consulta por ciclo,
+# independente do número de conexões) e entrega os eventos às filas dos inscritos em
+# cada projeto. O id do evento é o id da alteração, então o cliente retoma pelo
+# cabeçalho 'Last-Event-ID' sem perder eventos. Como o feed, o hub lê apenas as
+# alterações já fora da janela de visibilidade (ver 'changes.visible').
+
+# Entidades que alteram a timeline
+TIMELINE = 'ranking'
+
+
+def timeline_rows(project_ids, since, until=None):
+    # Alterações da timeline dos projetos após 'since', ordenadas por projeto e id
+    rows = []
+    for chunk in chunked(list(project_ids)):
+        queryset = changes.visible().filter(id__gt=since, entity=TIMELINE, project_id__in=chunk)
+        if until is not None:
+            queryset = queryset.filter(id__lte=until)
+        rows.extend(queryset.order_by('project_id', 'id'))
+    return rows
+
+
+def build_events(rows):
+    # Um evento por projeto com as alterações compactadas; o id é o da última alteração
+    events = {}
+    for project_id, project_rows in groupby(rows, key=lambda row: row.project_id):
+        project_rows = changes.compact(list(project_rows))
+        events[project_id] = {
+            'id': max(row.id for row in project_rows),
+            'project_id': project_id,
+            'changes': [changes.serialize_change(row) for row in project_rows],
+        }
+    return events
+
+
+def pending_events(project_ids, cursor):
+    # Novo cursor e os eventos de cada projeto desde o cursor anterior
+    last = changes.latest()
+    if last <= cursor:
+        return cursor, {}
+    return last, build_events(timeline_rows(project_ids, cursor, last))
+
+
+def frame(name, data, event_id=None):
+    # Mensagem no formato text/event-stream
+    head = f'id: {event_id}\n' if event_id is not None else ''
+    return f'{head}event: {name}\n'.encode() + b'data: ' + dumps(data) + b'\n\n'
+
+
+class EventHub:
+
+    """
+    Distribui os eventos da timeline às conexões abertas do processo.
+
+    Cada conexão recebe uma fila própria; clientes lentos cuja fila enche são
+    desconectados (recebem None) e retomam pelo 'Last-Event-ID'.
+    """
+
+    def __init__(self):
+        self.subscribers = {}
+        self.cursor = 0
+        self.task = None
+
+    def running(self):
+        return (
+            self.task is not None
+            and not self.task.done()
+            and self.task.get_loop() is asyncio.get_running_loop()
+        )
+
+    async def subscribe(self, project_id):
+        if not self.running():
+            cursor = await sync_to_async(changes.latest)()
+            # Outra conexão pode ter iniciado o hub durante a consulta
+            if not self.running():
+                self.cursor = cursor
+                self.task = asyncio.create_task(self.run())
+
+        queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+        self.subscribers.setdefault(project_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, project_id, queue):
+        queues = self.subscribers.get(project_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[project_id]
+
+    async def run(self):
+        # Termina sozinho quando não houver mais conexões
+        while self.subscribers:
+            await asyncio.sleep(settings.EVENTS_POLL_INTERVAL)
+            try:
+                await self.poll()
+            except Exception:
+                # Falha transitória do banco: tenta de novo no próximo ciclo, do mesmo cursor
+                continue
+
+    async def poll(self):
+        if not self.subscribers:
+            return
+        self.cursor, events = await sync_to_async(pending_events)(list(self.subscribers), self.cursor)
+        for project_id, event in events.items():
+            for queue in list(self.subscribers.get(project_id, ())):
+                self.publish(project_id, queue, event)
+
+    def publish(self, project_id, queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.unsubscribe(project_id, queue)
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+
+hub = EventHub()
+
+
+async def stream(project_id, key, since=None):
+
+    """
+    Corpo da resposta SSE de um projeto.
+
+    Com 'since' (Last-Event-ID), envia antes as alterações perdidas desde ele; se o
+    cursor já saiu da retenção do feed, envia 'resync' para o cliente recarregar o
+    documento do projeto.
+    """
+
+    queue = await hub.subscribe(project_id)
+    try:
+        yield f'retry: {settings.EVENTS_RETRY}\n\n'.encode()
+        sent = hub.cursor
+
+        if since is not None:
+            pruned = await sync_to_async(changes.pruned_until)()
+            if since < pruned:
+                yield frame('resync', {'key': key}, event_id=hub.cursor)
+            else:
+                rows = await sync_to_async(timeline_rows)([project_id], since)
+                event = build_events(rows).get(project_id)
+                if event is not None:
+                    sent = max(sent, event['id'])
+                    yield frame('timeline', {'key': key, **event}, event_id=event['id'])
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Comentário SSE mantém a conexão aberta em proxies e balanceadores
+                yield b': ping\n\n'
+                continue
+
+            if event is None:
+                return
+            if event['id'] > sent:
+                sent = event['id']
+                yield frame('timeline', {'key': key, **event}, event_id=event['id'])
+
+    finally:
+        hub.unsubscribe(project_id, queue)
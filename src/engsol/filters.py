@@ -0,0 +1,198 @@
+from datetime import datetime
+
+from django.db.models import Exists, F, OuterRef, Subquery
+
+from .models import Client, Information, Ranking
+from .serializers import DATE_FORMAT
+
+# Ordenações aceitas em '?order=' (prefixo '-' inverte a ordem)
+ORDERINGS = ('created_at', 'delivered_date', 'cost', 'cost_variance')
+
+# Tamanho máximo de página aceito em '?page_size='
+MAX_PAGE_SIZE = 200
+
+# Quantidade de ids por consulta 'IN (...)', abaixo do limite de parâmetros dos bancos
+ID_CHUNK_SIZE = 500
+
+
+class FilterError(ValueError):
+    pass
+
+
+def parse_date(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, DATE_FORMAT).date()
+    except ValueError:
+        raise FilterError(f'Parâmetro "{name}" deve estar no formato dd/mm/aaaa')
+
+
+def parse_month(params, name):
+    # Mês no formato mm/aaaa, devolvido como (ano, mês)
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        month = datetime.strptime(value, "%m/%Y")
+    except ValueError:
+        raise FilterError(f'Parâmetro "{name}" deve estar no formato mm/aaaa')
+    return month.year, month.month
+
+
+def parse_bool(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    if value.lower() in ('true', '1'):
+        return True
+    if value.lower() in ('false', '0'):
+        return False
+    raise FilterError(f'Parâmetro "{name}" deve ser true ou false')
+
+
+def parse_int(params, name, default=None, minimum=1, maximum=None):
+    value = params.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise FilterError(f'Parâmetro "{name}" deve ser um número inteiro')
+    if value < minimum or (maximum is not None and value > maximum):
+        raise FilterError(f'Parâmetro "{name}" fora do intervalo permitido')
+    return value
+
+
+def parse_ids(values):
+    # Lista de ids inteiros sem repetição, na ordem recebida
+    if isinstance(values, str):
+        values = [value for value in values.split(',') if value.strip()]
+    try:
+        ids = [int(value) for value in values]
+    except (TypeError, ValueError):
+        raise FilterError('Os ids devem ser números inteiros')
+    return list(dict.fromkeys(ids))
+
+
+def chunked(values, size=ID_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def filter_projects(queryset, params):
+
+    """
+    Aplica os filtros e a ordenação de '?name=&client=&start_from=&start_to=
+    &delivered_from=&delivered_to=&condition=&over_budget=&late=&order=' ao
+    queryset de projetos.
+
+    Os nomes de projeto e cliente são filtrados por prefixo ('LIKE 'x%''), que usa
+    os índices das colunas 'name'; busca por palavras no meio do texto fica com o
+    endpoint 'search'. Os filtros de informações viram subconsultas EXISTS, que usam
+    os índices das chaves estrangeiras e não duplicam projetos na junção.
+    """
+
+    # Nome do projeto
+    name = params.get('name')
+    if name:
+        queryset = queryset.filter(name__istartswith=name)
+
+    # Nome do cliente: os clientes encontrados pelo índice do nome, e então seus projetos
+    client = params.get('client')
+    if client:
+        queryset = queryset.filter(pk__in=Client.objects.filter(name__istartswith=client).values('project_id'))
+
+    # Datas, custo e prazo vêm das informações do projeto
+    information = {}
+    for param, lookup in (
+        ('start_from', 'start_date__gte'),
+        ('start_to', 'start_date__lte'),
+        ('delivered_from', 'delivered_date__gte'),
+        ('delivered_to', 'delivered_date__lte'),
+    ):
+        value = parse_date(params, param)
+        if value:
+            information[lookup] = value
+
+    over_budget = parse_bool(params, 'over_budget')
+    if over_budget is not None:
+        lookup = 'current_cost__gt' if over_budget else 'current_cost__lte'
+        information[lookup] = F('cost_estimate')
+
+    late = parse_bool(params, 'late')
+    if late is not None:
+        lookup = 'current_date__gt' if late else 'current_date__lte'
+        information[lookup] = F('delivered_date')
+
+    if information:
+        queryset = queryset.filter(Exists(
+            Information.objects.filter(project=OuterRef('pk'), **information)
+        ))
+
+    # Condição atual: a da etapa mais recente da timeline
+    condition = parse_int(params, 'condition')
+    if condition:
+        queryset = queryset.annotate(current_condition=Subquery(
+            Ranking.objects.filter(project=OuterRef('pk'))
+            .order_by('-last_update', '-id')
+            .values('condition')[:1]
+        )).filter(current_condition=condition)
+
+    return order_projects(queryset, params.get('order'))
+
+
+def order_projects(queryset, order):
+    if not order:
+        return queryset
+
+    descending = order.startswith('-')
+    field = order.lstrip('-')
+    if field not in ORDERINGS:
+        raise FilterError(f'Ordenação inválida: {order}')
+
+    if field != 'created_at':
+        information = Information.objects.filter(project=OuterRef('pk')).annotate(
+            cost=F('current_cost'),
+            cost_variance=F('current_cost') - F('cost_estimate'),
+        )
+        queryset = queryset.annotate(**{
+            f'sort_{field}': Subquery(information.values(field)[:1])
+        })
+        field = f'sort_{field}'
+
+    prefix = '-' if descending else ''
+    return queryset.order_by(f'{prefix}{field}', f'{prefix}id')
+
+
+def page_params(params):
+    # (página, tamanho) quando '?page=' ou '?page_size=' forem informados
+    if not params.get('page') and not params.get('page_size'):
+        return None
+
+    page = parse_int(params, 'page', default=1)
+    page_size = parse_int(params, 'page_size', default=50, maximum=MAX_PAGE_SIZE)
+    return page, page_size
+
+
+def paginate(queryset, params):
+
+    """
+    Retorna (página, metadados) quando '?page=' ou '?page_size=' forem informados,
+    ou (queryset, None) caso contrário.
+    """
+
+    params = page_params(params)
+    if params is None:
+        return queryset, None
+
+    page, page_size = params
+    offset = (page - 1) * page_size
+
+    meta = {
+        'count': queryset.count(),
+        'page': page,
+        'page_size': page_size,
+    }
+    return queryset[offset:offset + page_size], meta
@@ -0,0 +1,44 @@
+from .models import Ranking
+from . import analytics, documents, reference, search, versions
+from .timeline import refresh_timeline_stats
+
+# Ações executadas pelas views depois de cada escrita no portfólio, mantendo
+# índices e dados derivados em sincronia com as tabelas principais.
+
+
+def condition_projects(condition_id):
+    # Projetos cuja timeline usa a condição
+    return list(
+        Ranking.objects.filter(condition_id=condition_id)
+        .values_list('project_id', flat=True)
+        .distinct()
+    )
+
+
+def projects_changed(project_ids):
+    refresh_timeline_stats(project_ids)
+    search.reindex_projects(project_ids)
+    versions.changed(versions.PORTFOLIO)
+    documents.refresh(project_ids)
+
+
+def projects_deleted(project_ids, keys):
+    search.reindex_projects(project_ids)
+    versions.changed(versions.PORTFOLIO)
+    documents.remove(keys)
+
+
+def conditions_changed():
+    reference.conditions_changed()
+
+
+def notes_changed():
+    reference.notes_changed()
+
+
+def condition_renamed(condition_id):
+    projects_changed(condition_projects(condition_id))
+
+
+def deliveries_changed(dates):
+    analytics.invalidate_delivery_months(dates)
@@ -0,0 +1,149 @@
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q
+from django.db.models.functions import ExtractMonth
+
+from .filters import chunked, parse_ids
+from .models import Information, Project
+
+# Indicadores do dashboard calculados com agregações no banco. Cada função devolve o
+# mesmo documento da view de mesmo nome; 'dashboard' reúne todos e é usado pelas
+# views síncrona e assíncrona do dashboard.
+
+
+def days(duration):
+    # Média de uma duração em dias, com duas casas
+    return round(duration.total_seconds() / 86400, 2) if duration is not None else 0
+
+
+def active_informations():
+    return Information.objects.filter(project__status=True)
+
+
+def delivery_projects(year):
+    if not year:
+        return {'error': 'Parâmetro "year" é obrigatório'}
+
+    rows = (
+        Information.objects.filter(delivered_date__year=year)
+        .annotate(month=ExtractMonth('delivered_date'))
+        .values('month')
+        .annotate(count=Count('project', distinct=True))
+        .order_by('month')
+    )
+
+    return {
+        'title': 'Projetos entregues',
+        'data': [{'month': row['month'], 'count': row['count']} for row in rows]
+    }
+
+
+def cost(ids):
+    informations = {}
+    for chunk in chunked(ids):
+        rows = (
+            Information.objects.filter(project_id__in=chunk)
+            .select_related('project')
+            .only('cost_estimate', 'current_cost', 'project__id', 'project__name', 'project__key')
+            .order_by('id')
+        )
+        for information in rows:
+            informations.setdefault(information.project_id, information)
+
+    return {
+        'title': 'Estimado x Custo',
+        'data': [
+            {
+                'project': {
+                    'id': informations[project_id].project.id,
+                    'name': informations[project_id].project.name,
+                    'key': informations[project_id].project.key
+                },
+                'information': {
+                    'cost_estimate': informations[project_id].cost_estimate,
+                    'current_cost': informations[project_id].current_cost,
+                }
+            }
+            for project_id in ids
+            if project_id in informations
+        ],
+        'missing': [project_id for project_id in ids if project_id not in informations]
+    }
+
+
+def percentage_project_cost():
+    result = active_informations().filter(
+        cost_estimate__isnull=False,
+        current_cost__isnull=False,
+    ).aggregate(
+        total=Count('project', distinct=True),
+        within=Count('project', distinct=True, filter=Q(current_cost__lte=F('cost_estimate'))),
+    )
+
+    total = result['total']
+    return {
+        'title': 'Projetos dentro do custo',
+        'value': round((result['within'] / total) * 100, 2) if total > 0 else 0
+    }
+
+
+def average_project_cost():
+    result = active_informations().aggregate(
+        estimate_cost=Avg('cost_estimate'),
+        current_cost=Avg('current_cost'),
+    )
+
+    return {
+        'title': 'Custo médio de um projeto',
+        'value': {
+            'estimate_cost': round(result['estimate_cost'] or 0, 2),
+            'current_cost': round(result['current_cost'] or 0, 2)
+        }
+    }
+
+
+def average_time_project():
+    result = active_informations().aggregate(
+        estimate=Avg(ExpressionWrapper(F('delivered_date') - F('start_date'), output_field=DurationField())),
+        current=Avg(ExpressionWrapper(F('current_date') - F('start_date'), output_field=DurationField())),
+    )
+
+    return {
+        'title': 'Tempo médio para finalizar um projeto',
+        'value': {
+            'estimate_days': days(result['estimate']),
+            'current_days': days(result['current'])
+        }
+    }
+
+
+def percentage_projects_delivered():
+    total = Project.objects.filter(status=True).count()
+    on_time = active_informations().filter(
+        start_date__isnull=False,
+        delivered_date__isnull=False,
+        current_date__lte=F('delivered_date'),
+    ).values('project').distinct().count()
+
+    return {
+        'title': 'Projetos entregues no prazo',
+        'value': round((on_time / total) * 100, 2) if total > 0 else 0
+    }
+
+
+def dashboard(data):
+
+    """
+    Todos os indicadores do dashboard a partir do corpo da requisição.
+
+    Raises:
+        FilterError: Ids de custo inválidos.
+    """
+
+    return {
+        'title': 'Dashboard',
+        'delivery_projects': delivery_projects((data.get('delivery_projects') or {}).get('year')),
+        'cost': cost(parse_ids((data.get('cost') or {}).get('id', []))),
+        'percentage_project_cost': percentage_project_cost(),
+        'average_project_cost': average_project_cost(),
+        'average_time_project': average_time_project(),
+        'percentage_projects_delivered': percentage_projects_delivered(),
+    }
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from engsol import archive
+from engsol.filters import chunked
+
+
+# Move os projetos inativos antigos para o arquivo
+class Command(BaseCommand):
+    help = 'Arquiva os projetos inativos há mais de --days dias, removendo-os das tabelas principais'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=180, help='Dias desde a última alteração do projeto inativo')
+        parser.add_argument('--batch-size', type=int, default=archive.BATCH_SIZE, help='Projetos arquivados por lote')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas informa quantos projetos seriam arquivados')
+
+    def handle(self, *args, **options):
+        project_ids = list(archive.archivable_projects(options['days']).order_by('id').values_list('id', flat=True))
+
+        if options['dry_run']:
+            self.stdout.write(f'{len(project_ids)} projetos seriam arquivados')
+            return
+
+        archived = 0
+        for batch in chunked(project_ids, options['batch_size']):
+            archived += archive.archive_batch(batch)
+            self.stdout.write(f'{archived}/{len(project_ids)} projetos arquivados')
+
+        self.stdout.write(self.style.SUCCESS(f'{archived} projetos arquivados'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from engsol.models import Project
+from engsol.timeline import refresh_timeline_stats
+
+
+# Calcula as estatísticas da timeline dos projetos já existentes
+class Command(BaseCommand):
+    help = 'Calcula e grava as estatísticas da timeline de todos os projetos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Projetos processados por lote')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        project_ids = list(Project.objects.order_by('id').values_list('id', flat=True))
+
+        for start in range(0, len(project_ids), batch_size):
+            batch = project_ids[start:start + batch_size]
+            refresh_timeline_stats(batch)
+            self.stdout.write(f'{start + len(batch)}/{len(project_ids)} projetos processados')
+
+        self.stdout.write(self.style.SUCCESS('Estatísticas da timeline atualizadas'))
@@ -0,0 +1,57 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand
+
+
+# Benchmark de vazão com requisições concorrentes contra um servidor já em execução
+class Command(BaseCommand):
+    help = (
+        'Mede a vazão e a latência de requisições concorrentes contra um servidor em execução. '
+        'Para comparar os modos de execução, rode o mesmo comando contra cada servidor:\n'
+        '  gunicorn src.wsgi --workers 2 --bind :8000\n'
+        '  ASYNC_VIEWS=true uvicorn src.asgi:application --workers 2 --port 8001'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+', help='URLs a comparar (ex.: http://localhost:8000/engsol/list_project)')
+        parser.add_argument('--requests', type=int, default=500, help='Total de requisições por URL')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requisições simultâneas')
+        parser.add_argument('--timeout', type=float, default=30, help='Tempo limite de cada requisição (segundos)')
+
+    def handle(self, *args, **options):
+        for url in options['urls']:
+            self.run(url, options['requests'], options['concurrency'], options['timeout'])
+
+    def fetch(self, url, timeout):
+        start = time.perf_counter()
+        try:
+            with urlopen(Request(url), timeout=timeout) as response:
+                response.read()
+                status = response.status
+        except HTTPError as e:
+            status = e.code
+        except Exception:
+            status = None
+        return status, time.perf_counter() - start
+
+    def run(self, url, total, concurrency, timeout):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(lambda _: self.fetch(url, timeout), range(total)))
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency for status, latency in results if status == 200)
+        errors = total - len(latencies)
+
+        self.stdout.write(url)
+        self.stdout.write(f'  Requisições: {total} | Concorrência: {concurrency} | Erros: {errors}')
+        self.stdout.write(f'  Vazão: {total / elapsed:.1f} req/s')
+        if latencies:
+            p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+            self.stdout.write(
+                f'  Latência: mediana {statistics.median(latencies) * 1000:.1f} ms | p95 {p95 * 1000:.1f} ms'
+            )
@@ -0,0 +1,80 @@
+import json
+import timeit
+from datetime import date, datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from modules.fastjson import fastjson
+
+
+# Benchmark de serialização de um portfólio grande (mesmo formato do list_project)
+class Command(BaseCommand):
+    help = 'Compara o tempo de serialização JSON do portfólio entre o json padrão e o FastJsonResponse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=2000, help='Quantidade de projetos simulados')
+        parser.add_argument('--rankings', type=int, default=10, help='Etapas por projeto')
+        parser.add_argument('--repeat', type=int, default=5, help='Repetições de cada medição')
+
+    def handle(self, *args, **options):
+        portfolio = self.build_portfolio(options['projects'], options['rankings'])
+        repeat = options['repeat']
+
+        # Mede cada codificador pelo melhor tempo entre as repetições
+        stdlib = min(timeit.repeat(
+            lambda: json.dumps(portfolio, cls=DjangoJSONEncoder).encode('utf-8'),
+            number=1, repeat=repeat,
+        ))
+        fast = min(timeit.repeat(lambda: fastjson.dumps(portfolio), number=1, repeat=repeat))
+
+        size = len(fastjson.dumps(portfolio))
+        backend = 'orjson' if fastjson.orjson is not None else 'json (fallback)'
+
+        self.stdout.write(f'Projetos: {options["projects"]} | Etapas por projeto: {options["rankings"]} | Tamanho: {size / 1024:.0f} KiB')
+        self.stdout.write(f'json + DjangoJSONEncoder: {stdlib * 1000:.1f} ms')
+        self.stdout.write(f'FastJsonResponse [{backend}]: {fast * 1000:.1f} ms')
+        self.stdout.write(self.style.SUCCESS(f'Ganho: {stdlib / fast:.1f}x'))
+
+    def build_portfolio(self, projects, rankings):
+        created_at = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+        start = date(2025, 1, 1)
+
+        portfolio = []
+        for i in range(projects):
+            portfolio.append({
+                'project': {
+                    'id': i,
+                    'name': f'Projeto {i}',
+                    'key': f'{i:020d}',
+                    'created_at': created_at + timedelta(minutes=i),
+                },
+                'client': {
+                    'id': i,
+                    'name': f'Cliente {i}',
+                    'email': f'cliente{i}@exemplo.com.br',
+                },
+                'information': {
+                    'id': i,
+                    'cost_estimate': 1000.0 + i,
+                    'current_cost': 950.5 + i,
+                    'start_date': start.strftime("%d/%m/%Y"),
+                    'delivered_date': (start + timedelta(days=90)).strftime("%d/%m/%Y"),
+                    'current_date': (start + timedelta(days=30)).strftime("%d/%m/%Y"),
+                },
+                'timeline': [
+                    {
+                        'ranking': {
+                            'id': i * rankings + r,
+                            'rank': str(r + 1),
+                            'last_update': (start + timedelta(days=7 * r)).strftime("%d/%m/%Y"),
+                            'note': 'Sem observações',
+                            'description': 'Descrição detalhada da etapa do projeto. ' * 4,
+                            'condition': {'id': r, 'name': f'Etapa {r}'},
+                        }
+                    }
+                    for r in range(rankings)
+                ],
+            })
+
+        return portfolio
@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+# Carga executada no processo medido: a mesma de um worker até a primeira requisição
+STARTUP_SCRIPT = '''
+import os
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "src.settings")
+import src.{target}
+'''
+
+
+def parse_importtime(lines):
+
+    """
+    Converte a saída de 'python -X importtime' em uma lista de
+    (módulo, próprio em µs, acumulado em µs), na ordem em que foram importados.
+    """
+
+    modules = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        try:
+            own, cumulative, name = line[len('import time:'):].split('|')
+            modules.append((name.strip(), int(own), int(cumulative)))
+        except ValueError:
+            # Cabeçalho ('self [us] | cumulative | imported package')
+            continue
+    return modules
+
+
+# Tempo de importação por módulo na inicialização de um worker
+class Command(BaseCommand):
+    help = (
+        'Mede, em um processo novo com "python -X importtime", o tempo de importação de cada módulo '
+        'carregado na inicialização da aplicação (settings, apps, rotas e views)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=('wsgi', 'asgi'), default='wsgi', help='Aplicação carregada')
+        parser.add_argument('--top', type=int, default=25, help='Quantidade de módulos listados')
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT.format(target=options['target'])],
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            self.stderr.write(result.stderr[-2000:])
+            return
+
+        modules = parse_importtime(result.stderr.splitlines())
+        total = sum(own for _, own, _ in modules)
+
+        # Pacotes de primeiro nível, somando o tempo próprio de todos os seus módulos
+        packages = defaultdict(int)
+        for name, own, _ in modules:
+            packages[name.split('.')[0]] += own
+
+        self.stdout.write(f'Módulos importados: {len(modules)} | Tempo total: {total / 1000:.1f} ms')
+
+        self.stdout.write('\nPacotes (tempo próprio somado):')
+        for name, own in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:options['top']]:
+            self.stdout.write(f'  {own / 1000:8.1f} ms  {name}')
+
+        self.stdout.write('\nMódulos (tempo acumulado, incluindo o que importam):')
+        for name, own, cumulative in sorted(modules, key=lambda item: item[2], reverse=True)[:options['top']]:
+            self.stdout.write(f'  {cumulative / 1000:8.1f} ms  {name} (próprio {own / 1000:.1f} ms)')
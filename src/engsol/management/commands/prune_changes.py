@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from engsol import changes
+
+
+# Remove as alterações mais antigas que a retenção do feed
+class Command(BaseCommand):
+    help = 'Remove do feed de alterações os registros mais antigos que --days dias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Dias de retenção (padrão: CHANGES_RETENTION_DAYS)')
+
+    def handle(self, *args, **options):
+        deleted = changes.prune(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'{deleted} alterações removidas'))
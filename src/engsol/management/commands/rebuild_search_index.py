@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from engsol.models import Project
+from engsol.search import reindex_projects
+
+
+# Reconstrói o índice de busca textual de todos os projetos
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca textual (FTS5 no SQLite, FULLTEXT no MySQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Projetos indexados por lote')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        project_ids = list(Project.objects.order_by('id').values_list('id', flat=True))
+
+        for start in range(0, len(project_ids), batch_size):
+            batch = project_ids[start:start + batch_size]
+            reindex_projects(batch)
+            self.stdout.write(f'{start + len(batch)}/{len(project_ids)} projetos indexados')
+
+        self.stdout.write(self.style.SUCCESS('Índice de busca reconstruído'))
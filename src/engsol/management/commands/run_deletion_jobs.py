@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from engsol import deletion
+from engsol.models import DeletionJob
+
+
+# Executa as exclusões em segundo plano pendentes (ou interrompidas)
+class Command(BaseCommand):
+    help = 'Apaga em lotes os projetos e condições marcados para exclusão em segundo plano'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=deletion.BATCH_SIZE, help='Linhas apagadas por lote')
+        parser.add_argument('--job', type=int, help='Executa apenas o job informado')
+        parser.add_argument('--retry-failed', action='store_true', help='Também retoma os jobs que falharam')
+
+    def handle(self, *args, **options):
+        statuses = [DeletionJob.PENDING, DeletionJob.RUNNING]
+        if options['retry_failed']:
+            statuses.append(DeletionJob.FAILED)
+
+        jobs = DeletionJob.objects.filter(status__in=statuses).order_by('created_at', 'id')
+        if options['job']:
+            jobs = jobs.filter(id=options['job'])
+
+        for job in jobs:
+            self.stdout.write(f'Job {job.id}: {job.get_kind_display()} {job.target_id}')
+            try:
+                if deletion.run(job, options['batch_size'], progress=self.report) is None:
+                    self.stdout.write('  Em execução por outro processo')
+                    continue
+            except Exception as e:
+                self.stderr.write(f'  Falhou: {e}')
+                continue
+            self.stdout.write(self.style.SUCCESS(f'  Concluído ({job.deleted} registros)'))
+
+    def report(self, job):
+        progress = deletion.serialize_job(job)['progress']
+        self.stdout.write(f'  {job.step}: {job.deleted}/{job.total} ({progress}%)')
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engsol', '0006_auto_20250424_1953'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='information',
+            index=models.Index(fields=['project', 'start_date'], name='engsol_info_project_a6b57c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='information',
+            index=models.Index(fields=['project', 'delivered_date'], name='engsol_info_project_2785d5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='information',
+            index=models.Index(fields=['delivered_date'], name='engsol_info_deliver_275839_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['status', 'created_at'], name='engsol_proj_status_5c93dc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ranking',
+            index=models.Index(fields=['project', 'last_update'], name='engsol_rank_project_7c388e_idx'),
+        ),
+    ]
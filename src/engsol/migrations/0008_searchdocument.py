@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Índice invertido específico de cada banco sobre 'engsol_searchdocument'
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE engsol_searchdocument_fts "
+            "USING fts5(body, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    elif vendor == 'mysql':
+        schema_editor.execute(
+            "CREATE FULLTEXT INDEX engsol_searchdocument_body_ft ON engsol_searchdocument (body)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS engsol_searchdocument_fts")
+    elif vendor == 'mysql':
+        schema_editor.execute("DROP INDEX engsol_searchdocument_body_ft ON engsol_searchdocument")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engsol', '0007_project_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('body', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='engsol.project')),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
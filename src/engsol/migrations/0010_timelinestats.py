@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engsol', '0009_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage_count', models.PositiveIntegerField(default=0)),
+                ('intervals', models.JSONField(default=list)),
+                ('average_days', models.FloatField(default=0)),
+                ('max_days', models.IntegerField(default=0)),
+                ('span_days', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='engsol.project')),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:12
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engsol', '0012_archivedproject'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(max_length=20)),
+                ('entity_id', models.PositiveBigIntegerField()),
+                ('project_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('action', models.CharField(choices=[('upsert', 'Inclusão/alteração'), ('delete', 'Exclusão')], max_length=10)),
+                ('data', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engsol', '0013_change'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='information',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='ranking',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -1,18 +1,29 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.functions import Now
 from account.models import Credential
 
 # Projeto
 class Project(models.Model):
-    name = models.CharField(max_length=100)
+    # Indexado para o filtro por prefixo do list_project
+    name = models.CharField(max_length=100, db_index=True)
     key = models.CharField(max_length=20)
     status = models.BooleanField(default=True)
+    # Incrementada a cada alteração (controle de concorrência otimista)
+    version = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Listagem de projetos ativos ordenada por criação
+            models.Index(fields=['status', 'created_at']),
+        ]
+
 # Cliente
 class Client(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, db_index=True)
     email = models.CharField(max_length=100)
     status = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -41,9 +52,16 @@ class Ranking(models.Model):
     note = models.CharField(max_length=100, null=True, blank=True)
     description = models.TextField(null=True, blank=True)
     status = models.BooleanField(default=True)
+    version = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Etapa mais recente de cada projeto
+            models.Index(fields=['project', 'last_update']),
+        ]
+
 # Informações
 class Information(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
@@ -53,5 +71,90 @@ class Information(models.Model):
     delivered_date = models.DateField(null=True, blank=True)
     current_date = models.DateField(null=True, blank=True)
     status = models.BooleanField(default=True)
+    version = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Filtros por período de início e de entrega
+            models.Index(fields=['project', 'start_date']),
+            models.Index(fields=['project', 'delivered_date']),
+            models.Index(fields=['delivered_date']),
+        ]
+
+# Estatísticas da timeline (uma por projeto), recalculadas a cada escrita
+class TimelineStats(models.Model):
+    project = models.OneToOneField(Project, on_delete=models.CASCADE)
+    stage_count = models.PositiveIntegerField(default=0)
+    intervals = models.JSONField(default=list)
+    average_days = models.FloatField(default=0)
+    max_days = models.IntegerField(default=0)
+    span_days = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+# Documento de busca textual (um por projeto)
+class SearchDocument(models.Model):
+    project = models.OneToOneField(Project, on_delete=models.CASCADE)
+    body = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+# Versão de um conjunto de dados, incrementada a cada escrita
+class DataVersion(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+# Exclusão em segundo plano de um projeto ou condição e de seus dependentes
+class DeletionJob(models.Model):
+    PROJECT = 'project'
+    CONDITION = 'condition'
+    KINDS = [(PROJECT, 'Projeto'), (CONDITION, 'Condição')]
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [(PENDING, 'Pendente'), (RUNNING, 'Em execução'), (DONE, 'Concluída'), (FAILED, 'Falhou')]
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    target_id = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=20, choices=STATUSES, default=PENDING)
+    step = models.CharField(max_length=50, blank=True, default='')
+    total = models.PositiveIntegerField(default=0)
+    deleted = models.PositiveIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
\ No newline at end of file
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Jobs ainda não concluídos, na ordem de criação
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['kind', 'target_id']),
+        ]
+
+# Projeto inativo arquivado: o documento completo (cliente, informações e timeline)
+# sai das tabelas principais e fica guardado aqui
+class ArchivedProject(models.Model):
+    project_id = models.PositiveBigIntegerField(unique=True)
+    key = models.CharField(max_length=20, db_index=True)
+    name = models.CharField(max_length=100)
+    document = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+# Registro (somente inclusão) das escritas, lido pelo feed de alterações
+class Change(models.Model):
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    ACTIONS = [(UPSERT, 'Inclusão/alteração'), (DELETE, 'Exclusão')]
+
+    entity = models.CharField(max_length=20)
+    entity_id = models.PositiveBigIntegerField()
+    project_id = models.PositiveBigIntegerField(null=True, blank=True)
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    data = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    # Relógio do banco, o mesmo para todos os servidores (usado na janela de visibilidade)
+    created_at = models.DateTimeField(db_default=Now(), db_index=True)
@@ -0,0 +1,83 @@
+from django.db import models
+from django.forms import modelform_factory
+
+from .concurrency import INFORMATION_FIELDS, PROJECT_FIELDS, RANKING_FIELDS
+from . import concurrency
+from .models import Client, Information, Project, Ranking
+from .serializers import DATE_FORMAT
+
+# Validação dos documentos parciais do patch_project: cada bloco é validado por um
+# ModelForm com apenas os campos enviados, e a gravação toca só esses campos.
+
+# Modelo e campos editáveis de cada bloco
+BLOCKS = {
+    'project': (Project, PROJECT_FIELDS),
+    'client': (Client, ('name', 'email')),
+    'information': (Information, INFORMATION_FIELDS),
+    'ranking': (Ranking, RANKING_FIELDS),
+}
+
+# Chaves de controle aceitas além dos campos
+CONTROL_KEYS = ('id', 'version', 'delete')
+
+
+class PartialError(ValueError):
+
+    def __init__(self, errors):
+        super().__init__('Dados inválidos')
+        self.errors = errors
+
+
+def formfield(field, **kwargs):
+    # Datas no formato da API
+    if isinstance(field, models.DateField):
+        kwargs['input_formats'] = [DATE_FORMAT]
+    return field.formfield(**kwargs)
+
+
+def error(message, code='invalid'):
+    return [{'message': message, 'code': code}]
+
+
+def parse_version(data):
+    try:
+        return concurrency.parse_version(data)
+    except ValueError as e:
+        raise PartialError({'version': error(str(e))})
+
+
+def validate(block, instance, data, required=False):
+
+    """
+    Aplica ao 'instance' os campos de 'data' enviados para o bloco.
+
+    Com 'required', todos os campos editáveis passam pelo formulário (criação),
+    valendo as regras de obrigatoriedade do modelo.
+
+    Returns:
+        tuple: (campos alterados, versão enviada ou None)
+
+    Raises:
+        PartialError: Erros no formato {'campo': [{'message', 'code'}]}.
+    """
+
+    if not isinstance(data, dict):
+        raise PartialError({'__all__': error('Deve ser um objeto')})
+
+    model, editable = BLOCKS[block]
+    unknown = [name for name in data if name not in editable and name not in CONTROL_KEYS]
+    if unknown:
+        raise PartialError({name: error('Campo desconhecido ou não editável', 'unknown') for name in unknown})
+
+    version = parse_version(data)
+    fields = [name for name in editable if required or name in data]
+    values = dict(data)
+    if isinstance(values.get('condition'), dict):
+        # A condição é enviada como no documento: {'id': ...}
+        values['condition'] = values['condition'].get('id')
+
+    form = modelform_factory(model, fields=fields, formfield_callback=formfield)(data=values, instance=instance)
+    if not form.is_valid():
+        raise PartialError(form.errors.get_json_data())
+
+    return fields, version
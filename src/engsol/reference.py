@@ -0,0 +1,55 @@
+from django.db import transaction
+
+from .models import Condition, Note
+from .versions import CONDITIONS, NOTES, VersionedValue, bump
+
+# Mapas id -> instância das tabelas de referência (condições e notas), mantidos em
+# memória por processo. As views de escrita dessas tabelas incrementam a versão,
+# e os demais processos recarregam o mapa na verificação seguinte.
+
+
+def load_conditions():
+    return {condition.id: condition for condition in Condition.objects.order_by('id')}
+
+
+def load_notes():
+    return {note.id: note for note in Note.objects.order_by('id')}
+
+
+conditions = VersionedValue(CONDITIONS, load_conditions)
+notes = VersionedValue(NOTES, load_notes)
+
+
+def get_condition(condition_id):
+
+    """
+    Condição pelo id, sem consultas enquanto o mapa estiver atualizado.
+
+    Ids ausentes do mapa (ex.: condição criada há pouco por outro processo) são
+    buscados no banco, e o mapa é recarregado no próximo acesso. Levanta
+    'Condition.DoesNotExist' como o 'Condition.objects.get'.
+    """
+
+    condition = conditions.get().get(int(condition_id))
+    if condition is None:
+        condition = Condition.objects.get(pk=condition_id)
+        conditions.invalidate()
+    return condition
+
+
+def changed(value):
+    # Só após o commit: uma escrita desfeita não pode deixar versão nem mapa para trás
+    def publish():
+        bump(value.name)
+        # Este processo vê a nova versão já no próximo acesso
+        value.invalidate()
+
+    transaction.on_commit(publish)
+
+
+def conditions_changed():
+    changed(conditions)
+
+
+def notes_changed():
+    changed(notes)
@@ -0,0 +1,200 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from .filters import chunked
+from .models import Client, Project, Ranking, SearchDocument
+
+# Tabela FTS5 usada no SQLite (rowid = id do projeto)
+FTS_TABLE = 'engsol_searchdocument_fts'
+
+
+def tokenize(query):
+    # Apenas palavras; aspas e operadores enviados pelo usuário são descartados
+    return re.findall(r'\w+', query.lower())
+
+
+def build_documents(project_ids):
+
+    """
+    Monta o texto indexado de cada projeto: nome do projeto, nome e e-mail dos
+    clientes, notas e descrições das etapas e nomes das condições da timeline.
+
+    Uma consulta por tabela para todo o lote de ids.
+
+    Returns:
+        dict: Texto por id, apenas dos projetos que existem.
+    """
+
+    parts = {
+        project_id: [name]
+        for project_id, name in Project.objects.filter(id__in=project_ids).values_list('id', 'name')
+    }
+
+    clients = Client.objects.filter(project_id__in=project_ids).order_by('id')
+    for project_id, name, email in clients.values_list('project_id', 'name', 'email'):
+        if project_id in parts:
+            parts[project_id].extend([name, email])
+
+    rankings = Ranking.objects.filter(project_id__in=project_ids).order_by('id')
+    for project_id, note, description, condition in rankings.values_list('project_id', 'note', 'description', 'condition__name'):
+        if project_id in parts:
+            parts[project_id].extend([note, description, condition])
+
+    return {project_id: '\n'.join(part for part in values if part) for project_id, values in parts.items()}
+
+
+class SearchBackend:
+
+    """
+    Índice textual genérico (busca por LIKE), usado quando o banco não tem um
+    índice invertido suportado.
+    """
+
+    def index(self, documents):
+        # 'documents': texto por id do projeto; um INSERT e um UPDATE para o lote
+        existing = {
+            document.project_id: document
+            for document in SearchDocument.objects.filter(project_id__in=list(documents)).only('id', 'project_id')
+        }
+
+        # bulk_update não aplica o auto_now
+        now = timezone.now()
+        updated, created = [], []
+        for project_id, body in documents.items():
+            document = existing.get(project_id)
+            if document is None:
+                created.append(SearchDocument(project_id=project_id, body=body))
+            else:
+                document.body = body
+                document.updated_at = now
+                updated.append(document)
+
+        SearchDocument.objects.bulk_create(created)
+        SearchDocument.objects.bulk_update(updated, ['body', 'updated_at'])
+
+    def remove(self, project_ids):
+        SearchDocument.objects.filter(project_id__in=project_ids).delete()
+
+    def search(self, query, offset, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return 0, []
+
+        # Apenas projetos ativos
+        documents = SearchDocument.objects.filter(project__status=True)
+        for token in tokens:
+            documents = documents.filter(body__icontains=token)
+
+        ids = documents.order_by('-updated_at').values_list('project_id', flat=True)
+        return documents.count(), [(project_id, None) for project_id in ids[offset:offset + limit]]
+
+
+class SQLiteSearchBackend(SearchBackend):
+
+    """
+    Índice FTS5 do SQLite, ordenado por bm25.
+    """
+
+    def index(self, documents):
+        super().index(documents)
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [[project_id] for project_id in documents])
+            cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)', list(documents.items()))
+
+    def remove(self, project_ids):
+        super().remove(project_ids)
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [[project_id] for project_id in project_ids])
+
+    def search(self, query, offset, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return 0, []
+
+        # Todas as palavras são obrigatórias e aceitam prefixo
+        match = ' '.join(f'"{token}"*' for token in tokens)
+
+        # Apenas projetos ativos
+        where = f'{FTS_TABLE} MATCH %s AND rowid IN (SELECT id FROM {Project._meta.db_table} WHERE status)'
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE} WHERE {where}', [match])
+            total = cursor.fetchone()[0]
+
+            cursor.execute(
+                f'SELECT rowid, bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+                f'WHERE {where} ORDER BY bm25({FTS_TABLE}) LIMIT %s OFFSET %s',
+                [match, limit, offset]
+            )
+            # bm25 é negativo e menor para os melhores resultados
+            results = [(project_id, round(-score, 4)) for project_id, score in cursor.fetchall()]
+
+        return total, results
+
+
+class MySQLSearchBackend(SearchBackend):
+
+    """
+    Índice FULLTEXT do MySQL sobre 'SearchDocument.body', ordenado pela relevância
+    do MATCH ... AGAINST.
+    """
+
+    def search(self, query, offset, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return 0, []
+
+        # Palavras menores que o token mínimo do índice (innodb_ft_min_token_size ou
+        # ft_min_word_len) não estão no índice e não encontrariam nada: busca por LIKE
+        if min(len(token) for token in tokens) < settings.SEARCH_MIN_TOKEN_SIZE:
+            return super().search(query, offset, limit)
+
+        # Modo booleano: todas as palavras são obrigatórias e aceitam prefixo
+        match = ' '.join(f'+{token}*' for token in tokens)
+
+        documents = SearchDocument.objects.filter(project__status=True).annotate(
+            score=RawSQL('MATCH (body) AGAINST (%s IN BOOLEAN MODE)', [match], output_field=FloatField())
+        ).filter(score__gt=0)
+        ranked = documents.order_by('-score').values_list('project_id', 'score')
+
+        return documents.count(), [(project_id, round(score, 4)) for project_id, score in ranked[offset:offset + limit]]
+
+
+def get_backend():
+    if connection.vendor == 'sqlite':
+        return SQLiteSearchBackend()
+    if connection.vendor == 'mysql':
+        return MySQLSearchBackend()
+    return SearchBackend()
+
+
+def reindex_projects(project_ids):
+    # Custo fixo de consultas por lote, independente do número de projetos
+    backend = get_backend()
+
+    for chunk in chunked(list(project_ids)):
+        documents = build_documents(chunk)
+        if documents:
+            backend.index(documents)
+
+        # Projetos que não existem mais saem do índice
+        removed = set(chunk) - set(documents)
+        if removed:
+            backend.remove(removed)
+
+
+def search_projects(query, offset=0, limit=20):
+
+    """
+    Busca projetos pelo texto 'query'.
+
+    Returns:
+        tuple: Total de resultados e a lista de (id do projeto, relevância) da página.
+    """
+
+    return get_backend().search(query, offset, limit)
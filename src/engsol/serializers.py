@@ -0,0 +1,193 @@
+from datetime import date, datetime
+
+from django.db.models import Prefetch
+
+from .models import Client, Information, Ranking, TimelineStats
+from .reference import get_condition
+from .timeline import compute_stats, serialize_stats
+
+# Formato de data usado em toda a API
+DATE_FORMAT = "%d/%m/%Y"
+
+# Campos disponíveis em cada bloco do documento de projeto
+FIELDS = {
+    'project': ('id', 'name', 'key', 'created_at', 'version'),
+    'client': ('id', 'name', 'email'),
+    'information': ('id', 'cost_estimate', 'current_cost', 'start_date', 'delivered_date', 'current_date', 'version'),
+    'ranking': ('id', 'rank', 'last_update', 'note', 'description', 'condition', 'version'),
+}
+
+# Blocos opcionais que podem ser pedidos via '?include='
+EXPANSIONS = ('timeline', 'information', 'average_time')
+
+# Campos das estatísticas da timeline usados em 'average_time'
+STATS_FIELDS = ('stage_count', 'average_days', 'max_days', 'span_days')
+
+
+class FieldsetError(ValueError):
+    pass
+
+
+class Fieldset:
+
+    """
+    Seleção de campos e expansões de um documento de projeto.
+
+    Os parâmetros da URL seguem o formato:
+        ?fields=project.name,client.name,ranking.condition
+        ?include=timeline,information,average_time
+
+    Em 'fields', um bloco citado passa a ter apenas os campos pedidos (o 'id' é
+    sempre mantido) e os blocos não citados continuam com os campos padrão. Em
+    'include', apenas as expansões listadas são montadas; sem o parâmetro valem as
+    expansões padrão da view.
+    """
+
+    def __init__(self, fields, include):
+        self.fields = fields
+        self.include = frozenset(include)
+
+    @classmethod
+    def from_request(cls, request, project_fields, include):
+        fields = dict(FIELDS, project=tuple(project_fields))
+
+        # Campos pedidos por bloco
+        raw_fields = request.GET.get('fields')
+        if raw_fields:
+            selected = {}
+            for item in filter(None, (value.strip() for value in raw_fields.split(','))):
+                block, _, field = item.partition('.')
+                if block not in FIELDS or (field and field not in FIELDS[block]):
+                    raise FieldsetError(f'Campo inválido: {item}')
+                if field:
+                    selected.setdefault(block, {'id'}).add(field)
+                else:
+                    selected.setdefault(block, {'id'}).update(FIELDS[block])
+
+            for block, names in selected.items():
+                fields[block] = tuple(name for name in FIELDS[block] if name in names)
+
+        # Expansões pedidas
+        raw_include = request.GET.get('include')
+        if raw_include is not None:
+            include = [value.strip() for value in raw_include.split(',') if value.strip()]
+            for expansion in include:
+                if expansion not in EXPANSIONS:
+                    raise FieldsetError(f'Expansão inválida: {expansion}')
+
+        return cls(fields, include)
+
+    def includes(self, expansion):
+        return expansion in self.include
+
+
+def project_queryset(queryset, fieldset):
+
+    """
+    Restringe as colunas do 'queryset' de projetos ao 'fieldset' e pré-carrega
+    apenas as relações necessárias para montar os documentos.
+    """
+
+    project_fields = list(fieldset.fields['project'])
+
+    # A média vem das estatísticas gravadas a cada escrita na timeline
+    if fieldset.includes('average_time'):
+        queryset = queryset.select_related('timelinestats')
+        project_fields.extend(f'timelinestats__{field}' for field in STATS_FIELDS)
+
+    queryset = queryset.only(*project_fields)
+
+    lookups = [
+        Prefetch('client_set', queryset=Client.objects.only('project', *fieldset.fields['client'])),
+    ]
+
+    if fieldset.includes('information'):
+        lookups.append(Prefetch(
+            'information_set',
+            queryset=Information.objects.only('project', *fieldset.fields['information']),
+        ))
+
+    if fieldset.includes('timeline'):
+        ranking_fields = ['project', *fieldset.fields['ranking']]
+        # Apenas o id da condição; o nome vem do mapa em memória (ver 'serialize_ranking')
+        rankings = Ranking.objects.order_by('id').only(*ranking_fields)
+        lookups.append(Prefetch('ranking_set', queryset=rankings))
+
+    return queryset.prefetch_related(*lookups)
+
+
+def serialize_value(value):
+    # Datas seguem o formato da API; datetimes ficam a cargo do encoder JSON
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return value.strftime(DATE_FORMAT)
+    return value
+
+
+def serialize_fields(instance, fields):
+    if instance is None:
+        return None
+    return {field: serialize_value(getattr(instance, field)) for field in fields}
+
+
+def serialize_ranking(ranking, fields):
+    data = {}
+    for field in fields:
+        if field == 'condition':
+            data['condition'] = {
+                'id': ranking.condition_id,
+                'name': get_condition(ranking.condition_id).name
+            }
+        else:
+            data[field] = serialize_value(getattr(ranking, field))
+    return data
+
+
+def project_stats(project):
+    stats = getattr(project, 'timelinestats', None)
+
+    # Projeto ainda sem estatísticas gravadas (dados anteriores ao backfill)
+    if stats is None:
+        rankings = getattr(project, '_prefetched_objects_cache', {}).get('ranking_set')
+        if rankings is not None and all('last_update' not in ranking.get_deferred_fields() for ranking in rankings):
+            # Timeline já pré-carregada com as datas: calcula sem nova consulta
+            days = sorted(day for day in (ranking.last_update for ranking in rankings) if day)
+            stage_count = len(rankings)
+        else:
+            days = list(
+                Ranking.objects.filter(project=project).order_by('last_update', 'id')
+                .values_list('last_update', flat=True)
+            )
+            stage_count = len(days)
+            days = [day for day in days if day]
+        stats = TimelineStats(**compute_stats(days, stage_count))
+
+    return stats
+
+
+def serialize_project(project, fieldset):
+
+    """
+    Monta o documento de um projeto carregado por 'project_queryset'.
+    """
+
+    client = next(iter(project.client_set.all()), None)
+
+    data = {
+        'project': serialize_fields(project, fieldset.fields['project']),
+        'client': serialize_fields(client, fieldset.fields['client']),
+    }
+
+    if fieldset.includes('information'):
+        information = next(iter(project.information_set.all()), None)
+        data['information'] = serialize_fields(information, fieldset.fields['information'])
+
+    if fieldset.includes('average_time'):
+        data['average_time'] = serialize_stats(project_stats(project))
+
+    if fieldset.includes('timeline'):
+        data['timeline'] = [
+            {'ranking': serialize_ranking(ranking, fieldset.fields['ranking'])}
+            for ranking in project.ranking_set.all()
+        ]
+
+    return data
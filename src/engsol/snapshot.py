@@ -0,0 +1,144 @@
+import gzip
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .filters import filter_projects
+from .models import Project
+from .serializers import FIELDS, Fieldset, project_queryset, serialize_project
+from . import reference, versions
+
+from modules.fastjson.fastjson import FastJsonResponse, dumps
+
+# O brotli é opcional: sem ele, apenas as variantes gzip e sem compressão são geradas
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+# Snapshot do list_project padrão (sem filtros, paginação ou '?fields='): os bytes do
+# portfólio são serializados e comprimidos uma vez por versão do portfólio e das
+# condições (os nomes vêm do mapa de referência) e guardados no cache; as requisições
+# apenas escolhem a variante pelo 'Accept-Encoding'.
+#
+# Após uma escrita, apenas uma requisição reconstrói o snapshot (reserva com
+# 'cache.add'); as demais recebem o snapshot anterior enquanto isso.
+
+# Documento padrão do list_project
+LIST_FIELDSET = Fieldset(dict(FIELDS, project=('id', 'name', 'key', 'created_at', 'version')), ('information', 'timeline'))
+
+IDENTITY = 'identity'
+
+# Prazo (segundos) da reserva de reconstrução, caso o processo caia no meio dela
+BUILD_LOCK_TIMEOUT = 60
+
+# Variantes em ordem de preferência quando o cliente aceita mais de uma
+ENCODINGS = (('br',) if brotli is not None else ()) + ('gzip',)
+
+
+def is_default(request):
+    return not request.GET
+
+
+def snapshot_key(version, encoding):
+    return f'portfolio_snapshot:{version}:{encoding}'
+
+
+def latest_key(encoding):
+    # Último snapshot construído, de qualquer versão
+    return f'portfolio_snapshot:latest:{encoding}'
+
+
+def lock_key(version):
+    return f'portfolio_snapshot:{version}:building'
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.PORTFOLIO_SNAPSHOT_BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=settings.PORTFOLIO_SNAPSHOT_GZIP_LEVEL)
+
+
+def build(version):
+
+    """
+    Serializa o portfólio e grava todas as variantes da versão no cache.
+
+    Returns:
+        dict: Bytes de cada variante, por codificação.
+    """
+
+    # O mapa de condições do processo pode estar até 'VERSION_CHECK_INTERVAL' atrasado:
+    # força a verificação para não guardar nomes antigos sob a versão atual
+    reference.conditions.invalidate()
+
+    # Mesma consulta e ordenação do list_project sem parâmetros
+    projects = project_queryset(filter_projects(Project.objects.filter(status=True), {}), LIST_FIELDSET)
+    content = dumps([serialize_project(project, LIST_FIELDSET) for project in projects])
+
+    variants = {IDENTITY: content}
+    for encoding in ENCODINGS:
+        variants[encoding] = compress(content, encoding)
+
+    entries = {}
+    for encoding, data in variants.items():
+        entries[snapshot_key(version, encoding)] = data
+        entries[latest_key(encoding)] = data
+    cache.set_many(entries, settings.PORTFOLIO_SNAPSHOT_TIMEOUT)
+    return variants
+
+
+def rebuild(version, encoding):
+    # Só quem reserva a versão reconstrói; os demais servem o snapshot anterior
+    if cache.add(lock_key(version), True, BUILD_LOCK_TIMEOUT):
+        try:
+            return build(version)[encoding]
+        finally:
+            cache.delete(lock_key(version))
+
+    content = cache.get(latest_key(encoding))
+    if content is None:
+        # Nenhum snapshot anterior (cache vazio): não há o que servir enquanto espera
+        content = build(version)[encoding]
+    return content
+
+
+def accepted_encoding(header):
+    # Primeira variante disponível aceita pelo cliente (q > 0), ou 'identity'
+    accepted = {}
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return IDENTITY
+
+
+def response(request):
+
+    """
+    Resposta do list_project padrão a partir do snapshot da versão atual,
+    construindo-o se ainda não existir no cache.
+    """
+
+    encoding = accepted_encoding(request.headers.get('Accept-Encoding'))
+
+    # As versões são lidas antes dos dados: uma escrita concorrente gera outra chave
+    version = versions.token(versions.PORTFOLIO, versions.CONDITIONS)
+    content = cache.get(snapshot_key(version, encoding))
+    if content is None:
+        content = rebuild(version, encoding)
+
+    headers = {'Vary': 'Accept-Encoding'}
+    if encoding != IDENTITY:
+        headers['Content-Encoding'] = encoding
+    return FastJsonResponse.from_content(content, headers=headers)
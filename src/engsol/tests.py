@@ -1,3 +1,1297 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from io import StringIO
+import gzip
+import asyncio
+from unittest import mock
+import json
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, Client as TestClient, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from account.models import Credential
+from .models import Project, Client, Condition, Ranking, Note, Information, TimelineStats, DeletionJob, ArchivedProject, Change, SearchDocument
+from .autocomplete import PrefixIndex, index as autocomplete_index
+from .management.commands.profile_startup import parse_importtime
+from .search import reindex_projects, search_projects
+from . import analytics, async_views, changes, deletion, documents, events, reference, search, snapshot, versions, views
+
+
+class ProjectTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Credential.objects.create(
+            name="user123",
+            email="janedoe@test.com",
+            password="password456",
+            token="token123")
+        cls.approval = Condition.objects.create(name="Aprovação")
+        cls.execution = Condition.objects.create(name="Execução")
+        cls.project = cls.create_project(
+            "Ponte", "ponte-key",
+            cost_estimate=1000, current_cost=1200,
+            start_date=date(2025, 1, 1), delivered_date=date(2025, 3, 1), current_date=date(2025, 3, 10),
+            timeline=[(cls.approval, date(2025, 1, 1)), (cls.execution, date(2025, 1, 11))])
+
+    @classmethod
+    def create_project(cls, name, key, cost_estimate, current_cost, start_date, delivered_date, current_date, timeline):
+        project = Project.objects.create(name=name, key=key)
+        Client.objects.create(project=project, name=f"Cliente {name}", email=f"{key}@test.com")
+        Information.objects.create(
+            project=project,
+            cost_estimate=cost_estimate,
+            current_cost=current_cost,
+            start_date=start_date,
+            delivered_date=delivered_date,
+            current_date=current_date)
+        for rank, (condition, last_update) in enumerate(timeline, start=1):
+            Ranking.objects.create(
+                project=project,
+                condition=condition,
+                rank=str(rank),
+                last_update=last_update,
+                note="nota",
+                description="descrição longa")
+        return project
+
+    @classmethod
+    def create_viaduct(cls):
+        return cls.create_project(
+            "Viaduto", "viaduto-key",
+            cost_estimate=5000, current_cost=4000,
+            start_date=date(2025, 2, 1), delivered_date=date(2025, 6, 1), current_date=date(2025, 4, 1),
+            timeline=[(cls.execution, date(2025, 2, 1)), (cls.approval, date(2025, 3, 1))])
+
+    def setUp(self):
+        cache.clear()
+        self.client = TestClient()
+        self.auth = {'HTTP_AUTHORIZATION': 'Bearer token123'}
+
+        # Mapas de referência recarregados com os dados do teste (valores lidos dentro
+        # de uma transação só ficam em memória após o commit)
+        with self.captureOnCommitCallbacks(execute=True):
+            for value in (reference.conditions, reference.notes):
+                value.version = None
+                value.get()
+
+    def project_payload(self, name, timeline):
+        return {
+            'project': {'name': name},
+            'client': {'name': f'Cliente {name}', 'email': 'cliente@test.com'},
+            'information': {
+                'cost_estimate': 100,
+                'current_cost': 90,
+                'start_date': '01/01/2025',
+                'delivered_date': '01/02/2025',
+                'current_date': '15/01/2025',
+            },
+            'timeline': [
+                {'ranking': {
+                    'rank': str(rank),
+                    'last_update': last_update,
+                    'note': 'nota',
+                    'description': 'descrição',
+                    'condition': {'id': condition.id},
+                }}
+                for rank, (condition, last_update) in enumerate(timeline, start=1)
+            ],
+        }
+
+    def send_json(self, method, name, data, query=''):
+        response = getattr(self.client, method)(
+            reverse(name) + query, data=json.dumps(data), content_type='application/json', **self.auth)
+        return response, json.loads(response.content)
+
+    def get_json(self, name, data=None, **extra):
+        response = self.client.get(reverse(name), data=data or {}, **extra)
+        return response, json.loads(response.content)
+
+
+class ProjectReadTestCase(ProjectTestCase):
+
+    def test_info_project_full_document(self):
+        response, data = self.get_json('info_project', {'id': self.project.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(data), ['project', 'client', 'information', 'average_time', 'timeline'])
+        self.assertEqual(data['project'], {'id': self.project.id, 'name': 'Ponte', 'key': 'ponte-key', 'version': 1})
+        self.assertEqual(data['information']['start_date'], '01/01/2025')
+        self.assertEqual(data['average_time']['ranking'], 10.0)
+        self.assertEqual(data['timeline'][1]['ranking']['condition'], {'id': self.execution.id, 'name': 'Execução'})
+
+    def test_list_project_sparse_fieldset(self):
+        with self.assertNumQueries(3):
+            response, data = self.get_json('list_project', {
+                'fields': 'project.name,client.name,ranking.condition',
+                'include': 'timeline',
+            })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data[0]['project'], {'id': self.project.id, 'name': 'Ponte'})
+        self.assertEqual(data[0]['client'], {'id': data[0]['client']['id'], 'name': 'Cliente Ponte'})
+        self.assertNotIn('information', data[0])
+        self.assertEqual(data[0]['timeline'][0]['ranking'], {
+            'id': data[0]['timeline'][0]['ranking']['id'],
+            'condition': {'id': self.approval.id, 'name': 'Aprovação'},
+        })
+
+    def test_search_project_invalid_field(self):
+        response, data = self.get_json('search_project', {'key': 'ponte-key', 'fields': 'project.secret'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data['error'], 'Campo inválido: project.secret')
+
+
+class InfoProjectsTestCase(ProjectTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.viaduct = cls.create_viaduct()
+
+    def test_matches_info_project_in_requested_order(self):
+        _, ponte = self.get_json('info_project', {'id': self.project.id})
+        _, viaduto = self.get_json('info_project', {'id': self.viaduct.id})
+
+        # Projeto, cliente, informações e timeline, independente da quantidade de ids
+        with self.assertNumQueries(4):
+            response, data = self.get_json('info_projects', {'ids': f'{self.viaduct.id},999,{self.project.id}'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['results'], [viaduto, ponte])
+        self.assertIn('average_time', data['results'][0])
+        self.assertEqual(data['missing'], [999])
+
+    def test_invalid_ids(self):
+        response, _ = self.get_json('info_projects', {'ids': '1,a'})
+        self.assertEqual(response.status_code, 400)
+
+        response, _ = self.get_json('info_projects')
+        self.assertEqual(response.status_code, 400)
+
+class ProjectFilterTestCase(ProjectTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.viaduct = cls.create_viaduct()
+
+    def names(self, data):
+        return [item['project']['name'] for item in data]
+
+    def test_filters(self):
+        _, data = self.get_json('list_project', {'over_budget': 'true'})
+        self.assertEqual(self.names(data), ['Ponte'])
+
+        _, data = self.get_json('list_project', {'late': 'false', 'client': 'cliente v'})
+        self.assertEqual(self.names(data), ['Viaduto'])
+
+        # Nomes por prefixo, sem diferenciar maiúsculas
+        _, data = self.get_json('list_project', {'name': 'PON'})
+        self.assertEqual(self.names(data), ['Ponte'])
+        _, data = self.get_json('list_project', {'name': 'onte'})
+        self.assertEqual(self.names(data), [])
+
+        _, data = self.get_json('list_project', {'delivered_from': '01/04/2025'})
+        self.assertEqual(self.names(data), ['Viaduto'])
+
+        _, data = self.get_json('list_project', {'condition': self.execution.id})
+        self.assertEqual(self.names(data), ['Ponte'])
+
+    def test_order_and_paginate(self):
+        _, data = self.get_json('list_project', {'order': '-cost_variance', 'page': 1, 'page_size': 1})
+
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(self.names(data['results']), ['Ponte'])
+
+        _, data = self.get_json('list_project', {'order': 'cost_variance', 'page': 1, 'page_size': 1})
+        self.assertEqual(self.names(data['results']), ['Viaduto'])
+
+    def test_invalid_filter(self):
+        response, data = self.get_json('list_project', {'order': 'name'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data['error'], 'Ordenação inválida: name')
+
+
+class SearchProjectCacheTestCase(ProjectTestCase):
+
+    def search(self, **params):
+        return self.get_json('search_project', {'key': 'ponte-key', **params})
+
+    def test_hit_costs_no_queries(self):
+        _, expected = self.search()
+
+        # Apenas a versão do portfólio
+        with self.assertNumQueries(1):
+            response, data = self.search()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(data, expected)
+
+    def test_custom_fields_are_not_cached(self):
+        self.search(fields='project.name')
+
+        # Versão do portfólio + documento completo
+        with self.assertNumQueries(5):
+            _, data = self.search()
+        self.assertIn('timeline', data)
+
+    def test_update_project_rebuilds_document(self):
+        self.search()
+
+        payload = self.project_payload('Ponte Nova', [(self.execution, '05/01/2025')])
+        payload['project']['id'] = self.project.id
+        payload['timeline'][0]['ranking']['id'] = self.project.ranking_set.order_by('id').first().id
+        with self.captureOnCommitCallbacks(execute=True):
+            response, _ = self.send_json('put', 'update_project', payload)
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(1):
+            _, data = self.search()
+        self.assertEqual(data['project']['name'], 'Ponte Nova')
+        self.assertEqual(data['timeline'][0]['ranking']['condition']['name'], 'Execução')
+
+    def test_write_in_another_process_is_not_served_stale(self):
+        self.search()
+
+        # Escrita de outro worker: o cache deste processo não é regravado
+        Project.objects.filter(id=self.project.id).update(name='Ponte Nova')
+        versions.bump(versions.PORTFOLIO)
+
+        _, data = self.search()
+        self.assertEqual(data['project']['name'], 'Ponte Nova')
+
+    def test_condition_rename_rebuilds_document(self):
+        self.search()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response, _ = self.send_json('put', 'update_condition', {'id': self.approval.id, 'name': 'Vistoria', 'status': True})
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(1):
+            _, data = self.search()
+        self.assertEqual(data['timeline'][0]['ranking']['condition']['name'], 'Vistoria')
+
+    def test_delete_project_removes_document(self):
+        self.search()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('delete_project') + f'?id={self.project.id}', **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+        response, _ = self.search()
+        self.assertEqual(response.status_code, 500)
+
+class ReferenceDataTestCase(ProjectTestCase):
+
+    def test_list_condition_from_memory(self):
+        # Apenas a validação do token acessa o banco
+        with self.assertNumQueries(1):
+            response, data = self.get_json('list_condition', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['name'] for item in data], ['Aprovação', 'Execução'])
+
+    def test_create_project_resolves_conditions_from_memory(self):
+        payload = self.project_payload('Túnel', [(self.approval, '01/01/2025'), (self.execution, '11/01/2025')])
+
+        with CaptureQueriesContext(connection) as queries:
+            response, _ = self.send_json('post', 'create_project', payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if 'FROM "engsol_condition"' in query['sql']])
+
+    def test_condition_writes_refresh_map(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response, _ = self.send_json('put', 'update_condition', {'id': self.approval.id, 'name': 'Vistoria', 'status': False})
+        self.assertEqual(response.status_code, 200)
+
+        _, data = self.get_json('list_condition', **self.auth)
+        self.assertEqual(data[0], {'id': self.approval.id, 'name': 'Vistoria', 'status': False})
+
+        _, data = self.get_json('info_project', {'id': self.project.id})
+        self.assertEqual(data['timeline'][0]['ranking']['condition']['name'], 'Vistoria')
+
+    @override_settings(VERSION_CHECK_INTERVAL=0)
+    def test_version_bump_from_other_process(self):
+        Condition.objects.filter(id=self.execution.id).update(name='Obra')
+        versions.bump(versions.CONDITIONS)
+
+        self.assertEqual(reference.get_condition(self.execution.id).name, 'Obra')
+
+    def test_unknown_condition_falls_back_to_database(self):
+        condition = Condition.objects.create(name='Entrega')
+
+        self.assertEqual(reference.get_condition(condition.id), condition)
+        with self.assertRaises(Condition.DoesNotExist):
+            reference.get_condition(0)
+
+    def test_rolled_back_write_does_not_stay_in_map(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                phantom = Condition.objects.create(name='Fantasma')
+                reference.conditions_changed()
+                self.assertEqual(reference.get_condition(phantom.id).name, 'Fantasma')
+                raise RuntimeError('conflito de versão')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            real = Condition.objects.create(name='Real')
+            reference.conditions_changed()
+
+        self.assertEqual(reference.get_condition(real.id).name, 'Real')
+        self.assertEqual(versions.current(versions.CONDITIONS), 1)
+
+    def test_list_note(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response, _ = self.send_json('post', 'create_note', {'name': 'Atraso'})
+        self.assertEqual(response.status_code, 201)
+
+        _, data = self.get_json('list_note', **self.auth)
+        self.assertEqual([item['name'] for item in data], ['Atraso'])
+
+class BackgroundDeletionTestCase(ProjectTestCase):
+
+    def delete(self, name, target_id):
+        response = self.client.delete(reverse(name) + f'?id={target_id}&mode=background', **self.auth)
+        return response, json.loads(response.content)
+
+    def run_jobs(self, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('run_deletion_jobs', '--batch-size', '1', *args, stdout=StringIO(), stderr=StringIO())
+
+    def test_project_is_deactivated_then_deleted_in_batches(self):
+        response, data = self.delete('delete_project', self.project.id)
+        self.assertEqual(response.status_code, 202)
+        # Duas etapas, cliente, informações e o próprio projeto
+        self.assertEqual((data['job']['status'], data['job']['total']), ('pending', 5))
+
+        self.project.refresh_from_db()
+        self.assertFalse(self.project.status)
+        _, projects = self.get_json('list_project')
+        self.assertEqual(projects, [])
+
+        self.run_jobs()
+
+        self.assertFalse(Project.objects.filter(id=self.project.id).exists())
+        self.assertFalse(Ranking.objects.filter(project_id=self.project.id).exists())
+        _, job = self.get_json('deletion_job', {'id': data['job']['id']}, **self.auth)
+        self.assertEqual((job['status'], job['deleted'], job['progress']), ('done', 5, 100.0))
+
+    def test_schedule_removes_cached_document_and_search_entry(self):
+        reindex_projects([self.project.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.get_json('search_project', {'key': 'ponte-key'})
+        version, content = documents.get('ponte-key')
+        self.assertIsNotNone(content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.delete('delete_project', self.project.id)
+
+        self.assertIsNone(cache.get(documents.document_key('ponte-key', version)))
+        self.assertFalse(SearchDocument.objects.filter(project_id=self.project.id).exists())
+        self.assertEqual(search_projects('ponte'), (0, []))
+
+    def test_schedule_returns_pending_job(self):
+        _, first = self.delete('delete_project', self.project.id)
+        _, second = self.delete('delete_project', self.project.id)
+        self.assertEqual(first['job']['id'], second['job']['id'])
+
+    def test_resumes_after_failure(self):
+        _, data = self.delete('delete_project', self.project.id)
+
+        with mock.patch('engsol.deletion.delete_target', side_effect=RuntimeError('conexão perdida')):
+            self.run_jobs()
+
+        _, job = self.get_json('deletion_job', {'id': data['job']['id']}, **self.auth)
+        self.assertEqual((job['status'], job['deleted'], job['error']), ('failed', 4, 'conexão perdida'))
+        self.assertTrue(Project.objects.filter(id=self.project.id).exists())
+
+        self.run_jobs('--retry-failed')
+
+        _, job = self.get_json('deletion_job', {'id': data['job']['id']}, **self.auth)
+        self.assertEqual((job['status'], job['deleted']), ('done', 5))
+        self.assertFalse(Project.objects.filter(id=self.project.id).exists())
+
+    def test_running_job_is_not_claimed_twice(self):
+        _, data = self.delete('delete_project', self.project.id)
+        job = DeletionJob.objects.get(id=data['job']['id'])
+        self.assertTrue(deletion.claim(job))
+
+        # Outro processo leu o job ainda pendente
+        self.assertIsNone(deletion.run(job))
+        # Ou já em execução, com progresso recente
+        self.assertIsNone(deletion.run(DeletionJob.objects.get(id=job.id)))
+        self.assertTrue(Project.objects.filter(id=self.project.id).exists())
+
+        # Sem progresso além do prazo, o job é retomado
+        DeletionJob.objects.filter(id=job.id).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.run_jobs()
+        self.assertFalse(Project.objects.filter(id=self.project.id).exists())
+
+    def test_condition_rankings_are_deleted_in_batches(self):
+        response, data = self.delete('delete_condition', self.approval.id)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(data['job']['total'], 2)
+
+        self.run_jobs()
+
+        self.assertFalse(Condition.objects.filter(id=self.approval.id).exists())
+        self.assertEqual(list(self.project.ranking_set.values_list('condition_id', flat=True)), [self.execution.id])
+        self.assertEqual(TimelineStats.objects.get(project=self.project).stage_count, 1)
+
+class ArchiveTestCase(ProjectTestCase):
+
+    def deactivate(self, project, days):
+        Project.objects.filter(id=project.id).update(status=False, updated_at=timezone.now() - timedelta(days=days))
+
+    def archive(self, days=30):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_projects', '--days', str(days), stdout=StringIO())
+
+    def test_moves_old_inactive_projects_to_archive(self):
+        _, expected = self.get_json('info_project', {'id': self.project.id})
+        viaduct = self.create_viaduct()
+        self.deactivate(self.project, days=60)
+
+        self.archive()
+
+        self.assertFalse(Project.objects.filter(id=self.project.id).exists())
+        self.assertFalse(Ranking.objects.filter(project_id=self.project.id).exists())
+        self.assertFalse(Information.objects.filter(project_id=self.project.id).exists())
+        self.assertTrue(Project.objects.filter(id=viaduct.id).exists())
+
+        response, data = self.get_json('archived_project', {'id': self.project.id}, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['timeline'], expected['timeline'])
+        self.assertEqual(data['information'], expected['information'])
+        self.assertIn('archived_at', data)
+
+        _, data = self.get_json('archived_project', {'key': 'ponte-key'}, **self.auth)
+        self.assertEqual(data['project']['name'], 'Ponte')
+
+    def test_keeps_recent_and_deleting_projects(self):
+        viaduct = self.create_viaduct()
+        self.deactivate(self.project, days=5)
+        self.deactivate(viaduct, days=60)
+        DeletionJob.objects.create(kind=DeletionJob.PROJECT, target_id=viaduct.id)
+
+        self.archive()
+
+        self.assertEqual(Project.objects.count(), 2)
+        self.assertFalse(ArchivedProject.objects.exists())
+
+    def test_archived_project_not_found(self):
+        response, _ = self.get_json('archived_project', {'id': self.project.id}, **self.auth)
+        self.assertEqual(response.status_code, 404)
+
+class IdempotentCreateProjectTestCase(ProjectTestCase):
+
+    def test_retried_create_project_is_not_duplicated(self):
+        payload = self.project_payload('Túnel', [(self.approval, '01/01/2025')])
+        self.auth['HTTP_IDEMPOTENCY_KEY'] = 'tunel-1'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first, created = self.send_json('post', 'create_project', payload)
+        second, replayed = self.send_json('post', 'create_project', payload)
+
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertEqual(created, replayed)
+        self.assertEqual(Project.objects.filter(name='Túnel').count(), 1)
+
+class OptimisticConcurrencyTestCase(ProjectTestCase):
+
+    def edit(self, name, project_version=None, information_version=None, ranking_version=None):
+        ranking = self.project.ranking_set.order_by('id').first()
+        payload = self.project_payload(name, [(ranking.condition, '01/01/2025')])
+        payload['project'].update(id=self.project.id, version=project_version)
+        payload['information']['version'] = information_version
+        payload['timeline'][0]['ranking'].update(id=ranking.id, version=ranking_version)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.send_json('put', 'update_project', payload)
+
+    def test_update_with_current_versions(self):
+        response, data = self.edit('Ponte Nova', project_version=1, information_version=1, ranking_version=1)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['version'], {'project': 2, 'information': 2})
+        _, document = self.get_json('info_project', {'id': self.project.id})
+        self.assertEqual(document['project']['version'], 2)
+        self.assertEqual(document['timeline'][0]['ranking']['version'], 2)
+
+    def test_stale_project_version_is_rejected(self):
+        self.edit('Ponte A', project_version=1)
+
+        response, data = self.edit('Ponte B', project_version=1)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(data['current']['project']['name'], 'Ponte A')
+        self.assertEqual(data['current']['project']['version'], 2)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.name, 'Ponte A')
+
+    def test_stale_ranking_rolls_back_whole_update(self):
+        self.edit('Ponte A', ranking_version=1)
+
+        response, _ = self.edit('Ponte B', project_version=2, information_version=2, ranking_version=1)
+
+        self.assertEqual(response.status_code, 409)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.name, self.project.version), ('Ponte A', 2))
+
+    def test_invalid_version(self):
+        response, _ = self.edit('Ponte A', project_version='1')
+        self.assertEqual(response.status_code, 400)
+
+class PatchProjectTestCase(ProjectTestCase):
+
+    def patch(self, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.send_json('patch', 'patch_project', data, query=f'?id={self.project.id}')
+
+    def test_updates_only_sent_ranking_field(self):
+        ranking = self.project.ranking_set.order_by('id').first()
+
+        with CaptureQueriesContext(connection) as queries:
+            response, data = self.patch({'timeline': [{'ranking': {'id': ranking.id, 'note': 'revisada', 'version': 1}}]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['version']['rankings'], {str(ranking.id): 2})
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "engsol_ranking"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"note"', updates[0])
+        self.assertNotIn('"description"', updates[0])
+
+        _, document = self.get_json('info_project', {'id': self.project.id})
+        self.assertEqual(document['timeline'][0]['ranking']['note'], 'revisada')
+        self.assertEqual(document['timeline'][0]['ranking']['description'], 'descrição longa')
+
+    def test_accepts_ranking_id_as_text(self):
+        ranking = self.project.ranking_set.order_by('id').first()
+
+        response, data = self.patch({'timeline': [{'ranking': {'id': str(ranking.id), 'note': 'revisada', 'version': 1}}]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['version']['rankings'], {str(ranking.id): 2})
+        ranking.refresh_from_db()
+        self.assertEqual(ranking.note, 'revisada')
+
+    def test_invalid_ranking_id(self):
+        response, data = self.patch({'timeline': [{'ranking': {'id': 'abc', 'note': 'revisada'}}]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data['errors']['timeline']['0']['id'][0]['code'], 'invalid')
+
+    def test_updates_information_field(self):
+        response, data = self.patch({'information': {'current_cost': 1500, 'delivered_date': '01/04/2025'}})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['version']['information'], 2)
+        information = self.project.information_set.get()
+        self.assertEqual((information.current_cost, information.cost_estimate), (1500, 1000))
+        self.assertEqual(information.delivered_date, date(2025, 4, 1))
+
+    def test_creates_and_deletes_rankings(self):
+        first, second = self.project.ranking_set.order_by('id')
+
+        response, _ = self.patch({'timeline': [
+            {'ranking': {'id': second.id, 'delete': True}},
+            {'ranking': {'rank': '3', 'last_update': '01/02/2025', 'condition': {'id': self.execution.id}}},
+        ]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Ranking.objects.filter(id=second.id).exists())
+        self.assertEqual(self.project.ranking_set.count(), 2)
+        self.assertEqual(TimelineStats.objects.get(project=self.project).stage_count, 2)
+
+    def test_validates_only_sent_fields(self):
+        ranking = self.project.ranking_set.order_by('id').first()
+
+        response, data = self.patch({
+            'information': {'start_date': '2025-01-01'},
+            'project': {'key': 'outra'},
+            'timeline': [{'ranking': {'id': ranking.id, 'condition': {'id': 999}}}, {'ranking': {'rank': '3'}}],
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data['errors']['information']['start_date'][0]['code'], 'invalid')
+        self.assertEqual(data['errors']['project']['key'][0]['code'], 'unknown')
+        self.assertEqual(data['errors']['timeline']['0']['condition'][0]['code'], 'invalid_choice')
+        self.assertEqual(data['errors']['timeline']['1']['condition'][0]['code'], 'required')
+        self.assertEqual(self.project.information_set.get().start_date, date(2025, 1, 1))
+
+    def test_stale_version(self):
+        self.patch({'project': {'name': 'Ponte A'}})
+
+        response, data = self.patch({'project': {'name': 'Ponte B', 'version': 1}})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(data['current']['project']['name'], 'Ponte A')
+
+@override_settings(CHANGES_VISIBILITY_LAG=0)
+class ChangeFeedTestCase(ProjectTestCase):
+
+    def send_json(self, *args, **kwargs):
+        # As alterações são gravadas após o commit da escrita
+        with self.captureOnCommitCallbacks(execute=True):
+            return super().send_json(*args, **kwargs)
+
+    def feed(self, **params):
+        return self.get_json('changes', params, **self.auth)
+
+    def test_feed_returns_changes_after_cursor(self):
+        _, start = self.feed()
+        self.assertEqual((start['resync'], start['changes']), (False, []))
+
+        self.send_json('put', 'update_condition', {'id': self.approval.id, 'name': 'Vistoria', 'status': True})
+        self.send_json('put', 'update_condition', {'id': self.approval.id, 'name': 'Vistoria final', 'status': True})
+        self.send_json('post', 'create_condiotion', {'name': 'Entrega'})
+
+        _, data = self.feed(since=start['cursor'])
+        # As duas alterações da mesma condição viram apenas a última
+        self.assertEqual(
+            [(change['entity'], change['action'], change['data']['name']) for change in data['changes']],
+            [('condition', 'upsert', 'Vistoria final'), ('condition', 'upsert', 'Entrega')])
+        self.assertFalse(data['has_more'])
+
+        _, data = self.feed(since=data['cursor'])
+        self.assertEqual(data['changes'], [])
+
+    def test_pages_follow_limit(self):
+        _, start = self.feed()
+        for name in ('A', 'B', 'C'):
+            self.send_json('post', 'create_condiotion', {'name': name})
+
+        _, first = self.feed(since=start['cursor'], limit=2)
+        _, second = self.feed(since=first['cursor'], limit=2)
+        self.assertTrue(first['has_more'])
+        self.assertFalse(second['has_more'])
+        self.assertEqual([change['data']['name'] for change in first['changes'] + second['changes']], ['A', 'B', 'C'])
+
+    def test_update_project_records_timeline_changes(self):
+        rankings = list(self.project.ranking_set.order_by('id'))
+        payload = self.project_payload('Ponte Nova', [(self.approval, '01/01/2025'), (self.execution, '11/01/2025')])
+        payload['project']['id'] = self.project.id
+        payload['timeline'][0]['ranking']['id'] = rankings[0].id
+        payload['timeline'][1]['ranking'].update(id=rankings[1].id, delete=True)
+
+        _, start = self.feed()
+        response, _ = self.send_json('put', 'update_project', payload)
+        self.assertEqual(response.status_code, 200)
+
+        _, data = self.feed(since=start['cursor'])
+        self.assertEqual(
+            [(change['entity'], change['entity_id'], change['action']) for change in data['changes']],
+            [
+                ('project', self.project.id, 'upsert'),
+                ('client', self.project.client_set.get().id, 'upsert'),
+                ('information', self.project.information_set.get().id, 'upsert'),
+                ('ranking', rankings[0].id, 'upsert'),
+                ('ranking', rankings[1].id, 'delete'),
+            ])
+        self.assertEqual({change['project_id'] for change in data['changes']}, {self.project.id})
+        self.assertEqual(data['changes'][0]['data']['name'], 'Ponte Nova')
+
+    def test_pruned_cursor_requires_resync(self):
+        _, start = self.feed()
+        self.send_json('post', 'create_condiotion', {'name': 'Entrega'})
+        Change.objects.update(created_at=timezone.now() - timedelta(days=30))
+
+        call_command('prune_changes', '--days', '7', stdout=StringIO())
+
+        _, data = self.feed(since=start['cursor'])
+        self.assertTrue(data['resync'])
+
+        # Seguindo do novo cursor, o feed volta ao normal
+        _, data = self.feed(since=data['cursor'])
+        self.assertEqual((data['resync'], data['changes']), (False, []))
+
+    @override_settings(CHANGES_VISIBILITY_LAG=60)
+    def test_recent_changes_wait_for_visibility_horizon(self):
+        _, start = self.feed()
+        self.send_json('post', 'create_condiotion', {'name': 'Entrega'})
+
+        # Um INSERT de id menor ainda pode confirmar dentro da janela
+        _, data = self.feed(since=start['cursor'])
+        self.assertEqual((data['changes'], data['cursor']), ([], start['cursor']))
+
+        # A janela segue o relógio do banco, não o do servidor que atende a leitura
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(hours=1)):
+            _, data = self.feed(since=start['cursor'])
+        self.assertEqual(data['changes'], [])
+
+        Change.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        _, data = self.feed(since=start['cursor'])
+        self.assertEqual([change['data']['name'] for change in data['changes']], ['Entrega'])
+
+    def test_rolled_back_write_is_not_recorded(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                changes.record(changes.upsert(Condition.objects.create(name='Desfeita')))
+                raise RuntimeError('conflito de versão')
+
+        self.assertFalse(Change.objects.exists())
+
+    def test_invalid_cursor(self):
+        response, _ = self.feed(since='abc')
+        self.assertEqual(response.status_code, 400)
+
+        _, data = self.feed(since=10 ** 9)
+        self.assertTrue(data['resync'])
+
+@override_settings(EVENTS_POLL_INTERVAL=60, EVENTS_HEARTBEAT=60, CHANGES_VISIBILITY_LAG=0)
+class ProjectEventsTestCase(ProjectTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.viaduct = cls.create_viaduct()
+
+    def update_timeline(self, project, last_update):
+        ranking = project.ranking_set.order_by('id').first()
+        payload = self.project_payload(project.name, [(ranking.condition, last_update)])
+        payload['project']['id'] = project.id
+        payload['timeline'][0]['ranking']['id'] = ranking.id
+        with self.captureOnCommitCallbacks(execute=True):
+            response, _ = self.send_json('put', 'update_project', payload)
+        self.assertEqual(response.status_code, 200)
+        return ranking
+
+    async def stop(self, hub):
+        hub.task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await hub.task
+
+    async def test_hub_delivers_timeline_events_per_project(self):
+        hub = events.EventHub()
+        queue = await hub.subscribe(self.project.id)
+        other = await hub.subscribe(self.viaduct.id)
+
+        ranking = await sync_to_async(self.update_timeline)(self.project, '20/01/2025')
+        await hub.poll()
+
+        event = queue.get_nowait()
+        self.assertEqual(event['project_id'], self.project.id)
+        self.assertEqual(
+            [(change['entity_id'], change['data']['last_update']) for change in event['changes']],
+            [(ranking.id, '20/01/2025')])
+        self.assertTrue(other.empty())
+
+        # Nada novo no próximo ciclo
+        await hub.poll()
+        self.assertTrue(queue.empty())
+        await self.stop(hub)
+
+    @override_settings(EVENTS_QUEUE_SIZE=1)
+    async def test_slow_client_is_disconnected(self):
+        hub = events.EventHub()
+        queue = await hub.subscribe(self.project.id)
+
+        hub.publish(self.project.id, queue, {'id': 1})
+        hub.publish(self.project.id, queue, {'id': 2})
+
+        self.assertIsNone(queue.get_nowait())
+        self.assertNotIn(self.project.id, hub.subscribers)
+        await self.stop(hub)
+
+    @override_settings(EVENTS_HEARTBEAT=0.01)
+    async def test_stream_resumes_from_last_event_id(self):
+        cursor = await sync_to_async(changes.latest)()
+        ranking = await sync_to_async(self.update_timeline)(self.project, '20/01/2025')
+
+        response = await self.async_client.get(
+            reverse('project_events'), {'key': 'ponte-key'}, headers={'Last-Event-ID': str(cursor)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        content = aiter(response.streaming_content)
+        self.assertTrue((await anext(content)).startswith(b'retry:'))
+        head, data = (await anext(content)).split(b'data: ')
+        self.assertIn(b'event: timeline', head)
+        event = json.loads(data)
+        self.assertEqual((event['key'], event['changes'][0]['entity_id']), ('ponte-key', ranking.id))
+        self.assertEqual(await anext(content), b': ping\n\n')
+
+        await content.aclose()
+        await self.stop(events.hub)
+
+    async def test_closed_stream_unsubscribes(self):
+        hub = events.EventHub()
+        with mock.patch.object(events, 'hub', hub):
+            content = events.stream(self.project.id, 'ponte-key')
+            await anext(content)
+            self.assertIn(self.project.id, hub.subscribers)
+
+            await content.aclose()
+            self.assertEqual(hub.subscribers, {})
+        await self.stop(hub)
+
+    def test_requires_asgi(self):
+        response, _ = self.get_json('project_events', {'key': 'ponte-key'})
+        self.assertEqual(response.status_code, 501)
+
+    async def test_unknown_project(self):
+        response = await self.async_client.get(reverse('project_events'), {'key': 'nada'})
+        self.assertEqual(response.status_code, 404)
+
+        response = await self.async_client.get(
+            reverse('project_events'), {'key': 'ponte-key'}, headers={'Last-Event-ID': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+class PortfolioSnapshotTestCase(ProjectTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.viaduct = cls.create_viaduct()
+
+    def test_snapshot_matches_live_list(self):
+        response = self.client.get(reverse('list_project'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        # '?include=' com as expansões padrão não usa o snapshot
+        _, expected = self.get_json('list_project', {'include': 'information,timeline'})
+        self.assertEqual(json.loads(response.content), expected)
+
+    def test_compressed_variant_is_served_from_cache(self):
+        content = self.client.get(reverse('list_project')).content
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('list_project'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), content)
+
+    def test_write_builds_new_snapshot(self):
+        self.client.get(reverse('list_project'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.send_json('put', 'update_condition', {'id': self.approval.id, 'name': 'Vistoria', 'status': True})
+
+        _, data = self.get_json('list_project')
+        names = [item['ranking']['condition']['name'] for project in data for item in project['timeline']]
+        self.assertIn('Vistoria', names)
+
+    def test_version_is_bumped_only_on_commit(self):
+        version = versions.current(versions.PORTFOLIO)
+
+        payload = self.project_payload('Ponte Nova', [(self.execution, '05/01/2025')])
+        payload['project']['id'] = self.project.id
+        payload['timeline'][0]['ranking']['id'] = self.project.ranking_set.order_by('id').first().id
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response, _ = self.send_json('put', 'update_project', payload)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(versions.current(versions.PORTFOLIO), version)
+
+        for callback in callbacks:
+            callback()
+        self.assertGreater(versions.current(versions.PORTFOLIO), version)
+
+    def test_concurrent_rebuild_serves_previous_snapshot(self):
+        previous = self.client.get(reverse('list_project')).content
+        versions.bump(versions.PORTFOLIO)
+
+        # Outra requisição já reconstrói a nova versão
+        version = versions.token(versions.PORTFOLIO, versions.CONDITIONS)
+        cache.add(snapshot.lock_key(version), True)
+
+        with mock.patch.object(snapshot, 'build') as build:
+            response = self.client.get(reverse('list_project'))
+        build.assert_not_called()
+        self.assertEqual(response.content, previous)
+
+    @override_settings(VERSION_CHECK_INTERVAL=3600)
+    def test_build_ignores_stale_condition_map(self):
+        self.client.get(reverse('list_project'))
+
+        # Renomeação feita por outro processo: o mapa deste processo não é invalidado
+        Condition.objects.filter(pk=self.approval.id).update(name='Vistoria')
+        versions.bump(versions.CONDITIONS, versions.PORTFOLIO)
+
+        _, data = self.get_json('list_project')
+        names = [item['ranking']['condition']['name'] for project in data for item in project['timeline']]
+        self.assertIn('Vistoria', names)
+
+    def test_accepted_encoding(self):
+        with mock.patch.object(snapshot, 'ENCODINGS', ('br', 'gzip')):
+            self.assertEqual(snapshot.accepted_encoding('gzip, br'), 'br')
+            self.assertEqual(snapshot.accepted_encoding('br;q=0, gzip;q=0.5'), 'gzip')
+            self.assertEqual(snapshot.accepted_encoding('*'), 'br')
+            self.assertEqual(snapshot.accepted_encoding('gzip;q=0'), 'identity')
+            self.assertEqual(snapshot.accepted_encoding(None), 'identity')
+
+class BatchTestCase(ProjectTestCase):
+
+    def batch(self, *operations):
+        return self.send_json('post', 'batch', {'operations': list(operations)})
+
+    def test_operations_run_in_order_with_one_authentication(self):
+        with CaptureQueriesContext(connection) as queries:
+            response, data = self.batch(
+                {'op': 'toggle_condition', 'params': {'id': self.approval.id}},
+                {'op': 'create_note', 'body': {'name': 'Revisar orçamento'}},
+                {'op': 'update_condition', 'body': {'id': self.approval.id, 'name': 'Vistoria', 'status': True}},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(data['committed'])
+        self.assertEqual([result['status'] for result in data['results']], [200, 201, 200])
+        self.assertFalse(data['results'][0]['body']['new_status'])
+
+        self.approval.refresh_from_db()
+        self.assertEqual((self.approval.name, self.approval.status), ('Vistoria', True))
+        self.assertTrue(Note.objects.filter(name='Revisar orçamento').exists())
+        self.assertEqual(sum('account_credential' in query['sql'] for query in queries.captured_queries), 1)
+
+    def test_failure_rolls_back_batch(self):
+        response, data = self.batch(
+            {'op': 'create_note', 'body': {'name': 'Revisar orçamento'}},
+            {'op': 'toggle_condition', 'params': {'id': 999}},
+            {'op': 'create_note', 'body': {'name': 'Não executada'}},
+        )
+
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(data['committed'])
+        self.assertEqual([result['status'] for result in data['results']], [201, 500])
+        self.assertFalse(Note.objects.exists())
+
+    def test_savepoint_rolls_back_only_the_operation(self):
+        response, data = self.batch(
+            {'op': 'create_note', 'body': {'name': 'Primeira'}},
+            {'op': 'create_project', 'body': {'project': {'name': 'Sem cliente'}}, 'savepoint': True},
+            {'op': 'create_note', 'body': {'name': 'Segunda'}},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(data['committed'])
+        self.assertEqual([result['status'] for result in data['results']], [201, 400, 201])
+        self.assertEqual(Note.objects.count(), 2)
+        self.assertFalse(Project.objects.filter(name='Sem cliente').exists())
+
+    def test_idempotent_batch(self):
+        operation = {'op': 'create_note', 'body': {'name': 'Revisar orçamento'}}
+        self.auth['HTTP_IDEMPOTENCY_KEY'] = 'batch-1'
+
+        _, first = self.batch(operation)
+        response, second = self.batch(operation)
+
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(first, second)
+        self.assertEqual(Note.objects.count(), 1)
+
+    def test_invalid_operation(self):
+        response, _ = self.batch({'op': 'list_project'})
+        self.assertEqual(response.status_code, 400)
+
+        response, _ = self.send_json('post', 'batch', {'operations': []})
+        self.assertEqual(response.status_code, 400)
+
+class SearchTestCase(ProjectTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        reindex_projects([cls.project.id])
+
+    def test_search_ranks_and_paginates(self):
+        response, data = self.get_json('search', {'q': 'aprovacao pont'}, **self.auth)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['project']['name'], 'Ponte')
+
+    def test_search_follows_condition_rename(self):
+        response = self.client.put(
+            reverse('update_condition'),
+            data=json.dumps({'id': self.approval.id, 'name': 'Vistoria', 'status': True}),
+            content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+        _, data = self.get_json('search', {'q': 'vistoria'}, **self.auth)
+        self.assertEqual(data['count'], 1)
+
+        _, data = self.get_json('search', {'q': 'aprovação'}, **self.auth)
+        self.assertEqual(data['count'], 0)
+
+    def test_search_skips_inactive_projects(self):
+        Project.objects.filter(id=self.project.id).update(status=False)
+
+        for backend in (search.SearchBackend(), search.get_backend()):
+            self.assertEqual(backend.search('ponte', 0, 20), (0, []))
+
+    def test_mysql_short_words_fall_back_to_like(self):
+        # Sem consultar o índice FULLTEXT, que ignora palavras menores que o token mínimo
+        self.assertEqual(search.MySQLSearchBackend().search('pon', 0, 20), (1, [(self.project.id, None)]))
+
+    def test_reindex_queries_do_not_grow_with_projects(self):
+        viaduct = self.create_viaduct()
+        reindex_projects([viaduct.id])
+
+        with CaptureQueriesContext(connection) as single:
+            reindex_projects([self.project.id])
+        with CaptureQueriesContext(connection) as batch:
+            reindex_projects([self.project.id, viaduct.id])
+        self.assertEqual(len(batch), len(single))
+
+        _, data = self.get_json('search', {'q': 'viaduto'}, **self.auth)
+        self.assertEqual(data['count'], 1)
+
+    def test_search_requires_token(self):
+        response, _ = self.get_json('search', {'q': 'ponte'})
+
+        self.assertEqual(response.status_code, 401)
+
+
+class AutocompleteTestCase(ProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        autocomplete_index.version = None
+
+    def test_prefix_index(self):
+        index = PrefixIndex.build(
+            [('Ponte Rio Negro', 1), ('Construtora Ação', 1), ('Portão', 2)],
+            {1: {'name': 'Ponte Rio Negro', 'client': 'Construtora Ação'}, 2: {'name': 'Portão', 'client': None}})
+
+        self.assertEqual([item['id'] for item in index.lookup('po')], [1, 2])
+        self.assertEqual([item['id'] for item in index.lookup('RIO n')], [1])
+        self.assertEqual([item['id'] for item in index.lookup('acao')], [1])
+        self.assertEqual(index.lookup('x'), [])
+
+    @override_settings(VERSION_CHECK_INTERVAL=60)
+    def test_lookups_are_served_from_memory(self):
+        # O índice lido na transação do teste fica em memória no "commit"
+        with self.captureOnCommitCallbacks(execute=True):
+            _, data = self.get_json('autocomplete', {'q': 'cliente p'}, **self.auth)
+        self.assertEqual(data['results'], [{'id': self.project.id, 'name': 'Ponte', 'client': 'Cliente Ponte'}])
+
+        # Apenas a validação do token acessa o banco
+        with self.assertNumQueries(1):
+            _, data = self.get_json('autocomplete', {'q': 'pon'}, **self.auth)
+        self.assertEqual(len(data['results']), 1)
+
+    @override_settings(VERSION_CHECK_INTERVAL=0)
+    def test_index_follows_writes(self):
+        self.get_json('autocomplete', {'q': 'pon'}, **self.auth)
+
+        response = self.client.delete(reverse('delete_project') + f'?id={self.project.id}', **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+        _, data = self.get_json('autocomplete', {'q': 'pon'}, **self.auth)
+        self.assertEqual(data['results'], [])
+
+
+class TimelineStatsTestCase(ProjectTestCase):
+
+    def test_stats_are_stored_in_date_order(self):
+        # Etapas enviadas fora da ordem cronológica
+        payload = self.project_payload('Túnel', [
+            (self.approval, '01/01/2025'),
+            (self.execution, '21/01/2025'),
+            (self.approval, '06/01/2025'),
+        ])
+        response, _ = self.send_json('post', 'create_project', payload)
+        self.assertEqual(response.status_code, 200)
+
+        project = Project.objects.get(name='Túnel')
+        stats = TimelineStats.objects.get(project=project)
+        self.assertEqual(stats.intervals, [5, 15])
+        self.assertEqual((stats.stage_count, stats.average_days, stats.max_days, stats.span_days), (3, 10.0, 15, 20))
+
+        # Projeto (com as estatísticas) e cliente, sem ler as etapas
+        with self.assertNumQueries(2):
+            _, data = self.get_json('info_project', {'id': project.id, 'include': 'average_time'})
+        self.assertEqual(data['average_time'], {'ranking': 10.0, 'max': 15, 'span': 20, 'stages': 3})
+
+
+class ConditionDurationsTestCase(ProjectTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.create_project(
+            "Viaduto", "viaduto-key",
+            cost_estimate=5000, current_cost=4000,
+            start_date=date(2025, 2, 1), delivered_date=date(2025, 6, 1), current_date=date(2025, 4, 1),
+            timeline=[
+                (cls.approval, date(2025, 2, 1)),
+                (cls.execution, date(2025, 2, 21)),
+                (cls.approval, date(2025, 3, 1)),
+            ])
+
+    def test_durations_per_condition(self):
+        _, data = self.get_json('condition_durations')
+
+        self.assertEqual(data['data'], [
+            {'condition': {'id': self.approval.id, 'name': 'Aprovação'}, 'count': 2, 'mean': 15.0, 'median': 15.0, 'p90': 19.0},
+            {'condition': {'id': self.execution.id, 'name': 'Execução'}, 'count': 1, 'mean': 8.0, 'median': 8.0, 'p90': 8.0},
+        ])
+
+        _, data = self.get_json('condition_durations', {'date_from': '01/02/2025'})
+        self.assertEqual([item['count'] for item in data['data']], [1, 1])
+
+    def test_durations_are_cached_until_next_write(self):
+        self.get_json('condition_durations')
+
+        # Versão do portfólio + cache
+        with self.assertNumQueries(1):
+            self.get_json('condition_durations')
+
+        versions.bump(versions.PORTFOLIO)
+        with self.assertNumQueries(3):
+            self.get_json('condition_durations')
+
+        # O recálculo substitui a entrada do período, sem acumular uma por versão
+        entry = cache.get('condition_durations:None:None')
+        self.assertEqual(entry['version'], versions.current(versions.PORTFOLIO))
+
+
+class DeliverySeriesTestCase(ProjectTestCase):
+
+    def test_closed_months_are_cached(self):
+        _, data = self.get_json('delivery_series', {'start': '02/2025', 'end': '04/2025'})
+        self.assertEqual(data['data'], [
+            {'year': 2025, 'month': 2, 'count': 0},
+            {'year': 2025, 'month': 3, 'count': 1},
+            {'year': 2025, 'month': 4, 'count': 0},
+        ])
+
+        # Meses encerrados vêm do cache; apenas as gerações dos meses são consultadas
+        with self.assertNumQueries(1):
+            _, data = self.get_json('delivery_series', {'start': '02/2025', 'end': '04/2025'})
+
+        # Um ano inteiro calcula apenas os meses ainda não cacheados, em uma consulta
+        with self.assertNumQueries(2):
+            _, data = self.get_json('delivery_series', {'year': 2025})
+        self.assertEqual(len(data['data']), 12)
+
+    def test_write_in_another_process_invalidates_month(self):
+        self.get_json('delivery_series', {'year': 2025})
+
+        # Outro worker altera a entrega: o cache deste processo não é tocado
+        Information.objects.filter(project=self.project).update(delivered_date=date(2025, 4, 1))
+        versions.bump(analytics.delivery_version(2025, 3), analytics.delivery_version(2025, 4))
+
+        _, data = self.get_json('delivery_series', {'start': '03/2025', 'end': '04/2025'})
+        self.assertEqual([item['count'] for item in data['data']], [0, 1])
+
+    def test_deleted_project_invalidates_its_month(self):
+        self.get_json('delivery_series', {'year': 2025})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('delete_project') + f'?id={self.project.id}', **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+        _, data = self.get_json('delivery_series', {'year': 2025})
+        self.assertEqual(data['data'][2], {'year': 2025, 'month': 3, 'count': 0})
+
+    def test_late_reader_does_not_restore_stale_month(self):
+        # Leitor lento: leu a geração e a contagem antes do commit da exclusão
+        generation = analytics.delivery_generations([(2025, 3)])[(2025, 3)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('delete_project') + f'?id={self.project.id}', **self.auth)
+
+        cache.set(analytics.delivery_month_key(2025, 3, generation), 1)
+
+        _, data = self.get_json('delivery_series', {'start': '03/2025', 'end': '03/2025'})
+        self.assertEqual(data['data'], [{'year': 2025, 'month': 3, 'count': 0}])
+
+    @override_settings(DELIVERY_SERIES_MAX_MONTHS=24)
+    def test_period_is_limited(self):
+        response, _ = self.get_json('delivery_series', {'start': '01/2000', 'end': '01/2025'})
+        self.assertEqual(response.status_code, 400)
+
+        response, _ = self.get_json('delivery_series', {'start': '01/2023', 'end': '12/2024'})
+        self.assertEqual(response.status_code, 200)
+
+
+class CostTestCase(ProjectTestCase):
+
+    def test_batch_reports_missing_ids(self):
+        with self.assertNumQueries(1):
+            response, data = self.get_json('cost', {'ids': f'999,{self.project.id},999'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['data'], [{
+            'project': {'id': self.project.id, 'name': 'Ponte', 'key': 'ponte-key'},
+            'information': {'cost_estimate': 1000.0, 'current_cost': 1200.0},
+        }])
+        self.assertEqual(data['missing'], [999])
+
+    def test_large_id_sets_are_chunked(self):
+        ids = ','.join(str(project_id) for project_id in range(1, 1201))
+
+        with self.assertNumQueries(3):
+            _, data = self.get_json('cost', {'ids': ids})
+
+        self.assertEqual(len(data['data']) + len(data['missing']), 1200)
+
+
+class AsyncViewsTestCase(ProjectTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.viaduct = cls.create_viaduct()
+
+    async def test_async_views_match_sync_views(self):
+        factory = AsyncRequestFactory()
+
+        for name, params in (
+            ('list_project', {'order': 'cost', 'page': 1, 'page_size': 1}),
+            ('info_project', {'id': self.project.id}),
+            ('info_projects', {'ids': f'{self.viaduct.id},{self.project.id},999'}),
+            ('search_project', {'key': 'viaduto-key', 'fields': 'project.name'}),
+        ):
+            request = factory.get('/', params)
+            expected = await sync_to_async(getattr(views, name))(request)
+            response = await getattr(async_views, name)(request)
+            self.assertEqual(json.loads(response.content), json.loads(expected.content), name)
+
+    async def test_async_dashboard_matches_sync_dashboard(self):
+        body = {'delivery_projects': {'year': 2025}, 'cost': {'id': [self.project.id, self.viaduct.id, 999]}}
+        request = AsyncRequestFactory().post('/', data=body, content_type='application/json')
+
+        expected = await sync_to_async(views.dashboard)(request)
+        response = await async_views.dashboard(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+
+class StartupTestCase(SimpleTestCase):
+
+    def test_parse_importtime(self):
+        output = [
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |     django.utils',
+            'import time:       300 |        420 |   django',
+            'outra linha',
+        ]
+        self.assertEqual(parse_importtime(output), [('django.utils', 120, 120), ('django', 300, 420)])
+
+    def test_views_do_not_load_mail_or_jwt(self):
+        # Módulos usados só por algumas views ficam fora da inicialização
+        import account.models
+        import account.views
+        self.assertFalse(hasattr(views, 'MyMail'))
+        self.assertFalse(hasattr(views, 'RequestFactory'))
+        self.assertFalse(hasattr(account.models, 'jwt'))
+        self.assertFalse(hasattr(account.views, 'smtplib'))
+
+
+class DatabasePoolTestCase(ProjectTestCase):
+
+    def test_requires_token(self):
+        response, _ = self.get_json('database_pool')
+        self.assertEqual(response.status_code, 401)
+
+    def test_without_pool_backend(self):
+        response, data = self.get_json('database_pool', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['pools'], {})
@@ -0,0 +1,61 @@
+from itertools import groupby
+
+from django.db import transaction
+
+from .models import Project, Ranking, TimelineStats
+
+
+def compute_stats(days, stage_count):
+
+    """
+    Calcula as estatísticas de uma timeline a partir das datas das etapas já
+    ordenadas: intervalos entre etapas consecutivas, média, maior intervalo e
+    duração total (do primeiro ao último 'last_update').
+    """
+
+    intervals = [(days[i] - days[i - 1]).days for i in range(1, len(days))]
+
+    return {
+        'stage_count': stage_count,
+        'intervals': intervals,
+        'average_days': round(sum(intervals) / len(intervals), 2) if intervals else 0,
+        'max_days': max(intervals) if intervals else 0,
+        'span_days': (days[-1] - days[0]).days if days else 0,
+    }
+
+
+def refresh_timeline_stats(project_ids):
+
+    """
+    Recalcula e grava as estatísticas da timeline dos projetos em 'project_ids'
+    com uma única consulta às etapas.
+    """
+
+    project_ids = set(Project.objects.filter(id__in=project_ids).values_list('id', flat=True))
+
+    rankings = (
+        Ranking.objects.filter(project_id__in=project_ids)
+        .order_by('project_id', 'last_update', 'id')
+        .values_list('project_id', 'last_update')
+    )
+
+    stats = {project_id: compute_stats([], 0) for project_id in project_ids}
+    for project_id, rows in groupby(rankings, key=lambda row: row[0]):
+        dates = [last_update for _, last_update in rows]
+        stats[project_id] = compute_stats([day for day in dates if day], len(dates))
+
+    with transaction.atomic():
+        TimelineStats.objects.filter(project_id__in=project_ids).delete()
+        TimelineStats.objects.bulk_create([
+            TimelineStats(project_id=project_id, **values)
+            for project_id, values in stats.items()
+        ])
+
+
+def serialize_stats(stats):
+    return {
+        'ranking': stats.average_days,
+        'max': stats.max_days,
+        'span': stats.span_days,
+        'stages': stats.stage_count,
+    }
@@ -1,16 +1,25 @@
 # Criar um arquivo igual o 'urls.py' do projeto
+from django.conf import settings
 from django.urls import path, re_path
-from . import views
+from . import async_views, views
+
+# Views de leitura assíncronas quando o servidor roda em ASGI (ASYNC_VIEWS=true)
+read_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
 
     # Project
     path('create_project', views.create_project, name='create_project'),
     path('update_project', views.update_project, name='update_project'),
+    path('patch_project', views.patch_project, name='patch_project'),
     path('delete_project', views.delete_project, name='delete_project'),
-    path('info_project', views.info_project, name='info_project'),
-    path('list_project', views.list_project, name='list_project'),
-    path('search_project', views.search_project, name='search_project'),
+    path('info_project', read_views.info_project, name='info_project'),
+    path('info_projects', read_views.info_projects, name='info_projects'),
+    path('list_project', read_views.list_project, name='list_project'),
+    path('search_project', read_views.search_project, name='search_project'),
+    path('search', views.search, name='search'),
+    path('autocomplete', views.autocomplete, name='autocomplete'),
+    path('project_events', async_views.project_events, name='project_events'),
 
     # Condition
     path('create_condition', views.create_condition, name='create_condiotion'),
@@ -27,14 +36,32 @@ urlpatterns = [
     path('create_note', views.create_note, name='create_note'),
     path('delete_note', views.delete_note, name='delete_note'),
     path('edit_note',views.edit_note, name='edit_note'),
+    path('list_note', views.list_note, name='list_note'),
 
     # Dashboard
-    path('dashboard', views.dashboard, name='dashboard'),
+    path('dashboard', read_views.dashboard, name='dashboard'),
     path('delivery_projects', views.delivery_projects, name='delivery_projects'),
+    path('delivery_series', views.delivery_series, name='delivery_series'),
     path('cost', views.cost, name='cost'),
     path('percentage_project_cost', views.percentage_project_cost, name='percentage_project_cost'),
     path('average_project_cost', views.average_project_cost, name='average_project_cost'),
     path('average_time_project', views.average_time_project, name='average_time_project'),
     path('percentage_projects_delivered', views.percentage_projects_delivered, name='percentage_projects_delivered'),
+    path('condition_durations', views.condition_durations, name='condition_durations'),
+
+    # Deletion
+    path('deletion_job', views.deletion_job, name='deletion_job'),
+
+    # Archive
+    path('archived_project', views.archived_project, name='archived_project'),
+
+    # Changes
+    path('changes', views.list_changes, name='changes'),
+
+    # Batch
+    path('batch', views.batch, name='batch'),
+
+    # Database
+    path('database_pool', views.database_pool, name='database_pool'),
     
 ]
@@ -0,0 +1,105 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import DataVersion
+
+# Conjuntos de dados versionados
+PORTFOLIO = 'portfolio'
+CONDITIONS = 'conditions'
+NOTES = 'notes'
+
+
+def bump(*names):
+
+    """
+    Incrementa a versão de cada conjunto de dados em 'names'.
+    """
+
+    for name in names:
+        updated = DataVersion.objects.filter(name=name).update(version=F('version') + 1)
+        if not updated:
+            _, created = DataVersion.objects.get_or_create(name=name, defaults={'version': 1})
+            if not created:
+                DataVersion.objects.filter(name=name).update(version=F('version') + 1)
+
+
+def changed(*names):
+    # Incrementa as versões só após o commit: a linha de DataVersion fica bloqueada
+    # apenas durante o próprio UPDATE, e não pela transação inteira da escrita
+    transaction.on_commit(lambda: bump(*names))
+
+
+def current(name):
+    return DataVersion.objects.filter(name=name).values_list('version', flat=True).first() or 0
+
+
+def current_many(*names):
+    # Versões de vários conjuntos em uma consulta, na ordem de 'names'
+    found = dict(DataVersion.objects.filter(name__in=names).values_list('name', 'version'))
+    return tuple(found.get(name, 0) for name in names)
+
+
+def token(*names):
+    # Versões dos conjuntos em uma string, para compor chaves de cache
+    return '.'.join(map(str, current_many(*names)))
+
+
+async def atoken(*names):
+    found = {name: version async for name, version in DataVersion.objects.filter(name__in=names).values_list('name', 'version')}
+    return '.'.join(str(found.get(name, 0)) for name in names)
+
+
+class VersionedValue:
+
+    """
+    Valor mantido em memória por processo e recarregado quando a versão do
+    conjunto de dados muda no banco.
+
+    A versão é consultada no máximo uma vez a cada 'VERSION_CHECK_INTERVAL'
+    segundos; entre as verificações o valor é servido sem acessar o banco.
+    """
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.value = None
+        self.version = None
+        self.checked_at = float('-inf')
+
+    def get(self):
+        interval = getattr(settings, 'VERSION_CHECK_INTERVAL', 2)
+        if self.version is not None and time.monotonic() - self.checked_at < interval:
+            return self.value
+
+        with self.lock:
+            if self.version is None or time.monotonic() - self.checked_at >= interval:
+                version = current(self.name)
+                if version != self.version:
+                    value = self.loader()
+                    if connection.in_atomic_block:
+                        # Lido dentro de uma transação: pode conter linhas que ainda serão
+                        # desfeitas, então só é guardado depois do commit
+                        transaction.on_commit(lambda: self.store(value, version))
+                        return value
+                    self.store(value, version)
+                else:
+                    self.checked_at = time.monotonic()
+            return self.value
+
+    def store(self, value, version):
+        # Um valor guardado após o commit não substitui outro já mais novo
+        if self.version is not None and version < self.version:
+            return
+        self.value = value
+        self.version = version
+        self.checked_at = time.monotonic()
+
+    def invalidate(self):
+        # Força a verificação da versão no próximo acesso (o relógio monotônico
+        # pode começar perto de zero, então 0.0 não basta)
+        self.checked_at = float('-inf')
@@ -1,10 +1,10 @@
-import jwt
 import json
+import os
 from datetime import datetime
 
 from django.conf import settings
-from django.http import JsonResponse, HttpRequest
-from django.test import RequestFactory
+from django.db import connections, transaction
+from django.http import Http404, HttpRequest, QueryDict
 from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import get_object_or_404
 from django.utils.crypto import get_random_string
@@ -12,20 +12,38 @@ from django.db.models import Count
 from django.db.models.functions import ExtractMonth
 
 from account.models import Credential
-from .models import Project, Client, Condition, Ranking, Note, Information
-
-from modules.mymail.mymail import MyMail
+from .models import Project, Client, Condition, Ranking, Note, Information, DeletionJob, ArchivedProject
+from . import analytics, archive, changes, deletion, documents, hooks, kpis, partial, reference, snapshot
+from .autocomplete import autocomplete as autocomplete_projects
+from .concurrency import (
+    INFORMATION_FIELDS, PROJECT_FIELDS, RANKING_FIELDS, VersionConflict, delete_versioned, parse_version, save_versioned
+)
+from .filters import (
+    MAX_PAGE_SIZE, FilterError, chunked, filter_projects, paginate, parse_date, parse_ids, parse_int, parse_month
+)
+from .reference import get_condition
+from .search import search_projects
+from .serializers import FIELDS, Fieldset, FieldsetError, project_queryset, serialize_project
+
+from modules.fastjson.fastjson import FastJsonResponse
+from modules.idempotency import idempotency
+from modules.replica.replica import read_replica
 
 # Validar Token
 @csrf_exempt
 def validate_token(request):
 
+    # Credencial já validada nesta requisição (ex.: operações do batch)
+    credential = getattr(request, 'credential', None)
+    if credential is not None:
+        return credential
+
     # Carregar token do request
     auth_header = request.headers.get('Authorization')
 
     # Verificar se o token está presente
     if not auth_header:
-        return JsonResponse({'error': 'Token não fornecido'}, status=401)
+        return FastJsonResponse({'error': 'Token não fornecido'}, status=401)
     
     # Validar token
     try:
@@ -35,28 +53,34 @@ def validate_token(request):
         
         # Busca no banco o usuário com esse token
         user = Credential.objects.get(token=token)
+        request.credential = user
         
         # Retornar o user_id se o token for válido
         return user
 
     except Credential.DoesNotExist:
-        return JsonResponse({'error': 'Token inválido'}, status=401)
+        return FastJsonResponse({'error': 'Token inválido'}, status=401)
         
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+# Idempotency-Key nas views de escrita, com o token validado antes de reservar a chave
+def idempotent(view):
+    return idempotency.idempotent(view, authenticate=validate_token)
 
 # Criar novo projeto
 @csrf_exempt
+@idempotent
 def create_project(request):
     # Valida o token e retorna o usuário autenticado ou erro JSON
     user = validate_token(request)
 
-    if isinstance(user, JsonResponse):
+    if isinstance(user, FastJsonResponse):
         return user  # Retorna o erro de autenticação diretamente
 
     # Verifica se a requisição é do tipo POST
     if request.method != 'POST':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Carrega o corpo da requisição como JSON
@@ -76,7 +100,7 @@ def create_project(request):
                 'information': [{'message': 'Este campo é obrigatório.', 'code': 'required'}] if not information_data else [],
                 'timeline': [{'message': 'Este campo é obrigatório.', 'code': 'required'}] if not timeline else [],
             }
-            return JsonResponse({'errors': errors}, status=400)
+            return FastJsonResponse({'errors': errors}, status=400)
 
         # Cria o projeto
         project = Project.objects.create(
@@ -103,6 +127,9 @@ def create_project(request):
                 current_date=datetime.strptime(information_data.get('current_date'), "%d/%m/%Y").date()
             )
 
+            # Alterações registradas no feed
+            log = [changes.upsert(project), changes.upsert(client), changes.upsert(information)]
+
             # Cria os rankings e condições na timeline
             for timeline_item in timeline:
                 ranking_data = timeline_item['ranking']
@@ -114,12 +141,14 @@ def create_project(request):
                 if condition_id == 0:
                     # Se a condição não existir, cria uma nova
                     condition = Condition.objects.create(name=condition_data['name'])
+                    hooks.conditions_changed()
+                    log.append(changes.upsert(condition))
                 else:
-                    # Se a condição existir, busca no banco
-                    condition = Condition.objects.get(pk=condition_id)
+                    # Se a condição existir, busca no mapa de condições em memória
+                    condition = get_condition(condition_id)
 
                 # Cria o ranking
-                Ranking.objects.create(
+                ranking = Ranking.objects.create(
                     project=project,
                     condition=condition,
                     rank=ranking_data['rank'],
@@ -128,32 +157,40 @@ def create_project(request):
                     note=ranking_data.get('note'),
                     description=ranking_data.get('description')
                 )
+                log.append(changes.upsert(ranking))
+
+            changes.record(*log)
+
+            # Atualiza os dados derivados do projeto
+            hooks.projects_changed([project.id])
+            hooks.deliveries_changed([information.delivered_date])
 
             # Retorna mensagem de sucesso
-            return JsonResponse({'message': 'Projeto criado com sucesso'})
+            return FastJsonResponse({'message': 'Projeto criado com sucesso'})
         
         except Exception as e:
             # Exclui o projeto
             project.delete()
             # Retorna erro genérico em caso de exceções
-            return JsonResponse({'error': f'Falha ao criar as etapas do projeto: \n{str(e)}'}, status=400)
+            return FastJsonResponse({'error': f'Falha ao criar as etapas do projeto: \n{str(e)}'}, status=400)
 
     except Exception as e:
         # Retorna erro genérico em caso de exceções
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # Atualizar projeto
 @csrf_exempt
+@idempotent
 def update_project(request):
     # Valida o token e retorna o usuário autenticado ou erro JSON
     user = validate_token(request)
 
-    if isinstance(user, JsonResponse):
+    if isinstance(user, FastJsonResponse):
         return user  # Retorna o erro de autenticação diretamente
 
     # Verifica se a requisição é do tipo PUT
     if request.method != 'PUT':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Carrega o corpo da requisição como JSON
@@ -173,90 +210,283 @@ def update_project(request):
                 'timeline': [{'message': 'Este campo é obrigatório.', 'code': 'required'}] if not timeline else [],
                 'information': [{'message': 'Este campo é obrigatório.', 'code': 'required'}] if not information_data else [],
             }
-            return JsonResponse({'errors': errors}, status=400)
-
-        # Atualiza o projeto
-        project = get_object_or_404(Project, id=project_data['id'])
-        project.name = project_data['name']
-        project.save()
-
-        # Atualiza o cliente
-        client = get_object_or_404(Client, project=project)
-        client.name = client_data['name']
-        client.email = client_data['email']
-        client.save()
-
-        # Atualiza o information
-        information = get_object_or_404(Information, project=project)
-        information.cost_estimate = information_data['cost_estimate']
-        information.current_cost = information_data['current_cost']
-        information.start_date = datetime.strptime(information_data['start_date'], "%d/%m/%Y").date()
-        information.delivered_date = datetime.strptime(information_data['delivered_date'], "%d/%m/%Y").date()
-        information.current_date = datetime.strptime(information_data['current_date'], "%d/%m/%Y").date()
-        information.save()
-
-        # Atualiza ou cria os rankings e condições na timeline
-        for timeline_item in timeline:
-            ranking_data = timeline_item['ranking']
-            condition_data = ranking_data['condition']
-
-            # Verifica os dados da condição e do ranking
-            condition_id = condition_data.get('id', 0)
-            ranking_id = ranking_data.get('id', 0)
-            ranking_delete = ranking_data.get('delete', False)
-
-            # Verifica se a condição já existe ou cria uma nova
-            if condition_id == 0:
-                condition = Condition.objects.create(name=condition_data['name'])
-            else:
-                condition = Condition.objects.get(pk=condition_id)
+            return FastJsonResponse({'errors': errors}, status=400)
 
-            # Se o ranking não existe, cria um novo
-            if ranking_id == 0:
-                Ranking.objects.create(
-                    project=project,
-                    condition=condition,
-                    rank=ranking_data['rank'],
-                    #last_update=ranking_data.get('last_update', None),
-                    last_update=datetime.strptime(ranking_data.get('last_update', None), "%d/%m/%Y").date(),
-                    note=ranking_data['note'],
-                    description=ranking_data.get('description', None)
-                )
-            else:
-                # Se o ranking foi marcado para deletar
-                if ranking_delete:
-                    ranking = get_object_or_404(Ranking, id=ranking_id)
-                    ranking.delete()
+        # Tudo ou nada: uma versão desatualizada desfaz as alterações já feitas
+        with transaction.atomic():
+            # Atualiza o projeto (apenas se ainda estiver na versão enviada)
+            project = get_object_or_404(Project, id=project_data['id'])
+            project.name = project_data['name']
+            save_versioned(project, PROJECT_FIELDS, parse_version(project_data))
+
+            # Atualiza o cliente
+            client = get_object_or_404(Client, project=project)
+            client.name = client_data['name']
+            client.email = client_data['email']
+            client.save()
+
+            # Atualiza o information
+            information = get_object_or_404(Information, project=project)
+            previous_delivered_date = information.delivered_date
+            information.cost_estimate = information_data['cost_estimate']
+            information.current_cost = information_data['current_cost']
+            information.start_date = datetime.strptime(information_data['start_date'], "%d/%m/%Y").date()
+            information.delivered_date = datetime.strptime(information_data['delivered_date'], "%d/%m/%Y").date()
+            information.current_date = datetime.strptime(information_data['current_date'], "%d/%m/%Y").date()
+            save_versioned(information, INFORMATION_FIELDS, parse_version(information_data))
+
+            # Alterações registradas no feed
+            log = [changes.upsert(project), changes.upsert(client), changes.upsert(information)]
+
+            # Atualiza ou cria os rankings e condições na timeline
+            for timeline_item in timeline:
+                ranking_data = timeline_item['ranking']
+                condition_data = ranking_data['condition']
+
+                # Verifica os dados da condição e do ranking
+                condition_id = condition_data.get('id', 0)
+                ranking_id = ranking_data.get('id', 0)
+                ranking_delete = ranking_data.get('delete', False)
+
+                # Verifica se a condição já existe ou cria uma nova
+                if condition_id == 0:
+                    condition = Condition.objects.create(name=condition_data['name'])
+                    hooks.conditions_changed()
+                    log.append(changes.upsert(condition))
+                else:
+                    condition = get_condition(condition_id)
+
+                # Se o ranking não existe, cria um novo
+                if ranking_id == 0:
+                    ranking = Ranking.objects.create(
+                        project=project,
+                        condition=condition,
+                        rank=ranking_data['rank'],
+                        #last_update=ranking_data.get('last_update', None),
+                        last_update=datetime.strptime(ranking_data.get('last_update', None), "%d/%m/%Y").date(),
+                        note=ranking_data['note'],
+                        description=ranking_data.get('description', None)
+                    )
+                    log.append(changes.upsert(ranking))
                 else:
-                    # Atualiza o ranking existente
-                    ranking = get_object_or_404(Ranking, id=ranking_id)
-                    ranking.condition = condition
-                    ranking.rank = ranking_data['rank']
-                    #ranking.last_update = ranking_data['last_update']
-                    ranking.last_update = datetime.strptime(ranking_data['last_update'], "%d/%m/%Y").date()
-                    ranking.note = ranking_data['note']
-                    ranking.description = ranking_data.get('description', None)
-                    ranking.save()
+                    # Se o ranking foi marcado para deletar
+                    if ranking_delete:
+                        ranking = get_object_or_404(Ranking, id=ranking_id)
+                        delete_versioned(ranking, parse_version(ranking_data))
+                        log.append(changes.delete(Ranking, ranking_id, project.id))
+                    else:
+                        # Atualiza o ranking existente
+                        ranking = get_object_or_404(Ranking, id=ranking_id)
+                        ranking.condition = condition
+                        ranking.rank = ranking_data['rank']
+                        #ranking.last_update = ranking_data['last_update']
+                        ranking.last_update = datetime.strptime(ranking_data['last_update'], "%d/%m/%Y").date()
+                        ranking.note = ranking_data['note']
+                        ranking.description = ranking_data.get('description', None)
+                        save_versioned(ranking, RANKING_FIELDS, parse_version(ranking_data))
+                        log.append(changes.upsert(ranking))
+
+            changes.record(*log)
+
+            # Atualiza os dados derivados do projeto
+            hooks.projects_changed([project.id])
+            if information.delivered_date != previous_delivered_date:
+                hooks.deliveries_changed([previous_delivered_date, information.delivered_date])
+
+        # Retorna uma resposta de sucesso com as novas versões
+        return FastJsonResponse({
+            'message': 'Projeto atualizado com sucesso',
+            'version': {'project': project.version, 'information': information.version},
+        }, status=200)
+
+    except VersionConflict as e:
+        # Nada foi gravado; devolve o estado atual para o cliente refazer a edição
+        return version_conflict(project_data['id'], e)
+
+    except ValueError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
 
-        # Retorna uma resposta de sucesso
-        return JsonResponse({'message': 'Projeto atualizado com sucesso'}, status=200)
+    except Exception as e:
+        # Retorna erro genérico em caso de exceções
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+# Atualização parcial do projeto (?id=): apenas os blocos, campos e etapas enviados
+@csrf_exempt
+@idempotent
+def patch_project(request):
+    # Valida o token e retorna o usuário autenticado ou erro JSON
+    user = validate_token(request)
+
+    if isinstance(user, FastJsonResponse):
+        return user  # Retorna o erro de autenticação diretamente
+
+    # Verifica se a requisição é do tipo PATCH
+    if request.method != 'PATCH':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        # Buscar parametros na url
+        project_id = request.GET.get('id')
+        if not project_id:
+            return FastJsonResponse({'error': 'Parâmetro "id" é obrigatório'}, status=400)
+
+        # Carrega o corpo da requisição como JSON
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            return FastJsonResponse({'error': 'O corpo deve ser um objeto JSON'}, status=400)
+
+        project = get_object_or_404(Project, id=project_id)
+        timeline = data.get('timeline') or []
+        if not isinstance(timeline, list):
+            return FastJsonResponse({'errors': {'timeline': partial.error('Deve ser uma lista')}}, status=400)
+
+        # Valida tudo antes de gravar: (instância, campos, versão, ação) de cada linha
+        errors = {}
+        writes = []
+
+        if 'project' in data:
+            try:
+                fields, version = partial.validate('project', project, data['project'])
+                writes.append((project, fields, version, 'update'))
+            except partial.PartialError as e:
+                errors['project'] = e.errors
+
+        if 'client' in data:
+            client = get_object_or_404(Client, project=project)
+            try:
+                fields, version = partial.validate('client', client, data['client'])
+                writes.append((client, fields, version, 'update'))
+            except partial.PartialError as e:
+                errors['client'] = e.errors
+
+        information = None
+        previous_delivered_date = None
+        if 'information' in data:
+            information = get_object_or_404(Information, project=project)
+            previous_delivered_date = information.delivered_date
+            try:
+                fields, version = partial.validate('information', information, data['information'])
+                writes.append((information, fields, version, 'update'))
+            except partial.PartialError as e:
+                errors['information'] = e.errors
+
+        # Ids das etapas enviadas (número ou texto, ex.: "12"); None para novas etapas
+        timeline_errors = {}
+        timeline_ids = {}
+        for index, item in enumerate(timeline):
+            ranking_data = item.get('ranking') if isinstance(item, dict) else None
+            if isinstance(ranking_data, dict) and ranking_data.get('id'):
+                try:
+                    timeline_ids[index] = int(ranking_data['id'])
+                except (TypeError, ValueError):
+                    timeline_errors[str(index)] = {'id': partial.error('Deve ser um número inteiro')}
+
+        # Etapas enviadas, buscadas em uma única consulta
+        ranking_ids = list(timeline_ids.values())
+        rankings = Ranking.objects.filter(project=project, id__in=ranking_ids).in_bulk() if ranking_ids else {}
+
+        for index, item in enumerate(timeline):
+            if str(index) in timeline_errors:
+                continue
+
+            ranking_data = item.get('ranking') if isinstance(item, dict) else None
+            try:
+                if not isinstance(ranking_data, dict):
+                    raise partial.PartialError({'ranking': partial.error('Campo obrigatório', 'required')})
+
+                ranking_id = timeline_ids.get(index)
+                if ranking_id is None:
+                    # Nova etapa: todos os campos obrigatórios do modelo
+                    ranking = Ranking(project=project)
+                    fields, version = partial.validate('ranking', ranking, ranking_data, required=True)
+                    writes.append((ranking, fields, version, 'create'))
+                elif ranking_id not in rankings:
+                    raise partial.PartialError({'id': partial.error('Etapa não encontrada no projeto', 'not_found')})
+                elif ranking_data.get('delete'):
+                    writes.append((rankings[ranking_id], [], partial.parse_version(ranking_data), 'delete'))
+                else:
+                    fields, version = partial.validate('ranking', rankings[ranking_id], ranking_data)
+                    writes.append((rankings[ranking_id], fields, version, 'update'))
+            except partial.PartialError as e:
+                timeline_errors[str(index)] = e.errors
+
+        if timeline_errors:
+            errors['timeline'] = timeline_errors
+        if errors:
+            return FastJsonResponse({'errors': errors}, status=400)
+
+        # Grava apenas os campos enviados, tudo ou nada
+        log = []
+        with transaction.atomic():
+            for instance, fields, version, action in writes:
+                if action == 'create':
+                    instance.save()
+                    log.append(changes.upsert(instance))
+                elif action == 'delete':
+                    delete_versioned(instance, version)
+                    log.append(changes.delete(Ranking, instance.id, project.id))
+                elif isinstance(instance, Client):
+                    if fields:
+                        instance.save(update_fields=[*fields, 'updated_at'])
+                        log.append(changes.upsert(instance))
+                elif fields:
+                    save_versioned(instance, fields, version)
+                    log.append(changes.upsert(instance))
+
+            if log:
+                changes.record(*log)
+                hooks.projects_changed([project.id])
+                if information is not None and information.delivered_date != previous_delivered_date:
+                    hooks.deliveries_changed([previous_delivered_date, information.delivered_date])
+
+        # Retorna uma resposta de sucesso com as versões das linhas gravadas
+        return FastJsonResponse({
+            'message': 'Projeto atualizado com sucesso',
+            'version': {
+                'project': project.version,
+                **({'information': information.version} if information is not None else {}),
+                # Chaves em texto, como no JSON
+                'rankings': {
+                    str(instance.id): instance.version
+                    for instance, _, _, action in writes
+                    if isinstance(instance, Ranking) and action != 'delete'
+                },
+            },
+        }, status=200)
+
+    except VersionConflict as e:
+        # Nada foi gravado; devolve o estado atual para o cliente refazer a edição
+        return version_conflict(project_id, e)
 
     except Exception as e:
         # Retorna erro genérico em caso de exceções
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+# Resposta 409 de uma escrita com versão desatualizada
+def version_conflict(project_id, conflict):
+    fieldset = Fieldset(
+        dict(FIELDS, project=('id', 'name', 'key', 'version')),
+        ('information', 'timeline')
+    )
+    project = project_queryset(Project.objects.filter(id=project_id), fieldset).first()
+    return FastJsonResponse({
+        'error': str(conflict),
+        'current': serialize_project(project, fieldset) if project is not None else None,
+    }, status=409)
 
 # Deletar projeto
 @csrf_exempt
+@idempotent
 def delete_project(request):
     # Valida o token e retorna o usuário autenticado ou erro JSON
     user = validate_token(request)
 
-    if isinstance(user, JsonResponse):
+    if isinstance(user, FastJsonResponse):
         return user  # Retorna o erro de autenticação diretamente
 
     # Verifica se a requisição é do tipo DELETE
     if request.method != 'DELETE':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Obtém o ID do projeto a ser deletado via parâmetros da URL
@@ -264,27 +494,44 @@ def delete_project(request):
 
         # Verifica se o ID foi fornecido
         if not project_id:
-            return JsonResponse({'error': 'Parâmetro "id" é obrigatório'}, status=400)
+            return FastJsonResponse({'error': 'Parâmetro "id" é obrigatório'}, status=400)
 
         # Busca o projeto pelo ID ou retorna 404 se não encontrado
         project = get_object_or_404(Project, id=project_id)
 
+        # Exclusão em segundo plano: desativa o projeto agora e apaga os dados em lotes
+        if request.GET.get('mode') == 'background':
+            job = deletion.schedule(DeletionJob.PROJECT, project)
+            return FastJsonResponse({'message': 'Exclusão do projeto agendada', 'job': deletion.serialize_job(job)}, status=202)
+
+        # Datas de entrega que deixam de ser contadas
+        delivered_dates = list(Information.objects.filter(project=project).values_list('delivered_date', flat=True))
+
         # Deleta o projeto (o Django vai automaticamente deletar os relacionados)
+        project_id = project.id
         project.delete()
 
+        # A exclusão do projeto implica a do cliente, das informações e da timeline
+        changes.record(changes.delete(Project, project_id))
+
+        # Remove os dados derivados do projeto
+        hooks.projects_deleted([project_id], [project.key])
+        hooks.deliveries_changed(delivered_dates)
+
         # Retorna uma resposta de sucesso
-        return JsonResponse({'message': 'Projeto e dados relacionados deletados com sucesso'}, status=200)
+        return FastJsonResponse({'message': 'Projeto e dados relacionados deletados com sucesso'}, status=200)
 
     except Exception as e:
         # Retorna erro genérico em caso de exceções
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # Informações do projeto
 @csrf_exempt
+@read_replica
 def info_project(request):
     # Verifica se a requisição é do tipo GET
     if request.method != 'GET':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Obtém o ID do projeto via parâmetros da URL
@@ -292,237 +539,256 @@ def info_project(request):
 
         # Verifica se o ID foi fornecido
         if not project_id:
-            return JsonResponse({'error': 'Parâmetro "id" é obrigatório'}, status=400)
+            return FastJsonResponse({'error': 'Parâmetro "id" é obrigatório'}, status=400)
 
-        # Busca o projeto pelo ID
-        project = get_object_or_404(Project, id=project_id)
+        # Campos e expansões pedidos (padrão: documento completo)
+        fieldset = Fieldset.from_request(
+            request,
+            project_fields=('id', 'name', 'key', 'version'),
+            include=('information', 'average_time', 'timeline')
+        )
 
-        # Busca o cliente relacionado ao projeto
-        client = get_object_or_404(Client, project=project)
-
-        # Busca as informações adicionais (se existirem)
-        information = Information.objects.filter(project=project).first()
-
-        # Busca todos os rankings do projeto
-        rankings = Ranking.objects.filter(project=project)
-
-        # Cria a timeline com os dados dos rankings
-        timeline = []
-        days = []
-        for ranking in rankings:
-            days.append(ranking.last_update)
-            timeline.append({
-                'ranking': {
-                    'id': ranking.id,
-                    'rank': ranking.rank,
-                    'last_update': (ranking.last_update).strftime("%d/%m/%Y"),
-                    'note': ranking.note,
-                    'description': ranking.description,
-                    'condition': {
-                        'id': ranking.condition.id,
-                        'name': ranking.condition.name
-                    }
-                }
-            })
+        # Busca o projeto pelo ID já com cliente, informações e rankings necessários
+        project = get_object_or_404(project_queryset(Project.objects.all(), fieldset), id=project_id)
 
-        # Calcular a média de dias entre etapas
-        intervals = []
-        for i in range(1, len(days)):
-            diff = (days[i] - days[i - 1]).days
-            intervals.append(diff)
+        # Monta o objeto de resposta com dados do projeto, cliente, informações e timeline
+        return FastJsonResponse(serialize_project(project, fieldset))
 
-        average_days = round(sum(intervals) / len(intervals), 2) if intervals else 0
+    except FieldsetError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
 
-        # Monta o objeto de resposta com dados do projeto, cliente, informações e timeline
-        response_data = {
-            'project': {
-                'id': project.id,
-                'name': project.name,
-                'key': project.key
-            },
-            'client': {
-                'id': client.id,
-                'name': client.name,
-                'email': client.email
-            },
-            'information': {
-                'id': information.id ,
-                'cost_estimate': information.cost_estimate,
-                'current_cost': information.current_cost,
-                'start_date': (information.start_date).strftime("%d/%m/%Y"),
-                'delivered_date': (information.delivered_date).strftime("%d/%m/%Y"),
-                'current_date': (information.current_date).strftime("%d/%m/%Y")
-            },
-            'average_time': {
-                'ranking': average_days
-            },
-            'timeline': timeline
+    except Exception as e:
+        # Retorna erro genérico em caso de exceções
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+# Informações de vários projetos (?ids=1,2,3), com os mesmos documentos do info_project
+@csrf_exempt
+@read_replica
+def info_projects(request):
+    # Verifica se a requisição é do tipo GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        # Obtém os IDs dos projetos via parâmetros da URL
+        ids = parse_ids(request.GET.get('ids', ''))
+
+        # Verifica se os IDs foram fornecidos
+        if not ids:
+            return FastJsonResponse({'error': 'Parâmetro "ids" é obrigatório'}, status=400)
+        if len(ids) > MAX_PAGE_SIZE:
+            return FastJsonResponse({'error': f'Máximo de {MAX_PAGE_SIZE} projetos por requisição'}, status=400)
+
+        # Campos e expansões pedidos (padrão: documento completo)
+        fieldset = Fieldset.from_request(
+            request,
+            project_fields=('id', 'name', 'key', 'version'),
+            include=('information', 'average_time', 'timeline')
+        )
+
+        # Busca todos os projetos com as mesmas consultas de um único info_project
+        projects = {
+            project.id: project
+            for project in project_queryset(Project.objects.filter(id__in=ids), fieldset)
         }
 
-        return JsonResponse(response_data)
+        # Monta os documentos na ordem pedida e informa os ids não encontrados
+        return FastJsonResponse({
+            'results': [serialize_project(projects[project_id], fieldset) for project_id in ids if project_id in projects],
+            'missing': [project_id for project_id in ids if project_id not in projects],
+        })
+
+    except (FieldsetError, FilterError) as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
 
     except Exception as e:
         # Retorna erro genérico em caso de exceções
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # Listar todos os projetos
 @csrf_exempt
+@read_replica
 def list_project(request):
     # Verifica se a requisição é do tipo GET
     if request.method != 'GET':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
-        # Busca todos os projetos
-        projects = Project.objects.filter(status=True)
+        # Portfólio completo servido do snapshot já serializado e comprimido
+        if snapshot.is_default(request):
+            return snapshot.response(request)
+
+        # Campos e expansões pedidos (padrão: documento completo)
+        fieldset = Fieldset.from_request(
+            request,
+            project_fields=('id', 'name', 'key', 'created_at', 'version'),
+            include=('information', 'timeline')
+        )
 
-        # Lista de retorno
-        project_list = []
+        # Aplica os filtros e a ordenação pedidos na URL
+        projects = filter_projects(Project.objects.filter(status=True), request.GET)
 
-        # Itera sobre cada projeto
-        for project in projects:
-            # Busca o cliente relacionado ao projeto
-            client = get_object_or_404(Client, project=project)
+        # Busca os projetos com as relações necessárias pré-carregadas
+        projects = project_queryset(projects, fieldset)
 
-            # Busca as informações adicionais (se existirem)
-            information = Information.objects.filter(project=project).first()
+        # Pagina o resultado quando 'page' ou 'page_size' forem informados
+        projects, page = paginate(projects, request.GET)
 
-            # Busca os rankings do projeto
-            rankings = Ranking.objects.filter(project=project)
-
-            # Monta a timeline com os rankings
-            timeline = []
-            for ranking in rankings:
-                timeline.append({
-                    'ranking': {
-                        'id': ranking.id,
-                        'rank': ranking.rank,
-                        'last_update': (ranking.last_update).strftime("%d/%m/%Y"),
-                        'note': ranking.note,
-                        'description': ranking.description,
-                        'condition': {
-                            'id': ranking.condition.id,
-                            'name': ranking.condition.name
-                        }
-                    }
-                })
-
-            # Monta os dados do projeto
-            project_data = {
-                'project': {
-                    'id': project.id,
-                    'name': project.name,
-                    'key': project.key,
-                    'created_at': project.created_at
-                },
-                'client': {
-                    'id': client.id,
-                    'name': client.name,
-                    'email': client.email
-                },
-                'information': {
-                    'id': information.id,
-                    'cost_estimate': information.cost_estimate,
-                    'current_cost': information.current_cost,
-                    'start_date': (information.start_date).strftime("%d/%m/%Y"),
-                    'delivered_date': (information.delivered_date).strftime("%d/%m/%Y"),
-                    'current_date': (information.current_date).strftime("%d/%m/%Y")
-                },
-                'timeline': timeline
-            }
+        # Monta os dados de cada projeto
+        project_list = [serialize_project(project, fieldset) for project in projects]
 
-            # Adiciona o projeto na lista de resposta
-            project_list.append(project_data)
+        # Resposta paginada
+        if page is not None:
+            return FastJsonResponse({**page, 'results': project_list})
 
         # Retorna todos os projetos encontrados
-        return JsonResponse(project_list, safe=False)
+        return FastJsonResponse(project_list, safe=False)
+
+    except (FieldsetError, FilterError) as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
 
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # Buscar informações do projeto
 @csrf_exempt
+@read_replica
 def search_project(request):
     # Verifica se o método é GET
     if request.method != 'GET':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Buscar o parâmetro na URL
         key = request.GET.get('key', None)
 
-        # Buscar o projeto com base na chave fornecida
-        project = get_object_or_404(Project, key=key)
-
-        # Buscar cliente associado
-        client = get_object_or_404(Client, project=project)
-
-        # Buscar informações adicionais, se existirem
-        information = Information.objects.filter(project=project).first()
-
-        # Buscar rankings associados ao projeto
-        rankings = Ranking.objects.filter(project=project)
-
-        # Construir timeline
-        timeline = []
-        for ranking in rankings:
-            timeline.append({
-                'ranking': {
-                    'id': ranking.id,
-                    'rank': ranking.rank,
-                    'last_update': (ranking.last_update).strftime("%d/%m/%Y"),
-                    'note': ranking.note,
-                    'description': ranking.description,
-                    'condition': {
-                        'id': ranking.condition.id,
-                        'name': ranking.condition.name
-                    }
-                }
-            })
+        # Documento padrão já serializado em cache (apenas a versão é consultada)
+        cached = key and documents.is_default(request)
+        if cached:
+            version, content = documents.get(key)
+            if content is not None:
+                return FastJsonResponse.from_content(content)
+
+        # Campos e expansões pedidos (padrão: documento completo)
+        fieldset = Fieldset.from_request(
+            request,
+            project_fields=('id', 'name', 'key', 'version'),
+            include=('information', 'timeline')
+        )
+
+        # Buscar o projeto com base na chave fornecida, já com as relações necessárias
+        project = get_object_or_404(project_queryset(Project.objects.all(), fieldset), key=key)
 
         # Construir resposta
+        response = FastJsonResponse(serialize_project(project, fieldset))
+        if cached:
+            documents.add(key, version, response.content)
+        return response
+
+    except FieldsetError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+# Busca textual de projetos
+@csrf_exempt
+@read_replica
+def search(request):
+    # Valida o token e retorna o usuário autenticado ou erro JSON
+    user = validate_token(request)
+
+    if isinstance(user, FastJsonResponse):
+        return user  # Retorna o erro de autenticação diretamente
+
+    # Verifica se o método é GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        # Texto buscado
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return FastJsonResponse({'error': 'Parâmetro "q" é obrigatório'}, status=400)
+
+        # Página pedida
+        page = parse_int(request.GET, 'page', default=1)
+        page_size = parse_int(request.GET, 'page_size', default=20, maximum=MAX_PAGE_SIZE)
+
+        # Campos e expansões pedidos (padrão: projeto e cliente)
+        fieldset = Fieldset.from_request(request, project_fields=('id', 'name', 'key'), include=())
+
+        # Busca no índice textual os ids da página, já ordenados por relevância
+        total, results = search_projects(query, offset=(page - 1) * page_size, limit=page_size)
+
+        # Carrega os projetos da página
+        projects = project_queryset(Project.objects.filter(id__in=[project_id for project_id, _ in results]), fieldset)
+        projects = {project.id: project for project in projects}
+
+        # Monta a resposta na ordem do índice
         response_data = {
-            'project': {
-                'id': project.id,
-                'name': project.name,
-                'key': project.key
-            },
-            'client': {
-                'id': client.id,
-                'name': client.name,
-                'email': client.email
-            },
-            'information': {
-                'id': information.id,
-                'cost_estimate': information.cost_estimate,
-                'current_cost': information.current_cost,
-                'start_date': (information.start_date).strftime("%d/%m/%Y"),
-                'delivered_date': (information.delivered_date).strftime("%d/%m/%Y"),
-                'current_date': (information.current_date).strftime("%d/%m/%Y")
-            },
-            'timeline': timeline
+            'count': total,
+            'page': page,
+            'page_size': page_size,
+            'results': [
+                {**serialize_project(projects[project_id], fieldset), 'score': score}
+                for project_id, score in results
+                if project_id in projects
+            ]
         }
 
-        return JsonResponse(response_data)
+        return FastJsonResponse(response_data)
+
+    except (FieldsetError, FilterError) as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+# Autocompletar nomes de projetos e clientes
+@csrf_exempt
+@read_replica
+def autocomplete(request):
+    # Valida o token e retorna o usuário autenticado ou erro JSON
+    user = validate_token(request)
+
+    if isinstance(user, FastJsonResponse):
+        return user  # Retorna o erro de autenticação diretamente
+
+    # Verifica se o método é GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        # Prefixo digitado e quantidade de sugestões
+        prefix = request.GET.get('q', '')
+        limit = parse_int(request.GET, 'limit', default=10, maximum=50)
+
+        # Sugestões servidas pelo índice em memória do processo
+        return FastJsonResponse({'results': autocomplete_projects(prefix, limit)})
+
+    except FilterError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
 
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # --------------------------------------------------------------- CONDITION ---------------------------------------------------------------
 
 # Create Condition
 @csrf_exempt
+@idempotent
 def create_condition(request):
 
     # Valida o token e retorna o usuário autenticado ou erro JSON
     user = validate_token(request)
 
-    if isinstance(user, JsonResponse):
+    if isinstance(user, FastJsonResponse):
         return user  # Retorna o erro de autenticação diretamente
     
     # Verifica se o método é POST
     if request.method != 'POST':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Carregar dados do json
@@ -532,6 +798,8 @@ def create_condition(request):
         condition = Condition.objects.create(
             name=data['name']
         )
+        hooks.conditions_changed()
+        changes.record(changes.upsert(condition))
 
         # Resposta de sucesso
         response_data = {
@@ -542,24 +810,25 @@ def create_condition(request):
             }
         }
 
-        return JsonResponse(response_data, status=201)
+        return FastJsonResponse(response_data, status=201)
 
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # Update Condition
 @csrf_exempt
+@idempotent
 def update_condition(request):
 
     # Valida o token e retorna o usuário autenticado ou erro JSON
     user = validate_token(request)
 
-    if isinstance(user, JsonResponse):
+    if isinstance(user, FastJsonResponse):
         return user  # Retorna o erro de autenticação diretamente
     
     # Verifica se o método é PUT
     if request.method != 'PUT':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Carregar dados do json
@@ -569,9 +838,16 @@ def update_condition(request):
         condition = get_object_or_404(Condition, id=data['id'])
 
         # Atualizar os dados da condição
+        renamed = condition.name != data['name']
         condition.name = data['name']
         condition.status = data['status']
         condition.save()
+        hooks.conditions_changed()
+        changes.record(changes.upsert(condition))
+
+        # O nome da condição aparece nas timelines dos projetos
+        if renamed:
+            hooks.condition_renamed(condition.id)
 
         # Resposta de sucesso
         response_data = {
@@ -583,24 +859,25 @@ def update_condition(request):
             }
         }
 
-        return JsonResponse(response_data, status=200)
+        return FastJsonResponse(response_data, status=200)
 
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # Delete Condition
 @csrf_exempt
+@idempotent
 def delete_condition(request):
 
     # Valida o token e retorna o usuário autenticado ou erro JSON
     user = validate_token(request)
 
-    if isinstance(user, JsonResponse):
+    if isinstance(user, FastJsonResponse):
         return user  # Retorna o erro de autenticação diretamente
     
     # Verifica se o método é DELETE
     if request.method != 'DELETE':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Buscar parametros na url
@@ -609,32 +886,51 @@ def delete_condition(request):
         # Buscar a condição pelo ID
         condition = get_object_or_404(Condition, id=id)
 
+        # Exclusão em segundo plano: desativa a condição agora e apaga as etapas em lotes
+        if request.GET.get('mode') == 'background':
+            job = deletion.schedule(DeletionJob.CONDITION, condition)
+            return FastJsonResponse({'message': 'Exclusão da condição agendada', 'job': deletion.serialize_job(job)}, status=202)
+
+        # Projetos (e etapas) que perdem etapas junto com a condição
+        project_ids = hooks.condition_projects(condition.id)
+        rankings = list(Ranking.objects.filter(condition=condition).values_list('id', 'project_id'))
+
         # Deletar a condição
+        condition_id = condition.id
         condition.delete()
+        hooks.conditions_changed()
+        changes.record(
+            *(changes.delete(Ranking, ranking_id, project_id) for ranking_id, project_id in rankings),
+            changes.delete(Condition, condition_id),
+        )
+
+        # Atualiza os dados derivados dos projetos afetados
+        hooks.projects_changed(project_ids)
 
         # Resposta de sucesso
         response_data = {
             'message': 'Condição deletada com sucesso'
         }
 
-        return JsonResponse(response_data, status=200)
+        return FastJsonResponse(response_data, status=200)
 
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # Desabilitar Condition
 @csrf_exempt
+@idempotent
 def disable_condition(request):
 
     # Valida o token e retorna o usuário autenticado ou erro JSON
     user = validate_token(request)
 
-    if isinstance(user, JsonResponse):
+    if isinstance(user, FastJsonResponse):
         return user  # Retorna o erro de autenticação diretamente
     
     # Verifica se o método é PATCH
     if request.method != 'PATCH':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Buscar parametros na url
@@ -646,30 +942,33 @@ def disable_condition(request):
         # Alterar o status para False
         condition.status = False
         condition.save()
+        hooks.conditions_changed()
+        changes.record(changes.upsert(condition))
 
         # Resposta de sucesso
         response_data = {
             'message': 'Condição desabilitada com sucesso'
         }
 
-        return JsonResponse(response_data, status=200)
+        return FastJsonResponse(response_data, status=200)
 
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # Altera o Status atual da Condition
 @csrf_exempt
+@idempotent
 def toggle_condition(request):
 
     # Valida o token e retorna o usuário autenticado ou erro JSON
     user = validate_token(request)
 
-    if isinstance(user, JsonResponse):
+    if isinstance(user, FastJsonResponse):
         return user  # Retorna o erro de autenticação diretamente
 
     # Verifica se o método é PATCH
     if request.method != 'PATCH':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Buscar parametros na url
@@ -681,6 +980,8 @@ def toggle_condition(request):
         # Alternar o valor do status
         condition.status = not condition.status
         condition.save()
+        hooks.conditions_changed()
+        changes.record(changes.upsert(condition))
 
         # Resposta de sucesso
         response_data = {
@@ -688,27 +989,28 @@ def toggle_condition(request):
             'new_status': condition.status
         }
 
-        return JsonResponse(response_data, status=200)
+        return FastJsonResponse(response_data, status=200)
 
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # List Condition
 @csrf_exempt
+@read_replica
 def list_condition(request):
     # Valida o token e retorna o usuário autenticado ou erro JSON
     user = validate_token(request)
 
-    if isinstance(user, JsonResponse):
+    if isinstance(user, FastJsonResponse):
         return user  # Retorna o erro de autenticação diretamente
     
     # Verifica se o método é GET
     if request.method != 'GET':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
-        # Buscar todas as condições
-        conditions = Condition.objects.all()
+        # Todas as condições, do mapa em memória
+        conditions = reference.conditions.get().values()
 
         # Criar uma lista para armazenar os dados das condições
         condition_list = []
@@ -723,24 +1025,25 @@ def list_condition(request):
             condition_list.append(condition_data)
 
         # Retornar a lista de condições em formato JSON
-        return JsonResponse(condition_list, safe=False)
+        return FastJsonResponse(condition_list, safe=False)
 
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # --------------------------------------------------------------- Note ---------------------------------------------------------------
 
 @csrf_exempt
+@idempotent
 def create_note(request):
     # Valida o token e retorna o usuário autenticado ou erro JSON
     user = validate_token(request)
 
-    if isinstance(user, JsonResponse):
+    if isinstance(user, FastJsonResponse):
         return user  # Retorna o erro de autenticação diretamente
     
     # Verifica se o método é POST
     if request.method != 'POST':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Carregar dados do json
@@ -750,6 +1053,8 @@ def create_note(request):
         note = Note.objects.create(
             name=data['name']
         )
+        hooks.notes_changed()
+        changes.record(changes.upsert(note))
 
         # Resposta de sucesso
         response_data = {
@@ -760,23 +1065,24 @@ def create_note(request):
             }
         }
 
-        return JsonResponse(response_data, status=201)
+        return FastJsonResponse(response_data, status=201)
 
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # Delete Note
 @csrf_exempt
+@idempotent
 def delete_note(request):
     # Valida o token e retorna o usuário autenticado ou erro JSON
     user = validate_token(request)
 
-    if isinstance(user, JsonResponse):
+    if isinstance(user, FastJsonResponse):
         return user  # Retorna o erro de autenticação diretamente
     
     # Verifica se o método é DELETE
     if request.method != 'DELETE':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Carregar dados do json
@@ -786,30 +1092,34 @@ def delete_note(request):
         note = get_object_or_404(Note, id=data['id'])
 
         # Deletar a condição
+        note_id = note.id
         note.delete()
+        hooks.notes_changed()
+        changes.record(changes.delete(Note, note_id))
 
         # Resposta de sucesso
         response_data = {
             'message': 'nota deletada com sucesso!'
         }
 
-        return JsonResponse(response_data, status=200)
+        return FastJsonResponse(response_data, status=200)
 
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # Edit Note
 @csrf_exempt
+@idempotent
 def edit_note(request):
     # Valida o token e retorna o usuário autenticado ou erro JSON
     user = validate_token(request)
 
-    if isinstance(user, JsonResponse):
+    if isinstance(user, FastJsonResponse):
         return user  # Retorna o erro de autenticação diretamente
     
     # Verifica se o método é PUT
     if request.method != 'PUT':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Carregar dados do json
@@ -821,67 +1131,82 @@ def edit_note(request):
         note.name = newNote
         # Editar a condição
         note.save()
+        hooks.notes_changed()
+        changes.record(changes.upsert(note))
 
         # Resposta de sucesso
         response_data = {
             'message': 'nota editada com sucesso!'
         }
 
-        return JsonResponse(response_data, status=200)
+        return FastJsonResponse(response_data, status=200)
 
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+# List Note
+@csrf_exempt
+@read_replica
+def list_note(request):
+    # Valida o token e retorna o usuário autenticado ou erro JSON
+    user = validate_token(request)
+
+    if isinstance(user, FastJsonResponse):
+        return user  # Retorna o erro de autenticação diretamente
+
+    # Verifica se o método é GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        # Todas as notas, do mapa em memória
+        note_list = [
+            {
+                'id': note.id,
+                'name': note.name,
+                'status': note.status
+            }
+            for note in reference.notes.get().values()
+        ]
+
+        return FastJsonResponse(note_list, safe=False)
+
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # --------------------------------------------------------------- DASHBOARD ---------------------------------------------------------------
 
 # Chamar todos os dashboards
 @csrf_exempt
+@read_replica
 def dashboard(request):
     # Verifica se a requisição é do tipo POST
     if request.method != 'POST':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Carregar dados do json
         data = json.loads(request.body.decode('utf-8'))
 
-        # Função auxiliar para simular request POST com body específico
-        def make_request_for(view_func, partial_data):
-            req = RequestFactory().get('/')
-            req._body = json.dumps(partial_data).encode('utf-8')
-            return json.loads(view_func(req).content)
-
-        # Chama cada função com o corpo adequado
-        result_delivery_projects = make_request_for(delivery_projects, {'delivery_projects': data.get('delivery_projects', {})})
-        result_cost = make_request_for(cost, {'cost': data.get('cost', {})})
-        result_percentage_project_cost = make_request_for(percentage_project_cost, {'cost': data.get('cost', {})})
-        result_average_project_cost = make_request_for(average_project_cost, {'cost': data.get('cost', {})})
-        result_average_time_project = make_request_for(average_time_project, {'cost': data.get('cost', {})})
-        result_percentage_projects_delivered = make_request_for(percentage_projects_delivered, {'delivery_projects': data.get('delivery_projects', {})})
-    
-        # Monta o objeto de resposta com dados do projeto
-        response_data = {
-            'title': 'Dashboard',
-            'delivery_projects': result_delivery_projects,
-            'cost': result_cost,
-            'percentage_project_cost': result_percentage_project_cost,
-            'average_project_cost': result_average_project_cost,
-            'average_time_project': result_average_time_project,
-            'percentage_projects_delivered': result_percentage_projects_delivered
-        }
+        # Indicadores calculados com agregações no banco (mesmo código da view assíncrona)
+        response_data = kpis.dashboard(data)
+
+        return FastJsonResponse(response_data)
 
-        return JsonResponse(response_data)
+    except FilterError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
 
     except Exception as e:
         # Retorna erro genérico em caso de exceções
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # Projetos entregues
 @csrf_exempt
+@read_replica
 def delivery_projects(request):
     # Verifica se a requisição é do tipo GET
     if request.method != 'GET':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Carregar dados do json
@@ -906,38 +1231,94 @@ def delivery_projects(request):
             ]
         }
 
-        return JsonResponse(response_data)
+        return FastJsonResponse(response_data)
+
+    except Exception as e:
+        # Retorna erro genérico em caso de exceções
+        return FastJsonResponse({'error': str(e)}, status=500)
+    
+# Série histórica de projetos entregues por mês
+@csrf_exempt
+@read_replica
+def delivery_series(request):
+    # Verifica se a requisição é do tipo GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        # Período pedido: um ano inteiro ou um intervalo de meses (mm/aaaa)
+        year = parse_int(request.GET, 'year')
+        if year:
+            start, end = (year, 1), (year, 12)
+        else:
+            start = parse_month(request.GET, 'start')
+            end = parse_month(request.GET, 'end')
+            if not start or not end:
+                return FastJsonResponse({'error': 'Informe "year" ou "start" e "end" (mm/aaaa)'}, status=400)
+
+        if start > end:
+            return FastJsonResponse({'error': 'O início do período deve ser anterior ao fim'}, status=400)
+
+        months = (end[0] - start[0]) * 12 + end[1] - start[1] + 1
+        if months > settings.DELIVERY_SERIES_MAX_MONTHS:
+            return FastJsonResponse({'error': f'Período máximo de {settings.DELIVERY_SERIES_MAX_MONTHS} meses'}, status=400)
+
+        # Monta o objeto de resposta com a contagem de cada mês
+        response_data = {
+            'title': 'Projetos entregues',
+            'data': analytics.delivery_series(start, end)
+        }
+
+        return FastJsonResponse(response_data)
+
+    except FilterError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
 
     except Exception as e:
         # Retorna erro genérico em caso de exceções
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
     
 # Custo estimado x real
 @csrf_exempt
+@read_replica
 def cost(request):
     # Verifica se a requisição é do tipo GET
     if request.method != 'GET':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
-        # Carregar dados do json
-        data = json.loads(request.body.decode('utf-8'))
+        # Ids via URL (?ids=1,2,3) ou no corpo json ({"cost": {"id": [...]}})
+        if 'ids' in request.GET:
+            ids = parse_ids(request.GET['ids'])
+        else:
+            data = json.loads(request.body.decode('utf-8') or '{}')
+            ids = parse_ids((data.get('cost') or {}).get('id', []))
+
+        # Busca informações e projetos juntos, em lotes de ids
+        informations = {}
+        for chunk in chunked(ids):
+            rows = (
+                Information.objects.filter(project_id__in=chunk)
+                .select_related('project')
+                .only('cost_estimate', 'current_cost', 'project__id', 'project__name', 'project__key')
+                .order_by('id')
+            )
+            for information in rows:
+                # Mantém a primeira informação de cada projeto
+                informations.setdefault(information.project_id, information)
 
-        # Buscar ids
+        # Monta os custos na ordem pedida
         costs = []
-        for id_count in data['cost']['id']:
-
-            # Busca o projeto pelo ID
-            project = get_object_or_404(Project, id=id_count)
-
-            # Busca as informações adicionais (se existirem)
-            information = Information.objects.filter(project=project).first()
+        for project_id in ids:
+            information = informations.get(project_id)
+            if information is None:
+                continue
 
             costs.append({
                 'project': {
-                    'id': project.id,
-                    'name': project.name,
-                    'key': project.key
+                    'id': information.project.id,
+                    'name': information.project.name,
+                    'key': information.project.key
                 },
                 'information':{
                     'cost_estimate': information.cost_estimate,
@@ -945,24 +1326,29 @@ def cost(request):
                 }
             })
         
-        # Monta o objeto de resposta com dados do projeto
+        # Monta o objeto de resposta com dados do projeto e os ids não encontrados
         response_data = {
             'title': 'Estimado x Custo',
-            'data': costs
+            'data': costs,
+            'missing': [project_id for project_id in ids if project_id not in informations]
         }
 
-        return JsonResponse(response_data)
+        return FastJsonResponse(response_data)
+
+    except FilterError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
 
     except Exception as e:
         # Retorna erro genérico em caso de exceções
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
     
 # Projetos dentro do prazo
 @csrf_exempt
+@read_replica
 def percentage_project_cost(request):
     # Verifica se a requisição é do tipo GET
     if request.method != 'GET':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Busca todos os projetos
@@ -994,18 +1380,19 @@ def percentage_project_cost(request):
             'value': percentage
         }
 
-        return JsonResponse(response_data)
+        return FastJsonResponse(response_data)
 
     except Exception as e:
         # Retorna erro genérico em caso de exceções
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
     
 # Custo médio de um projeto
 @csrf_exempt
+@read_replica
 def average_project_cost(request):
     # Verifica se a requisição é do tipo GET
     if request.method != 'GET':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Busca todos os projetos
@@ -1037,18 +1424,19 @@ def average_project_cost(request):
             }
         }
 
-        return JsonResponse(response_data)
+        return FastJsonResponse(response_data)
 
     except Exception as e:
         # Retorna erro genérico em caso de exceções
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
     
 # Tempo médio para finalizar projeto
 @csrf_exempt
+@read_replica
 def average_time_project(request):
     # Verifica se a requisição é do tipo GET
     if request.method != 'GET':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Busca todos os projetos
@@ -1080,18 +1468,19 @@ def average_time_project(request):
             }
         }
 
-        return JsonResponse(response_data)
+        return FastJsonResponse(response_data)
 
     except Exception as e:
         # Retorna erro genérico em caso de exceções
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
     
 # Porcentagem de projetos entregues
 @csrf_exempt
+@read_replica
 def percentage_projects_delivered(request):
     # Verifica se a requisição é do tipo GET
     if request.method != 'GET':
-        return JsonResponse({'error': 'Método não permitido'}, status=405)
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
 
     try:
         # Busca todos os projetos
@@ -1125,21 +1514,50 @@ def percentage_projects_delivered(request):
             'value': round(percentage, 2)
         }
 
-        return JsonResponse(response_data)
+        return FastJsonResponse(response_data)
+
+    except Exception as e:
+        # Retorna erro genérico em caso de exceções
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+# Tempo de permanência dos projetos em cada condição
+@csrf_exempt
+@read_replica
+def condition_durations(request):
+    # Verifica se a requisição é do tipo GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        # Período opcional (dd/mm/aaaa)
+        date_from = parse_date(request.GET, 'date_from')
+        date_to = parse_date(request.GET, 'date_to')
+
+        # Monta o objeto de resposta com as estatísticas de cada condição
+        response_data = {
+            'title': 'Tempo por condição',
+            'data': analytics.condition_durations(date_from, date_to)
+        }
+
+        return FastJsonResponse(response_data)
+
+    except FilterError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
 
     except Exception as e:
         # Retorna erro genérico em caso de exceções
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 # --------------------------------------------------------------- MAIL ---------------------------------------------------------------
 
 # Send Mail
 @csrf_exempt
+@idempotent
 def send_mail(request):
     # Valida o token e retorna o usuário autenticado ou erro JSON
     user = validate_token(request)
 
-    if isinstance(user, JsonResponse):
+    if isinstance(user, FastJsonResponse):
         return user  # Retorna o erro de autenticação diretamente
     
     # Verificar se o método é POST
@@ -1157,18 +1575,252 @@ def send_mail(request):
             subject = data['subject']
             body = data['body']
 
-            # Criar instância do MyMail e enviar e-mail
+            # Criar instância do MyMail e enviar e-mail (carregado apenas quando usado)
+            from modules.mymail.mymail import MyMail
             mailer = MyMail()
             result = mailer.mail(type, login, password, recipient, subject, body)
 
             if result['status']:
-                return JsonResponse({'message': 'E-mail enviado com sucesso!'}, status=200)
+                return FastJsonResponse({'message': 'E-mail enviado com sucesso!'}, status=200)
             
             else:
                 # Retorna o erro do MyMail
-                return JsonResponse({'error': result.get('error', 'Falha ao enviar o e-mail.')}, status=500)
+                return FastJsonResponse({'error': result.get('error', 'Falha ao enviar o e-mail.')}, status=500)
 
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
+
+    return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+# --------------------------------------------------------------- DELETION ---------------------------------------------------------------
+
+# Progresso de uma exclusão em segundo plano
+@csrf_exempt
+def deletion_job(request):
+    # Valida o token e retorna o usuário autenticado ou erro JSON
+    user = validate_token(request)
+
+    if isinstance(user, FastJsonResponse):
+        return user  # Retorna o erro de autenticação diretamente
+
+    # Verifica se o método é GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        # Obtém o ID do job via parâmetros da URL
+        job_id = request.GET.get('id')
+
+        # Verifica se o ID foi fornecido
+        if not job_id:
+            return FastJsonResponse({'error': 'Parâmetro "id" é obrigatório'}, status=400)
+
+        job = get_object_or_404(DeletionJob, id=job_id)
+
+        return FastJsonResponse(deletion.serialize_job(job))
+
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
 
-    return JsonResponse({'error': 'Método não permitido'}, status=405)
+# --------------------------------------------------------------- ARCHIVE ---------------------------------------------------------------
+
+# Projeto arquivado, pelo id original ou pela chave
+@csrf_exempt
+@read_replica
+def archived_project(request):
+    # Valida o token e retorna o usuário autenticado ou erro JSON
+    user = validate_token(request)
+
+    if isinstance(user, FastJsonResponse):
+        return user  # Retorna o erro de autenticação diretamente
+
+    # Verifica se o método é GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        project_id = request.GET.get('id')
+        key = request.GET.get('key')
+
+        # Verifica se o ID ou a chave foram fornecidos
+        if not project_id and not key:
+            return FastJsonResponse({'error': 'Parâmetro "id" ou "key" é obrigatório'}, status=400)
+
+        lookup = {'project_id': project_id} if project_id else {'key': key}
+        archived = ArchivedProject.objects.filter(**lookup).first()
+        if archived is None:
+            return FastJsonResponse({'error': 'Projeto arquivado não encontrado'}, status=404)
+
+        return FastJsonResponse(archive.serialize_archived(archived))
+
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+# --------------------------------------------------------------- CHANGES ---------------------------------------------------------------
+
+# Alterações posteriores ao cursor 'since' (id da última alteração recebida)
+@csrf_exempt
+def list_changes(request):
+    # Valida o token e retorna o usuário autenticado ou erro JSON
+    user = validate_token(request)
+
+    if isinstance(user, FastJsonResponse):
+        return user  # Retorna o erro de autenticação diretamente
+
+    # Verifica se o método é GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        since = parse_int(request.GET, 'since', default=0, minimum=0)
+        limit = parse_int(request.GET, 'limit', default=500, maximum=1000)
+
+        return FastJsonResponse(changes.feed(since, limit))
+
+    except FilterError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+# --------------------------------------------------------------- BATCH ---------------------------------------------------------------
+
+# Operações aceitas pelo batch: view e método HTTP, com os mesmos parâmetros e corpo da view
+BATCH_OPERATIONS = {
+    'create_project': (create_project, 'POST'),
+    'update_project': (update_project, 'PUT'),
+    'patch_project': (patch_project, 'PATCH'),
+    'delete_project': (delete_project, 'DELETE'),
+    'create_condition': (create_condition, 'POST'),
+    'update_condition': (update_condition, 'PUT'),
+    'delete_condition': (delete_condition, 'DELETE'),
+    'disable_condition': (disable_condition, 'PATCH'),
+    'toggle_condition': (toggle_condition, 'PATCH'),
+    'create_note': (create_note, 'POST'),
+    'edit_note': (edit_note, 'PUT'),
+    'delete_note': (delete_note, 'DELETE'),
+}
+
+
+class BatchOperationFailed(Exception):
+    # Desfaz o savepoint (ou a transação inteira) de uma operação com erro
+    def __init__(self, response):
+        self.response = response
+
+
+def run_batch_operation(request, operation):
+    # Monta a requisição da operação com a credencial já validada e chama a view
+    view, method = BATCH_OPERATIONS[operation['op']]
+
+    sub_request = HttpRequest()
+    sub_request.method = method
+    sub_request.path = request.path
+    sub_request.META = {**request.META, 'REQUEST_METHOD': method, 'CONTENT_TYPE': 'application/json'}
+    # A idempotência vale para o batch inteiro, não para cada operação
+    sub_request.META.pop('HTTP_IDEMPOTENCY_KEY', None)
+    params = QueryDict(mutable=True)
+    for name, value in (operation.get('params') or {}).items():
+        params[name] = str(value)
+    sub_request.GET = params
+    sub_request._body = json.dumps(operation.get('body') or {}).encode('utf-8')
+    sub_request.credential = request.credential
+
+    try:
+        response = view(sub_request)
+    except Http404 as e:
+        response = FastJsonResponse({'error': str(e)}, status=404)
+
+    if response.status_code >= 400:
+        raise BatchOperationFailed(response)
+    return response
+
+
+# Executa uma lista ordenada de operações de escrita em uma única transação
+@csrf_exempt
+@idempotent
+def batch(request):
+    # Valida o token e retorna o usuário autenticado ou erro JSON
+    user = validate_token(request)
+
+    if isinstance(user, FastJsonResponse):
+        return user  # Retorna o erro de autenticação diretamente
+
+    # Verifica se a requisição é do tipo POST
+    if request.method != 'POST':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        # Carrega o corpo da requisição como JSON
+        data = json.loads(request.body)
+        operations = data.get('operations')
+
+        # Verifica a lista de operações
+        if not isinstance(operations, list) or not operations:
+            return FastJsonResponse({'error': 'Campo "operations" deve ser uma lista não vazia'}, status=400)
+        if len(operations) > settings.BATCH_MAX_OPERATIONS:
+            return FastJsonResponse(
+                {'error': f'Máximo de {settings.BATCH_MAX_OPERATIONS} operações por batch'}, status=400
+            )
+        for index, operation in enumerate(operations):
+            if not isinstance(operation, dict) or operation.get('op') not in BATCH_OPERATIONS:
+                return FastJsonResponse({'error': f'Operação inválida na posição {index}'}, status=400)
+
+        results = []
+        try:
+            with transaction.atomic():
+                for index, operation in enumerate(operations):
+                    result = {'index': index, 'op': operation['op']}
+                    results.append(result)
+
+                    # Com 'savepoint', o erro desfaz apenas a operação e o batch continua
+                    if operation.get('savepoint'):
+                        try:
+                            with transaction.atomic():
+                                response = run_batch_operation(request, operation)
+                        except BatchOperationFailed as e:
+                            response = e.response
+                    else:
+                        try:
+                            response = run_batch_operation(request, operation)
+                        except BatchOperationFailed as e:
+                            result.update(status=e.response.status_code, body=json.loads(e.response.content))
+                            raise
+
+                    result.update(status=response.status_code, body=json.loads(response.content))
+
+        except BatchOperationFailed as e:
+            # Nenhuma operação é gravada; as posteriores à que falhou não são executadas
+            return FastJsonResponse({'committed': False, 'results': results}, status=e.response.status_code)
+
+        return FastJsonResponse({'committed': True, 'results': results})
+
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+# --------------------------------------------------------------- DATABASE ---------------------------------------------------------------
+
+# Estatísticas do pool de conexões do processo que atendeu a requisição
+@csrf_exempt
+def database_pool(request):
+    # Valida o token e retorna o usuário autenticado ou erro JSON
+    user = validate_token(request)
+
+    if isinstance(user, FastJsonResponse):
+        return user  # Retorna o erro de autenticação diretamente
+
+    # Verifica se o método é GET
+    if request.method != 'GET':
+        return FastJsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        pools = {}
+
+        # O backend com pool só é carregado quando configurado (DATABASE_POOL=true)
+        if any(connections.settings[alias]['ENGINE'] == 'modules.mysqlpool' for alias in connections):
+            from modules.mysqlpool.base import pool_stats
+            pools = pool_stats()
+
+        return FastJsonResponse({'pid': os.getpid(), 'pools': pools})
+
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
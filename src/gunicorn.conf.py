@@ -0,0 +1,20 @@
+"""
+Configuração do gunicorn, lida automaticamente ao iniciar a partir de 'src/':
+
+    gunicorn src.wsgi
+
+Workers e porta seguem as variáveis WEB_CONCURRENCY e PORT, já lidas pelo gunicorn.
+"""
+
+import os
+
+# Carrega a aplicação (settings, apps, rotas e views) uma vez no processo principal,
+# antes do fork: os workers reciclados já nascem com o interpretador aquecido
+preload_app = os.getenv("GUNICORN_PRELOAD", "True").lower() == "true"
+
+
+def pre_fork(server, worker):
+    # Conexões abertas no processo principal não podem ser compartilhadas pelos workers
+    if preload_app:
+        from django.db import connections
+        connections.close_all()
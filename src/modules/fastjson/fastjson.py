@@ -0,0 +1,70 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+
+# O orjson é opcional: quando não estiver instalado usamos o json da biblioteca padrão
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+
+def dumps(data, encoder=DjangoJSONEncoder, json_dumps_params=None):
+
+    """
+    Serializa 'data' para bytes JSON usando o codificador mais rápido disponível.
+
+    Datas, datetimes, Decimals e demais tipos especiais são convertidos pelo
+    'encoder' (por padrão o DjangoJSONEncoder), produzindo os mesmos valores que o
+    JsonResponse do Django.
+
+    Args:
+        data: Objeto a ser serializado.
+        encoder (type, opcional): Classe de encoder usada para os tipos não nativos.
+            Padrão é 'DjangoJSONEncoder'.
+        json_dumps_params (dict, opcional): Parâmetros extras do json.dumps. Quando
+            informados, a serialização é feita sempre pela biblioteca padrão.
+    """
+
+    if orjson is not None and not json_dumps_params:
+        try:
+            # OPT_PASSTHROUGH_DATETIME delega datas ao encoder, mantendo o formato do Django
+            return orjson.dumps(
+                data,
+                default=encoder().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            # Casos que o orjson não suporta (chaves não string, inteiros enormes...)
+            pass
+
+    return json.dumps(data, cls=encoder, **(json_dumps_params or {})).encode('utf-8')
+
+
+class FastJsonResponse(JsonResponse):
+
+    """
+    Substituto direto do JsonResponse que serializa com o orjson quando disponível.
+
+    Aceita os mesmos argumentos do JsonResponse e continua sendo uma instância dele,
+    então verificações como 'isinstance(resposta, JsonResponse)' seguem funcionando.
+    """
+
+    def __init__(self, data, encoder=DjangoJSONEncoder, safe=True, json_dumps_params=None, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        # Pula o __init__ do JsonResponse, que serializaria novamente com o json padrão
+        HttpResponse.__init__(self, content=dumps(data, encoder, json_dumps_params), **kwargs)
+
+    @classmethod
+    def from_content(cls, content, **kwargs):
+        # Resposta com um JSON já serializado (ex.: guardado em cache), sem serializar de novo
+        response = cls.__new__(cls)
+        kwargs.setdefault('content_type', 'application/json')
+        HttpResponse.__init__(response, content=content, **kwargs)
+        return response
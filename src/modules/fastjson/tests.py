@@ -0,0 +1,45 @@
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from django.http import JsonResponse
+from django.test import SimpleTestCase
+
+from .fastjson import FastJsonResponse, dumps
+
+
+class FastJsonResponseTestCase(SimpleTestCase):
+
+    def test_matches_django_json_response(self):
+        data = {
+            'created_at': datetime(2025, 4, 24, 19, 53, 1, 123456, tzinfo=timezone.utc),
+            'start_date': date(2025, 4, 20),
+            'cost': Decimal('10.50'),
+            'name': 'Aprovação',
+            'values': [1, 2.5, None, True],
+        }
+
+        response = FastJsonResponse(data)
+
+        self.assertIsInstance(response, JsonResponse)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content), json.loads(JsonResponse(data).content))
+
+    def test_safe_requires_dict(self):
+        with self.assertRaises(TypeError):
+            FastJsonResponse([1, 2, 3])
+
+        response = FastJsonResponse([1, 2, 3], safe=False)
+        self.assertEqual(json.loads(response.content), [1, 2, 3])
+
+    def test_falls_back_for_unsupported_values(self):
+        # Chaves inteiras não são aceitas pelo orjson sem opções extras
+        self.assertEqual(json.loads(dumps({1: 'a'})), {'1': 'a'})
+
+    def test_from_content(self):
+        response = FastJsonResponse.from_content(b'{"a": 1}', status=201)
+
+        self.assertIsInstance(response, JsonResponse)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, b'{"a": 1}')
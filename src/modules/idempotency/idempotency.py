@@ -0,0 +1,159 @@
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+# Cabeçalho 'Idempotency-Key' nas views de escrita (@idempotent).
+#
+# A primeira requisição com uma chave reserva uma linha de IdempotencyKey (chave
+# única, por credencial e chave), executa a view e guarda a resposta na mesma linha
+# por IDEMPOTENCY_TTL segundos. Repetições recebem a resposta guardada sem executar a
+# view de novo, em qualquer processo; repetições concorrentes recebem 409 enquanto a
+# primeira não termina, sem prender o worker esperando.
+
+HEADER = 'Idempotency-Key'
+
+# Tamanho máximo aceito para a chave enviada
+MAX_KEY_LENGTH = 255
+
+# Respostas que não são guardadas: a repetição executa a view de novo
+UNAUTHORIZED = (401, 403)
+
+
+def cache_key(request, key):
+    # Hash do token e da chave, sem guardar nenhum dos dois no banco
+    credential = request.headers.get('Authorization', '')
+    return hashlib.sha256(f'{credential}\n{key}'.encode('utf-8')).hexdigest()
+
+
+def fingerprint(request):
+    # Mesma chave só vale para a mesma operação (método, rota, parâmetros e corpo)
+    digest = hashlib.sha256()
+    for part in (request.method, request.path, request.META.get('QUERY_STRING', '')):
+        digest.update(part.encode('utf-8') + b'\n')
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def replay(entry, key):
+    response = HttpResponse(bytes(entry.content), status=entry.status, content_type=entry.content_type)
+    response[HEADER] = key
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def reserve(entry_key, current, key):
+
+    """
+    Reserva a chave para esta requisição.
+
+    Returns:
+        HttpResponse: Resposta para a repetição (guardada, 409 ou 422), ou None
+        quando a reserva foi feita e a view deve ser executada.
+    """
+
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(key=entry_key, fingerprint=current, expires_at=expires_at)
+        return None
+    except IntegrityError:
+        pass
+
+    entry = IdempotencyKey.objects.filter(key=entry_key).first()
+    if entry is None or entry.expires_at <= now:
+        # Resposta expirada, reserva abandonada ou removida após uma falha: assume a
+        # chave com um UPDATE condicional, para que apenas uma repetição a execute
+        queryset = IdempotencyKey.objects.filter(key=entry_key)
+        if entry is not None:
+            queryset = queryset.filter(expires_at=entry.expires_at)
+        taken = queryset.update(
+            fingerprint=current, state=IdempotencyKey.RUNNING, status=None, content=None,
+            content_type='', expires_at=expires_at,
+        )
+        if taken:
+            return None
+        return error(f'Requisição com a mesma {HEADER} ainda em andamento', 409)
+
+    if entry.fingerprint != current:
+        return error(f'{HEADER} já usada em outra requisição', 422)
+    if entry.state == IdempotencyKey.DONE:
+        return replay(entry, key)
+    return error(f'Requisição com a mesma {HEADER} ainda em andamento', 409)
+
+
+def idempotent(view=None, *, authenticate=None):
+
+    """
+    Torna a view de escrita idempotente para requisições com 'Idempotency-Key'.
+
+    Com 'authenticate', a credencial é validada antes da reserva; a resposta de
+    erro que ele devolver é enviada sem tocar na chave. Respostas 401, 403 e 5xx
+    não são guardadas: a repetição executa a view de novo. Reusar a chave com
+    outra operação devolve 422.
+    """
+
+    if view is None:
+        return lambda view: idempotent(view, authenticate=authenticate)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return error(f'Cabeçalho {HEADER} deve ter no máximo {MAX_KEY_LENGTH} caracteres', 400)
+
+        if authenticate is not None:
+            credential = authenticate(request)
+            if isinstance(credential, HttpResponse):
+                return credential
+
+        entry_key = cache_key(request, key)
+        current = fingerprint(request)
+
+        response = reserve(entry_key, current, key)
+        if response is not None:
+            return response
+
+        running = IdempotencyKey.objects.filter(key=entry_key, state=IdempotencyKey.RUNNING)
+        try:
+            response = view(request, *args, **kwargs)
+        except BaseException:
+            running.delete()
+            raise
+
+        status = response.status_code
+        if status >= 500 or status in UNAUTHORIZED or getattr(response, 'streaming', False):
+            running.delete()
+        else:
+            running.update(
+                state=IdempotencyKey.DONE,
+                status=status,
+                content=response.content,
+                content_type=response['Content-Type'],
+                expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_TTL),
+            )
+
+        response[HEADER] = key
+        return response
+
+    return wrapper
+
+
+def prune():
+    # Remove as respostas e reservas expiradas; devolve a quantidade removida
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from modules.idempotency import idempotency
+
+
+# Remove as Idempotency-Key expiradas
+class Command(BaseCommand):
+    help = 'Remove as respostas guardadas e as reservas de Idempotency-Key já expiradas'
+
+    def handle(self, *args, **options):
+        deleted = idempotency.prune()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} chaves removidas'))
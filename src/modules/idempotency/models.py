@@ -0,0 +1,24 @@
+from django.db import models
+
+# Reserva e resposta guardada de uma Idempotency-Key, por credencial e chave
+class IdempotencyKey(models.Model):
+    RUNNING = 'running'
+    DONE = 'done'
+    STATES = [(RUNNING, 'Em andamento'), (DONE, 'Concluída')]
+
+    # Hash da credencial e da chave (a restrição única serializa as repetições concorrentes)
+    key = models.CharField(max_length=64, unique=True)
+    fingerprint = models.CharField(max_length=64)
+    state = models.CharField(max_length=10, choices=STATES, default=RUNNING)
+    status = models.PositiveSmallIntegerField(null=True, blank=True)
+    content = models.BinaryField(null=True, blank=True)
+    content_type = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Reserva: prazo para um processo que caiu no meio da requisição; resposta: fim do TTL
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Remoção das chaves expiradas
+            models.Index(fields=['expires_at']),
+        ]
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.http import JsonResponse
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from . import idempotency
+from .idempotency import idempotent
+from .models import IdempotencyKey
+
+
+class IdempotencyTestCase(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.calls = 0
+
+        @idempotent
+        def view(request):
+            self.calls += 1
+            return JsonResponse({'call': self.calls}, status=201)
+
+        self.view = view
+
+    def post(self, key='chave-1', body='{"name": "Ponte"}', token='token123'):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        if key:
+            headers['HTTP_IDEMPOTENCY_KEY'] = key
+        return self.factory.post('/create_project', data=body, content_type='application/json', **headers)
+
+    def reserve(self, request, **fields):
+        # Reserva feita por outro processo
+        return IdempotencyKey.objects.create(
+            key=idempotency.cache_key(request, 'chave-1'), fingerprint=idempotency.fingerprint(request),
+            expires_at=timezone.now() + timedelta(seconds=60), **fields)
+
+    def test_replay_returns_stored_response(self):
+        first = self.view(self.post())
+        second = self.view(self.post())
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual((second.status_code, second.content), (201, first.content))
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+
+    def test_keys_are_scoped_by_credential(self):
+        self.view(self.post())
+        self.view(self.post(token='outro'))
+        self.view(self.post(key=None))
+        self.assertEqual(self.calls, 3)
+
+    def test_reused_key_with_other_body(self):
+        self.view(self.post())
+        response = self.view(self.post(body='{"name": "Viaduto"}'))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.calls, 1)
+
+    def test_server_errors_are_not_stored(self):
+        @idempotent
+        def failing(request):
+            self.calls += 1
+            return JsonResponse({'error': 'falha'}, status=500)
+
+        failing(self.post())
+        failing(self.post())
+        self.assertEqual(self.calls, 2)
+
+    def test_authentication_runs_before_reservation(self):
+        def authenticate(request):
+            if request.headers['Authorization'] != 'Bearer token123':
+                return JsonResponse({'error': 'Token inválido'}, status=401)
+
+        view = idempotent(authenticate=authenticate)(self.view.__wrapped__)
+
+        response = view(self.post(token='errado'))
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        response = view(self.post())
+        self.assertEqual((response.status_code, self.calls), (201, 1))
+
+    def test_in_flight_duplicate_is_rejected_without_waiting(self):
+        self.reserve(self.post())
+
+        response = self.view(self.post())
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.calls, 0)
+
+    def test_stored_response_from_another_process_is_replayed(self):
+        self.reserve(self.post(), state=IdempotencyKey.DONE, status=201,
+                     content=b'{"call": 1}', content_type='application/json')
+
+        response = self.view(self.post())
+        self.assertEqual((response.status_code, response.content), (201, b'{"call": 1}'))
+        self.assertEqual(self.calls, 0)
+
+    def test_abandoned_reservation_is_taken_over(self):
+        entry = self.reserve(self.post())
+        IdempotencyKey.objects.filter(pk=entry.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.view(self.post())
+        self.assertEqual((response.status_code, self.calls), (201, 1))
+        self.assertEqual(IdempotencyKey.objects.get().state, IdempotencyKey.DONE)
+
+    def test_prune_removes_expired_keys(self):
+        entry = self.reserve(self.post())
+        self.assertEqual(idempotency.prune(), 0)
+
+        IdempotencyKey.objects.filter(pk=entry.pk).update(expires_at=timezone.now())
+        self.assertEqual(idempotency.prune(), 1)
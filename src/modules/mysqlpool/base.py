@@ -0,0 +1,70 @@
+import threading
+
+import pymysql
+pymysql.install_as_MySQLdb()
+
+from django.db.backends.mysql.base import Database, DatabaseWrapper as MySQLDatabaseWrapper  # noqa: E402
+
+from .pool import ConnectionPool, PoolTimeout  # noqa: E402
+
+# Backend MySQL (PyMySQL) com pool de conexões por processo.
+#
+# Uso em settings.DATABASES:
+#     'ENGINE': 'modules.mysqlpool',
+#     'POOL': {'SIZE': 5, 'TIMEOUT': 10, 'MAX_LIFETIME': 1800},
+#
+# Ao fechar a conexão (fim da requisição, conforme CONN_MAX_AGE), o Django devolve
+# a conexão ao pool em vez de encerrá-la; a próxima requisição reaproveita a conexão
+# já autenticada depois de um ping.
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict, factory):
+    with pools_lock:
+        if alias not in pools:
+            options = settings_dict.get('POOL') or {}
+            pools[alias] = ConnectionPool(
+                factory,
+                size=int(options.get('SIZE', 5)),
+                timeout=float(options.get('TIMEOUT', 10)),
+                max_lifetime=float(options['MAX_LIFETIME']) if options.get('MAX_LIFETIME') else None,
+            )
+        return pools[alias]
+
+
+def pool_stats():
+    # Estatísticas dos pools do processo atual, por alias
+    with pools_lock:
+        return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+class DatabaseWrapper(MySQLDatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.alias, self.settings_dict, lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        try:
+            return pool.acquire()
+        except PoolTimeout as e:
+            raise Database.OperationalError(str(e)) from e
+
+    def _close(self):
+        if self.connection is None:
+            return
+
+        connection = self.connection
+        discard = False
+
+        # Uma transação aberta não pode passar para a próxima requisição
+        if not self.autocommit:
+            try:
+                connection.rollback()
+            except Database.Error:
+                discard = True
+
+        # Conexões com erro de banco só voltam ao pool se ainda responderem
+        if self.errors_occurred and not self.is_usable():
+            discard = True
+
+        pools[self.alias].release(connection, discard=discard)
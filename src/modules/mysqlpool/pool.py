@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+
+    """
+    Pool limitado de conexões persistentes, seguro para uso entre threads.
+
+    Conexões devolvidas ficam ociosas para a próxima requisição. Ao serem retiradas,
+    passam por uma verificação de saúde ('check', por padrão um ping) e são
+    substituídas quando falham ou quando passam de 'max_lifetime' segundos de vida.
+
+    Args:
+        factory (callable): Cria uma nova conexão.
+        size (int): Quantidade máxima de conexões (em uso + ociosas) no processo.
+        timeout (float): Tempo máximo, em segundos, de espera por uma conexão livre.
+        max_lifetime (float, opcional): Idade máxima de uma conexão, em segundos.
+        check (callable, opcional): Verificação de saúde; deve levantar exceção se a
+            conexão não puder ser usada. Padrão é 'connection.ping(reconnect=False)'.
+    """
+
+    def __init__(self, factory, size=5, timeout=10, max_lifetime=None, check=None):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check = check or (lambda connection: connection.ping(reconnect=False))
+
+        self.lock = threading.Condition()
+        self.reset()
+
+    def reset(self):
+        # Estado do processo atual; após um fork as conexões herdadas são descartadas
+        self.pid = os.getpid()
+        self.idle = []
+        self.created = {}
+        self.in_use = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.timeouts = 0
+        self.reconnects = 0
+
+    def acquire(self):
+        with self.lock:
+            if self.pid != os.getpid():
+                # Os sockets pertencem ao processo pai e não podem ser fechados nem reusados aqui
+                self.reset()
+
+            # Espera uma conexão ociosa ou espaço para abrir uma nova
+            start = time.monotonic()
+            while not self.idle and self.in_use >= self.size:
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0 or not self.lock.wait(remaining):
+                    if not self.idle and self.in_use >= self.size:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f'Nenhuma conexão livre no pool após {self.timeout}s ({self.size} em uso)'
+                        )
+
+            waited = time.monotonic() - start
+            if waited > 0.001:
+                self.waits += 1
+                self.wait_time += waited
+                self.max_wait_time = max(self.max_wait_time, waited)
+
+            connection = self.idle.pop() if self.idle else None
+            self.in_use += 1
+
+        # Verificação e abertura de conexões fora do lock, para não bloquear as demais threads
+        try:
+            if connection is not None and not self.healthy(connection):
+                self.discard(connection)
+                connection = None
+                with self.lock:
+                    self.reconnects += 1
+
+            if connection is None:
+                connection = self.factory()
+                with self.lock:
+                    self.created[id(connection)] = time.monotonic()
+
+        except BaseException:
+            with self.lock:
+                self.in_use -= 1
+                self.lock.notify()
+            raise
+
+        return connection
+
+    def release(self, connection, discard=False):
+        with self.lock:
+            if self.pid != os.getpid():
+                return
+
+            self.in_use -= 1
+            keep = not discard and not self.expired(connection)
+            if keep:
+                self.idle.append(connection)
+            else:
+                self.created.pop(id(connection), None)
+            self.lock.notify()
+
+        if not keep:
+            self.close(connection)
+
+    def healthy(self, connection):
+        if self.expired(connection):
+            return False
+        try:
+            self.check(connection)
+        except Exception:
+            return False
+        return True
+
+    def expired(self, connection):
+        created = self.created.get(id(connection))
+        return (
+            self.max_lifetime is not None
+            and created is not None
+            and time.monotonic() - created > self.max_lifetime
+        )
+
+    def discard(self, connection):
+        with self.lock:
+            self.created.pop(id(connection), None)
+        self.close(connection)
+
+    def close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        # Fecha as conexões ociosas; as em uso são fechadas ao serem devolvidas
+        with self.lock:
+            idle, self.idle = self.idle, []
+            for connection in idle:
+                self.created.pop(id(connection), None)
+        for connection in idle:
+            self.close(connection)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'size': self.size,
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'waits': self.waits,
+                'wait_time': round(self.wait_time, 4),
+                'max_wait_time': round(self.max_wait_time, 4),
+                'timeouts': self.timeouts,
+                'reconnects': self.reconnects,
+            }
@@ -0,0 +1,132 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from . import base
+from .pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+        self.rolled_back = False
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise OSError('conexão perdida')
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+
+    def create_pool(self, **kwargs):
+        self.created = []
+
+        def factory():
+            self.created.append(FakeConnection())
+            return self.created[-1]
+
+        return ConnectionPool(factory, **kwargs)
+
+    def test_reuses_released_connection(self):
+        pool = self.create_pool(size=2)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertIs(pool.acquire(), connection)
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(pool.stats()['in_use'], 1)
+        self.assertEqual(pool.stats()['idle'], 0)
+
+    def test_bounded_pool_times_out(self):
+        pool = self.create_pool(size=1, timeout=0.05)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+        self.assertEqual(len(self.created), 1)
+
+    def test_waits_for_released_connection(self):
+        pool = self.create_pool(size=1, timeout=2)
+        connection = pool.acquire()
+
+        def release_later():
+            time.sleep(0.05)
+            pool.release(connection)
+
+        thread = threading.Thread(target=release_later)
+        thread.start()
+        self.assertIs(pool.acquire(), connection)
+        thread.join()
+
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertGreater(stats['wait_time'], 0)
+
+    def test_failed_health_check_reconnects(self):
+        pool = self.create_pool(size=1)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.alive = False
+
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['reconnects'], 1)
+
+    def test_max_lifetime_closes_old_connections(self):
+        pool = self.create_pool(size=1, max_lifetime=0)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['idle'], 0)
+
+    def test_forked_process_drops_inherited_connections(self):
+        pool = self.create_pool(size=1)
+        pool.release(pool.acquire())
+        pool.pid = -1
+
+        connection = pool.acquire()
+        self.assertEqual(len(self.created), 2)
+        self.assertIs(connection, self.created[1])
+        # O socket herdado pertence ao processo pai e não é fechado
+        self.assertFalse(self.created[0].closed)
+
+
+class DatabaseWrapperTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.wrapper = base.DatabaseWrapper({'ENGINE': 'modules.mysqlpool', 'POOL': {'SIZE': 1}}, alias='pool_test')
+        self.addCleanup(base.pools.pop, 'pool_test', None)
+
+    def test_close_returns_connection_to_pool(self):
+        with mock.patch.object(base.MySQLDatabaseWrapper, 'get_new_connection', side_effect=lambda conn_params: FakeConnection()):
+            connection = self.wrapper.get_new_connection({})
+            self.wrapper.connection = connection
+            self.wrapper.autocommit = False
+            self.wrapper._close()
+
+            # Transação aberta é desfeita e a mesma conexão é reaproveitada
+            self.assertTrue(connection.rolled_back)
+            self.assertFalse(connection.closed)
+            self.assertEqual(base.pool_stats()['pool_test']['idle'], 1)
+            self.assertIs(self.wrapper.get_new_connection({}), connection)
+
+    def test_pool_timeout_is_database_error(self):
+        with mock.patch.object(base.MySQLDatabaseWrapper, 'get_new_connection', side_effect=lambda conn_params: FakeConnection()):
+            self.wrapper.get_new_connection({})
+            base.pools['pool_test'].timeout = 0.01
+
+            with self.assertRaises(base.Database.OperationalError):
+                self.wrapper.get_new_connection({})
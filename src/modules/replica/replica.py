@@ -0,0 +1,144 @@
+import math
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Leituras em réplica para as views marcadas com @read_replica.
+#
+# O ReplicaMiddleware cria um estado por requisição; o ReplicaRouter consulta esse
+# estado e envia à réplica apenas as leituras de views marcadas que ainda não
+# escreveram nada. Depois de uma escrita, o cliente fica preso ao banco principal
+# por REPLICA_MAX_LAG segundos, tempo tolerado de atraso da replicação.
+#
+# O prazo fica com o próprio cliente, em um cookie, e não no cache: a leitura seguinte
+# pode ser atendida por qualquer worker ou servidor.
+
+current = ContextVar('replica_request', default=None)
+
+# Cookie com o fim (timestamp) da janela de leitura no banco principal
+STICKY_COOKIE = 'replica_sticky_until'
+
+
+def sticky_until(request):
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, ''))
+    except ValueError:
+        return None
+
+
+class RequestState:
+
+    def __init__(self, until=None):
+        self.until = until
+        self.read = False
+        self.wrote = False
+
+    def sticky(self):
+        return self.until is not None and time.time() < self.until
+
+    def finish(self, request, response):
+        # Abre a janela no cliente quando a requisição escreveu no banco principal
+        if not self.wrote:
+            return
+        lag = settings.REPLICA_MAX_LAG
+        # Entre origens diferentes (frontend e API), o navegador só envia o cookie com SameSite=None
+        secure = request.is_secure()
+        response.set_cookie(
+            STICKY_COOKIE, str(time.time() + lag), max_age=math.ceil(lag),
+            httponly=True, secure=secure, samesite='None' if secure else 'Lax',
+        )
+
+
+def read_replica(view):
+
+    """
+    Marca uma view como somente leitura: suas consultas podem ir para a réplica.
+
+    As leituras voltam ao banco principal quando a própria requisição escreve,
+    dentro de transações e durante a janela após uma escrita da mesma credencial.
+    """
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            state = current.get()
+            if state is not None:
+                state.read = True
+            return await view(request, *args, **kwargs)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            state = current.get()
+            if state is not None:
+                state.read = True
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaMiddleware:
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        state = RequestState(sticky_until(request))
+        token = current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        state.finish(request, response)
+        return response
+
+    async def __acall__(self, request):
+        state = RequestState(sticky_until(request))
+        token = current.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        state.finish(request, response)
+        return response
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = current.get()
+        if (
+            settings.REPLICA_DATABASE is None
+            or state is None
+            or not state.read
+            or state.wrote
+            # Leituras dentro de uma transação precisam ver as escritas dela
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+            or state.sticky()
+        ):
+            return DEFAULT_DB_ALIAS
+        return settings.REPLICA_DATABASE
+
+    def db_for_write(self, model, **hints):
+        state = current.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica e principal têm os mesmos dados
+        databases = {DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
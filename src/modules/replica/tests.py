@@ -0,0 +1,121 @@
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, override_settings
+
+from . import replica
+from .replica import STICKY_COOKIE, ReplicaMiddleware, ReplicaRouter, read_replica
+
+router = ReplicaRouter()
+
+
+@override_settings(REPLICA_DATABASE='replica', REPLICA_MAX_LAG=5)
+class ReplicaRouterTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def call(self, view, cookies=None):
+        # Executa a view pelo middleware e devolve os bancos escolhidos nas leituras
+        self.used = []
+        request = self.factory.get('/')
+        request.COOKIES.update(cookies or {})
+        self.response = ReplicaMiddleware(view)(request)
+        return self.used
+
+    def read(self):
+        self.used.append(router.db_for_read(ContentType))
+
+    def write(self):
+        self.used.append(router.db_for_write(ContentType))
+
+    def test_read_view_uses_replica(self):
+        @read_replica
+        def view(request):
+            self.read()
+            return HttpResponse()
+
+        self.assertEqual(self.call(view), ['replica'])
+
+    def test_other_views_use_primary(self):
+        def view(request):
+            self.read()
+            return HttpResponse()
+
+        self.assertEqual(self.call(view), ['default'])
+
+    def test_reads_after_write_stay_on_primary(self):
+        @read_replica
+        def view(request):
+            self.read()
+            self.write()
+            self.read()
+            return HttpResponse()
+
+        self.assertEqual(self.call(view), ['replica', 'default', 'default'])
+
+    def test_sticky_window_after_write(self):
+        def write_view(request):
+            self.write()
+            return HttpResponse()
+
+        @read_replica
+        def read_view(request):
+            self.read()
+            return HttpResponse()
+
+        self.call(write_view)
+        cookie = self.response.cookies[STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+
+        # O cliente que escreveu lê do principal, em qualquer processo; os demais, da réplica
+        self.assertEqual(self.call(read_view, {STICKY_COOKIE: cookie.value}), ['default'])
+        self.assertEqual(self.call(read_view), ['replica'])
+
+        # Fim da janela
+        with mock.patch.object(replica.time, 'time', return_value=float(cookie.value) + 1):
+            self.assertEqual(self.call(read_view, {STICKY_COOKIE: cookie.value}), ['replica'])
+        self.assertEqual(self.call(read_view, {STICKY_COOKIE: 'x'}), ['replica'])
+
+    def test_reads_do_not_set_cookie(self):
+        @read_replica
+        def view(request):
+            self.read()
+            return HttpResponse()
+
+        self.call(view)
+        self.assertNotIn(STICKY_COOKIE, self.response.cookies)
+
+    def test_transactions_use_primary(self):
+        @read_replica
+        def view(request):
+            with mock.patch.object(connections['default'], 'in_atomic_block', True):
+                self.read()
+            return HttpResponse()
+
+        self.assertEqual(self.call(view), ['default'])
+
+    @override_settings(REPLICA_DATABASE=None)
+    def test_without_replica(self):
+        @read_replica
+        def view(request):
+            self.read()
+            return HttpResponse()
+
+        self.assertEqual(self.call(view), ['default'])
+
+    async def test_async_read_view(self):
+        used = []
+
+        @read_replica
+        async def view(request):
+            used.append(router.db_for_read(ContentType))
+            return HttpResponse()
+
+        async def get_response(request):
+            return await view(request)
+
+        await ReplicaMiddleware(get_response)(AsyncRequestFactory().get('/'))
+        self.assertEqual(used, ['replica'])
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'src.settings')
 
 application = get_asgi_application()
+
+# Carrega rotas e views antes da primeira requisição
+from src.startup import warm_up  # noqa: E402
+
+warm_up()
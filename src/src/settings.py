@@ -12,22 +12,22 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 
-# Buscar as informações do arquivo .env
-from dotenv import load_dotenv
 import os
 import sys
 
-# Configurar url post db
-import dj_database_url
-import pymysql
-pymysql.install_as_MySQLdb()
-
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Carrega as variáveis de ambiente do arquivo .env
-load_dotenv(dotenv_path=BASE_DIR / ".env")
-print("DB HOST >>>", os.getenv("DATABASE_HOST"))
+# Carrega as variáveis de ambiente do arquivo .env, quando existir
+# (em produção as variáveis já vêm do ambiente e o python-dotenv nem é importado)
+if (BASE_DIR / ".env").exists():
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=BASE_DIR / ".env")
+
+# O PyMySQL só é carregado quando o banco configurado é o MySQL
+if "mysql" in os.getenv("DATABASE_ENGINE", ""):
+    import pymysql
+    pymysql.install_as_MySQLdb()
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
@@ -53,6 +53,7 @@ INSTALLED_APPS = [
     # Adicionar os novos aplicativos
     'engsol',
     'account',
+    'modules.idempotency',
 
     # Adicionar o cors
     'corsheaders',
@@ -115,6 +116,19 @@ else:
             'HOST': os.getenv("DATABASE_HOST"),
             # Porta do banco de dados (opcional, padrão para MySQL é 3306)                   
             'PORT': os.getenv("DATABASE_PORT"),
+            # Segundos que uma conexão é mantida entre requisições (0 fecha/devolve ao pool a cada requisição)
+            'CONN_MAX_AGE': int(os.getenv("DATABASE_CONN_MAX_AGE", "0")),
+            # Verifica se a conexão persistente ainda responde antes de reaproveitá-la
+            'CONN_HEALTH_CHECKS': os.getenv("DATABASE_CONN_HEALTH_CHECKS", "False").lower() == "true",
+            # Pool de conexões (apenas com DATABASE_POOL=true, ver 'modules/mysqlpool')
+            'POOL': {
+                # Máximo de conexões abertas por processo
+                'SIZE': int(os.getenv("DATABASE_POOL_SIZE", "5")),
+                # Segundos de espera por uma conexão livre antes de falhar
+                'TIMEOUT': float(os.getenv("DATABASE_POOL_TIMEOUT", "10")),
+                # Idade máxima (segundos) de uma conexão; deve ser menor que o wait_timeout do MySQL
+                'MAX_LIFETIME': float(os.getenv("DATABASE_POOL_MAX_LIFETIME", "1800")),
+            },
             'OPTIONS': {
                 #'charset': 'utf8mb4',              # Suporte a caracteres especiais
                 #'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",  # Recomendado para integridade dos dados
@@ -122,6 +136,34 @@ else:
         }
 }
 
+    # Backend com pool de conexões para o MySQL
+    if os.getenv("DATABASE_POOL", "False").lower() == "true" and "mysql" in (DATABASES['default']['ENGINE'] or ""):
+        DATABASES['default']['ENGINE'] = 'modules.mysqlpool'
+
+    # Réplica de leitura: os DATABASE_REPLICA_* informados substituem os do banco principal
+    # (para testar localmente com dois arquivos SQLite, basta DATABASE_REPLICA_NAME)
+    replica = {
+        name: os.getenv(f"DATABASE_REPLICA_{name}")
+        for name in ('ENGINE', 'NAME', 'USER', 'PASSWORD', 'HOST', 'PORT')
+    }
+    if any(replica.values()):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            **{name: value for name, value in replica.items() if value},
+            'TEST': {'MIRROR': 'default'},
+        }
+
+# Leituras das views marcadas com @read_replica vão para a réplica, quando configurada
+REPLICA_DATABASE = 'replica' if 'replica' in DATABASES else None
+
+# Segundos em que um cliente lê do banco principal após escrever (atraso tolerado da replicação;
+# o prazo vai no cookie 'replica_sticky_until')
+REPLICA_MAX_LAG = float(os.getenv("DATABASE_REPLICA_MAX_LAG", "5"))
+
+if REPLICA_DATABASE:
+    DATABASE_ROUTERS = ['modules.replica.replica.ReplicaRouter']
+    MIDDLEWARE.append('modules.replica.replica.ReplicaMiddleware')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -159,6 +201,68 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Em produção com vários workers, use um backend compartilhado (ex.: Redis)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# Carregar as rotas e views na inicialização da aplicação WSGI/ASGI, antes da primeira
+# requisição (com o preload do gunicorn, o carregamento é compartilhado pelos workers)
+WARM_UP = os.getenv("WARM_UP", "True").lower() == "true"
+
+# Tempo (segundos) do documento do search_project em cache; as escritas o regravam antes disso
+SEARCH_PROJECT_CACHE_TIMEOUT = int(os.getenv("SEARCH_PROJECT_CACHE_TIMEOUT", "86400"))
+
+# Menor palavra presente no índice FULLTEXT do MySQL (innodb_ft_min_token_size é 3 no
+# InnoDB; ft_min_word_len é 4 no MyISAM). Buscas com palavras menores usam LIKE
+SEARCH_MIN_TOKEN_SIZE = int(os.getenv("SEARCH_MIN_TOKEN_SIZE", "4"))
+
+# Dias de retenção do feed de alterações (comando prune_changes)
+CHANGES_RETENTION_DAYS = int(os.getenv("CHANGES_RETENTION_DAYS", "7"))
+
+# Atraso (segundos) com que o feed de alterações e os eventos servem cada alteração,
+# para que um INSERT de id menor ainda não confirmado não seja pulado pelos cursores
+# (deve ser maior que a duração das transações de escrita)
+CHANGES_VISIBILITY_LAG = float(os.getenv("CHANGES_VISIBILITY_LAG", "2"))
+
+# Snapshot do list_project: tempo (segundos) de cada versão no cache e níveis de compressão
+PORTFOLIO_SNAPSHOT_TIMEOUT = int(os.getenv("PORTFOLIO_SNAPSHOT_TIMEOUT", "86400"))
+PORTFOLIO_SNAPSHOT_GZIP_LEVEL = int(os.getenv("PORTFOLIO_SNAPSHOT_GZIP_LEVEL", "6"))
+PORTFOLIO_SNAPSHOT_BROTLI_QUALITY = int(os.getenv("PORTFOLIO_SNAPSHOT_BROTLI_QUALITY", "5"))
+
+# Tempo (segundos) sem progresso após o qual um job de exclusão em execução pode ser retomado
+DELETION_JOB_LEASE = int(os.getenv("DELETION_JOB_LEASE", "300"))
+
+# Máximo de meses por requisição da série de entregas
+DELIVERY_SERIES_MAX_MONTHS = int(os.getenv("DELIVERY_SERIES_MAX_MONTHS", "120"))
+
+# Máximo de operações por requisição do endpoint batch
+BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "100"))
+
+# Idempotency-Key nas views de escrita: tempo (segundos) da resposta guardada e prazo da
+# reserva de uma requisição em andamento
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", "60"))
+
+# Usar as views de leitura assíncronas (servidor ASGI, ex.: uvicorn)
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "False").lower() == "true"
+
+# Eventos da timeline (project_events): intervalo (segundos) entre as consultas ao feed de
+# alterações, intervalo do heartbeat, eventos pendentes por conexão e espera (ms) do
+# navegador antes de reconectar
+EVENTS_POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", "1"))
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_RETRY = int(os.getenv("EVENTS_RETRY", "3000"))
+
+# Intervalo (segundos) entre as verificações de versão dos dados mantidos em memória
+VERSION_CHECK_INTERVAL = float(os.getenv("VERSION_CHECK_INTERVAL", "2"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -207,6 +311,7 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'idempotency-key',
     'origin',
     'user-agent',
     'x-csrftoken',
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.urls import get_resolver
+
+
+def warm_up():
+
+    """
+    Carrega as rotas e, com elas, todos os módulos de views, antes da primeira
+    requisição.
+
+    Chamado na criação da aplicação WSGI/ASGI. Com o 'preload_app' do gunicorn
+    (ver 'gunicorn.conf.py'), isso acontece uma única vez no processo principal e os
+    workers já nascem com os módulos carregados.
+    """
+
+    if settings.WARM_UP:
+        # Importa o ROOT_URLCONF e os urls/views incluídos
+        get_resolver().url_patterns
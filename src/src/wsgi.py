@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'src.settings')
 
 application = get_wsgi_application()
+
+# Carrega rotas e views antes da primeira requisição
+from src.startup import warm_up  # noqa: E402
+
+warm_up()